@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from pathlib import Path
 from loguru import logger
 from config.settings import LOGS_DIR, LOG_LEVEL, LOG_ROTATION, LOG_RETENTION
@@ -40,11 +41,99 @@ def main():
         logger.info("일일 재고 CSV 생성 완료")
         return
 
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        # 기간 리포트 재생성 모드 (예: backfill --from 2026-02-01 --to 2026-02-28)
+        logger.info("리포트 백필 시작")
+        from src.analyzer.backfill import main as backfill_main
+        backfill_main(sys.argv[2:])
+        logger.info("리포트 백필 완료")
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "archive":
+        # 오래된 스냅샷 압축 보관 모드 (예: archive --days 60)
+        from config.settings import DB_EXPORT_OUTPUT_DIR
+        from src.processor.snapshot_archive import SNAPSHOT_ARCHIVE_AFTER_DAYS, archive_snapshots
+        days = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[2] == "--days" else SNAPSHOT_ARCHIVE_AFTER_DAYS
+        logger.info(f"스냅샷 압축 보관 시작 ({days}일 이전)")
+        count = archive_snapshots(DB_EXPORT_OUTPUT_DIR, days)
+        logger.info(f"스냅샷 압축 보관 완료: {count}개")
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "process":
+        # 스냅샷 일괄 정규화 모드 (예: process 2026-02 → 한 달치를 data/processed/에 저장)
+        from config.settings import DB_EXPORT_OUTPUT_DIR
+        from src.processor.data_processor import DataProcessor
+        from src.processor.snapshot_archive import list_all_snapshots, list_snapshots
+        if len(sys.argv) > 2:
+            files = list_snapshots(DB_EXPORT_OUTPUT_DIR / sys.argv[2])
+        else:
+            files = list_all_snapshots(DB_EXPORT_OUTPUT_DIR)
+        logger.info(f"스냅샷 일괄 정규화 시작: {len(files)}개")
+        DataProcessor().run_many(files, keep=False)
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "validate":
+        # 스냅샷 품질 검사 모드 (예: validate output/daily-stock/2026-02/Stock_2026-02-23_0800.csv, 격리는 하지 않음)
+        import json
+        from src.processor.snapshot_quality import validate_snapshot_file
+        if len(sys.argv) < 3:
+            print("사용법: python main.py validate <스냅샷 CSV 경로>")
+            return
+        report = validate_snapshot_file(sys.argv[2])
+        print(json.dumps(report, ensure_ascii=False, indent=2) if report else f"{sys.argv[2]}: 파일을 읽을 수 없습니다")
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "notion-plan":
+        # Notion 업로드 요청 수 미리 계산 모드 (예: notion-plan output/report_2026-02-23.md, 전송하지 않음)
+        import json
+        import os
+        from src.reporter.markdown_to_notion import plan_requests
+        if len(sys.argv) < 3:
+            print("사용법: python main.py notion-plan <리포트 마크다운 경로>")
+            return
+        with open(sys.argv[2], encoding="utf-8") as f:
+            markdown = f.read()
+        # 데이터베이스 리포트는 마크다운 테이블을 코드 블록으로 올림
+        table_mode = "code" if os.getenv("NOTION_PARENT_TYPE", "page").lower() == "database" else "table"
+        print(json.dumps(plan_requests(markdown, table_mode), ensure_ascii=False, indent=2))
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "lookup":
+        # 상품 1개 수량 조회 모드 (예: lookup P001 2026-02-23, 날짜 생략 시 최근 스냅샷)
+        from src.analyzer.daily_stock_accuracy_analyzer import lookup_sku
+        if len(sys.argv) < 3:
+            print("사용법: python main.py lookup <상품코드> [YYYY-MM-DD]")
+            return
+        record = lookup_sku(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        print(record if record is not None else f"{sys.argv[2]}: 스냅샷에 없는 상품입니다")
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        # 조회 API 단독 실행 모드 (스케줄러 없이)
+        from src.api.query_api import create_query_server, get_query_cache, QUERY_API_HOST, QUERY_API_PORT
+        get_query_cache().refresh()
+        server = create_query_server()
+        logger.info(f"조회 API 시작: http://{QUERY_API_HOST}:{QUERY_API_PORT}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("조회 API 종료")
+        return
+
     # 기본 모드: 스케줄러 실행
     logger.info("WMS 재고 이력 스케줄링 서비스 시작")
 
     scheduler = create_scheduler()
 
+    # 이전 실행에서 끝나지 않은 Notion/슬랙 전송 재시도 (백그라운드)
+    from src.analyzer.daily_stock_accuracy_analyzer import get_delivery_worker
+    get_delivery_worker()
+
+    # 조회 API (선택, 같은 프로세스에서 스냅샷 비교 결과 캐시를 공유)
+    from src.api.query_api import QUERY_API_ENABLED, start_query_server
+    if QUERY_API_ENABLED:
+        start_query_server()
+
     try:
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
@@ -52,4 +141,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # PyInstaller 실행 파일에서 프로세스 풀(backfill) 사용 시 필요
+    multiprocessing.freeze_support()
     main()
@@ -13,5 +13,17 @@ def run_db_export_job():
         from src.downloader.daily_stock_exporter import export_stock_data
         export_stock_data()
         logger.info("=== [JOB] 일일 재고 CSV 생성 완료 ===")
+
+        # 조회 API를 띄운 경우 새 스냅샷으로 캐시 갱신
+        from src.api.query_api import refresh_query_cache
+        refresh_query_cache()
     except Exception as e:
         logger.error(f"[JOB] 일일 재고 CSV 생성 오류: {e}")
+
+    # 오래된 스냅샷 월별 압축 보관 (실패해도 원본은 그대로 남음)
+    try:
+        from config.settings import DB_EXPORT_OUTPUT_DIR
+        from src.processor.snapshot_archive import archive_snapshots
+        archive_snapshots(DB_EXPORT_OUTPUT_DIR)
+    except Exception as e:
+        logger.error(f"[JOB] 스냅샷 압축 보관 오류: {e}")
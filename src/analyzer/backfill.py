@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📦 리포트 백필 (기간 재생성)
+- 지정 기간의 스냅샷을 날짜순으로 나열하고 인접한 두 스냅샷마다 리포트를 다시 생성
+- 스냅샷 목록을 연속 구간으로 나눠 프로세스 풀에서 병렬 처리
+- 각 구간 안에서는 파싱한 스냅샷을 다음 쌍의 '어제' 데이터로 재사용 (스냅샷당 1회 파싱)
+- Notion/슬랙 전송은 기본적으로 생략 (--send 지정 시에만 전송)
+- 입력 스냅샷과 리포트 로직 버전이 이전 실행과 같으면 생략 (--force 지정 시 다시 생성)
+
+사용법:
+    python main.py backfill --from 2026-02-01 --to 2026-02-28
+    python main.py backfill --from 2026-02-01 --to 2026-02-28 --workers 4 --send
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# 프로젝트 루트를 sys.path에 추가 (config 모듈 import를 위해)
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.analyzer import daily_stock_accuracy_analyzer as analyzer
+from src.processor.snapshot_archive import list_all_snapshots
+from src.processor.snapshot_manifest import verify_snapshot
+from src.reporter.report_run import ReportRun, compute_run_key
+
+
+def list_daily_snapshots(input_dir, date_from, date_to):
+    """
+    기간 내 일자별 스냅샷 목록 (날짜당 검증을 통과한 가장 늦은 시간 파일 1개)
+
+    첫 리포트의 비교 대상이 되도록 date_from 직전 스냅샷 1개를 앞에 포함합니다.
+
+    Returns:
+        [(date_str, filepath), ...] 날짜 오름차순
+    """
+    files = list_all_snapshots(input_dir)
+
+    latest_per_date = {}
+    for filepath in files:
+        match = re.search(r'Stock_?(\d{4}-\d{2}-\d{2})(?:_(\d{4}))?', os.path.basename(filepath))
+        if not match:
+            continue
+        date_str, time_str = match.group(1), match.group(2) or "0000"
+        if date_str > date_to:
+            continue
+        # 쓰다 만 파일은 제외 (해시는 로드할 때 검증)
+        if not verify_snapshot(filepath, check_hash=False)[0]:
+            continue
+        current = latest_per_date.get(date_str)
+        if current is None or time_str > current[0]:
+            latest_per_date[date_str] = (time_str, filepath)
+
+    dates = sorted(latest_per_date)
+    in_range = [d for d in dates if d >= date_from]
+    before = [d for d in dates if d < date_from]
+    selected = before[-1:] + in_range
+
+    return [(d, latest_per_date[d][1]) for d in selected]
+
+
+def split_into_chunks(snapshots, workers):
+    """
+    스냅샷 목록을 연속 구간으로 분할 (구간 경계 스냅샷은 양쪽 구간에 포함)
+
+    예: [a, b, c, d, e], 2개 구간 → [a, b, c], [c, d, e]
+    """
+    pair_count = len(snapshots) - 1
+    if pair_count <= 0:
+        return []
+
+    workers = max(1, min(workers, pair_count))
+    pairs_per_chunk, extra = divmod(pair_count, workers)
+
+    chunks = []
+    start = 0
+    for i in range(workers):
+        size = pairs_per_chunk + (1 if i < extra else 0)
+        chunks.append(snapshots[start:start + size + 1])
+        start += size
+    return chunks
+
+
+def _run_chunk(chunk, input_dir, output_dir, force=False):
+    """
+    (프로세스 풀 작업) 연속 구간의 인접 스냅샷 쌍마다 리포트 생성
+
+    - 직전에 파싱한 스냅샷을 다음 쌍의 '어제' 데이터로 재사용
+    - 입력 스냅샷/리포트 로직 버전이 이전 실행과 같으면 파싱/렌더링 생략 (force=True면 항상 생성)
+    """
+    product_dict = analyzer.ProductDictionary(input_dir)
+    loaded = {}  # filepath -> DataFrame (현재/직전 스냅샷만 유지)
+
+    def load(filepath):
+        if filepath not in loaded:
+            loaded[filepath] = analyzer.load_csv_file_directly(filepath)
+        return loaded[filepath]
+
+    results = []
+    previous = None  # (filepath, 일시 문자열)
+    for date_str, filepath in chunk:
+        current_str = analyzer.get_datetime_from_filename(filepath)
+
+        if previous is not None:
+            previous_path, previous_str = previous
+            report_date = current_str.split()[0]
+            # 백필은 이상 점수 상태 없이 렌더링하므로 키도 anomaly=off (오늘 실행이 이 키로 생략되지 않도록)
+            run_key = compute_run_key([previous_path, filepath], analyzer.report_logic_key(anomaly=False))
+            run = ReportRun(output_dir, report_date)
+
+            if not force and run.is_rendered(run_key):
+                results.append({
+                    'report_date': report_date,
+                    'yesterday_str': previous_str,
+                    'md_path': run.data['md_path'],
+                    'changed_count': run.data['changed_count'],
+                    'skipped': True,
+                })
+            else:
+                current_df = load(filepath)
+                previous_df = load(previous_path)
+                if current_df is None:
+                    # 로드 실패한 스냅샷은 건너뛰고 마지막 정상 스냅샷과 다음 스냅샷을 비교
+                    continue
+                if previous_df is not None:
+                    report = analyzer.build_and_save_report(
+                        previous_df, current_df, current_str, output_dir, product_dict, run_key
+                    )
+                    if report is not None:
+                        run.record_render(run_key, [previous_path, filepath], report['md_path'], len(report['changed']))
+                        results.append({
+                            'report_date': report['report_date'],
+                            'yesterday_str': previous_str,
+                            'md_path': report['md_path'],
+                            'changed_count': len(report['changed']),
+                            'skipped': False,
+                        })
+
+        # 다음 쌍에서 재사용할 현재 스냅샷만 남김
+        for path in [p for p in loaded if p != filepath]:
+            del loaded[path]
+        previous = (filepath, current_str)
+
+    return results
+
+
+def run_backfill(date_from, date_to, workers=None, output_dir=None, send=False, input_dir=None, force=False):
+    """
+    기간 리포트 재생성
+
+    Args:
+        date_from: 시작일 (YYYY-MM-DD, 포함)
+        date_to: 종료일 (YYYY-MM-DD, 포함)
+        workers: 프로세스 수 (None이면 CPU 수)
+        output_dir: 리포트 저장 폴더 (None이면 analyzer OUTPUT_DIR)
+        send: True면 재생성한 리포트를 Notion/슬랙으로 전송
+        input_dir: 스냅샷 폴더 (None이면 analyzer INPUT_DIR)
+        force: True면 이전 실행과 입력이 같아도 리포트를 다시 생성
+
+    Returns:
+        생성된 리포트 정보 리스트 (날짜순)
+    """
+    input_dir = input_dir or analyzer.INPUT_DIR
+    output_dir = output_dir or analyzer.OUTPUT_DIR
+    workers = workers or os.cpu_count() or 1
+
+    snapshots = list_daily_snapshots(input_dir, date_from, date_to)
+    chunks = split_into_chunks(snapshots, workers)
+
+    print(f"\n📦 백필 시작: {date_from} ~ {date_to}")
+    print(f"  스냅샷: {len(snapshots)}개 / 리포트: {max(len(snapshots) - 1, 0)}개 / 프로세스: {len(chunks)}개")
+
+    if not chunks:
+        print("❌ 비교할 스냅샷이 부족합니다.")
+        return []
+
+    started = time.perf_counter()
+    results = []
+    if len(chunks) == 1:
+        results.extend(_run_chunk(chunks[0], input_dir, output_dir, force))
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [executor.submit(_run_chunk, chunk, input_dir, output_dir, force) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+
+    results.sort(key=lambda r: r['report_date'])
+    elapsed = time.perf_counter() - started
+    skipped = sum(1 for r in results if r['skipped'])
+    print(f"\n✅ 백필 완료: 리포트 {len(results)}개 (변경 없음 {skipped}개 생략, {elapsed:.1f}초)")
+
+    # 전송은 API 호출 순서 보장을 위해 메인 프로세스에서 날짜순으로 처리
+    if send:
+        for result in results:
+            with open(result['md_path'], encoding='utf-8') as f:
+                md_report = f.read()
+            analyzer.send_report_notifications(
+                md_report, result['changed_count'], result['report_date'], result['yesterday_str'],
+                ReportRun(output_dir, result['report_date']),
+                analyzer.load_brand_summary(output_dir, result['report_date']),
+                analyzer.load_report_summary(output_dir, result['report_date'])
+            )
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="backfill", description="기간 리포트 재생성")
+    parser.add_argument("--from", dest="date_from", required=True, help="시작일 (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", required=True, help="종료일 (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--output", default=None, help="리포트 저장 폴더 (기본: ./output)")
+    parser.add_argument("--send", action="store_true", help="Notion/슬랙 전송 (기본: 전송 안 함)")
+    parser.add_argument("--force", action="store_true", help="입력이 같아도 리포트 다시 생성")
+    args = parser.parse_args(argv)
+
+    return run_backfill(args.date_from, args.date_to, args.workers, args.output, args.send, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
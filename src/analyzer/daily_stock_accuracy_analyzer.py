@@ -7,10 +7,16 @@
 - Claude AI와 호환되는 형식
 """
 
+import json
+import re
 import sys
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
+import threading
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 import requests
@@ -35,6 +41,16 @@ os.environ['PYTHONHTTPSVERIFY'] = '0'
 os.environ['CURL_CA_BUNDLE'] = ''
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# 프로젝트 모듈
+from src.processor.anomaly_state import AnomalyState
+from src.processor.data_processor import SNAPSHOT_DTYPES, SNAPSHOT_DUPLICATE_POLICY, DataProcessor, dedupe_keys
+from src.processor.product_dictionary import ProductDictionary
+from src.processor.snapshot_archive import list_all_snapshots, list_snapshots, open_snapshot
+from src.processor.snapshot_cache import snapshot_cache
+from src.processor.snapshot_manifest import expected_rows, verify_snapshot
+from src.reporter.delivery_outbox import DeliveryOutbox, DeliveryWorker, RetryDelivery
+from src.reporter.report_run import ReportRun, compute_run_key
+
 # ========================================
 # ⚙️ 설정 (여기만 수정하면 됨!)
 # ========================================
@@ -54,20 +70,84 @@ except ImportError as e:
 # 리포트 저장 폴더
 OUTPUT_DIR = "./output"
 
+# 변동 상품 기준 (일치율 변동폭 %p, CMS/WMS수량 변화량 중 큰 쪽의 절대값)
+REPORT_MIN_ACCURACY_CHANGE = float(os.getenv("REPORT_MIN_ACCURACY_CHANGE", "0"))
+REPORT_MIN_QTY_DELTA = float(os.getenv("REPORT_MIN_QTY_DELTA", "0"))
+
+# 리포트 상세 표에 넣을 상품 수 (증가/감소 방향별, 브랜드별 / 0이면 제한 없음)
+REPORT_TOP_N = int(os.getenv("REPORT_TOP_N", "0"))
+REPORT_TOP_N_PER_BRAND = int(os.getenv("REPORT_TOP_N_PER_BRAND", "0"))
+
+# 이상 변동 점수 (상품별 과거 변동 통계 대비 z-점수, 스냅샷 폴더의 anomaly_state.* 파일에 누적)
+ANOMALY_SCORING = os.getenv("ANOMALY_SCORING", "true").lower() == "true"
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3"))
+ANOMALY_TOP_N = int(os.getenv("ANOMALY_TOP_N", "20"))
+
+# 엑셀 리포트 (요약/증가/감소/브랜드별 시트, 스트리밍 저장이라 행 수가 많아도 메모리 일정)
+REPORT_XLSX = os.getenv("REPORT_XLSX", "true").lower() == "true"
+
+# 리포트 로직 버전 (리포트 내용/형식이 바뀌면 올려야 기존 리포트가 다시 생성됨)
+REPORT_LOGIC_VERSION = "1.6.0"
+
+
+def report_logic_key(anomaly=None):
+    """
+    실행 키에 넣을 리포트 로직 식별자
+    (버전 + 변동 기준/상세 표 제한/이상 점수/엑셀/상품코드 중복 처리 설정 + 리포트 내용에 들어가는 TEST_MODE 제목 접두사/CMS 링크 주소)
+
+    Args:
+        anomaly: 이번 실행에서 이상 점수를 실제로 계산하는지 (None이면 ANOMALY_SCORING 설정).
+                 이상 점수 없이 만든 리포트(백필 등)가 점수가 들어간 리포트의 키로 기록되면 안 됨
+    """
+    if anomaly is None:
+        anomaly = ANOMALY_SCORING
+    test_mode = os.getenv("TEST_MODE", "false").lower() == "true"
+    cms_url = os.getenv("CMS_URL", "http://localcms.siliconii.com")
+    anomaly_key = f"{ANOMALY_Z_THRESHOLD};anomaly_top={ANOMALY_TOP_N}" if anomaly else "off"
+    return (f"{REPORT_LOGIC_VERSION};min_change={REPORT_MIN_ACCURACY_CHANGE};min_qty={REPORT_MIN_QTY_DELTA};"
+            f"top={REPORT_TOP_N};top_brand={REPORT_TOP_N_PER_BRAND};"
+            f"anomaly={anomaly_key};xlsx={REPORT_XLSX};"
+            f"duplicates={SNAPSHOT_DUPLICATE_POLICY};test={test_mode};cms_url={cms_url}")
+
+
+# 슬랙 전송 전 Notion 페이지 URL을 기다리는 최대 시간 (초과하면 URL 없이 전송)
+NOTION_URL_WAIT_SECONDS = int(os.getenv("NOTION_URL_WAIT_SECONDS", "60"))
+
+# 리포트 실행 시 전송 완료를 기다리는 최대 시간 (초과분은 전송 대기열에서 계속 재시도)
+DELIVERY_WAIT_SECONDS = int(os.getenv("DELIVERY_WAIT_SECONDS", "120"))
+
+# 프로세스 공용 전송 워커 (get_delivery_worker)
+_delivery_worker = None
+_delivery_worker_lock = threading.Lock()
+
+# 전송 작업들이 같은 실행 기록 파일을 갱신하므로 읽기-수정-저장을 직렬화
+_run_record_lock = threading.Lock()
+
 # 파일명 형식 (당신의 파일명에 맞게)
 # 예: Stock2026-02-11.csv
 FILE_FORMAT = "Stock_{date}.csv"
 
 # ========================================
-# 📋 CSV 컬럼명 매핑 (파일 컬럼명에 맞게 수정)
+# 📋 CSV 컬럼명 매핑: src/processor/data_processor.py의 COLUMN_MAP (파일 컬럼명에 맞게 수정)
 # ========================================
-COL_PROD_CD   = "상품코드"
-COL_PRODUCT_NAME = "상품명"
-COL_BRAND        = "브랜드"
-COL_CMS_QTY      = "CMS 재고"
-COL_WMS_QTY      = "WMS 재고"
-COL_WAITING_QTY  = "대기 수량"
-COL_ACCURACY     = "일치율"    # CSV에 이미 존재하는 일치율 컬럼
+
+# 스냅샷 정규화 (컬럼명 통일, 수치 변환, 일치율 파싱, 합계 행 제거)
+snapshot_processor = DataProcessor()
+
+# 보관 위치별 수량 컬럼 (내부 처리용 이름 → 리포트 표시명)
+SOURCE_COLUMNS = {
+    'loc_qty':     '로케이션',
+    'agv1_qty':    'AGV1',
+    'agv4_qty':    'AGV4',
+    'waiting_qty': '대기',
+}
+
+# 불일치 원인 구분 (보관 위치 + 위치 구분이 없는 WMS 수량 + CMS만 움직인 경우)
+MISMATCH_SOURCES = {
+    **SOURCE_COLUMNS,
+    'wms_other_qty': 'WMS 기타',
+    'cms_only':      'CMS 단독',
+}
 
 print(f"🔧 설정")
 print(f"  입력: {INPUT_DIR}")
@@ -133,45 +213,13 @@ def load_and_prepare_data(input_dir, file_format, target_date):
     try:
         # CSV 읽기 (한글 인코딩 - utf-8-sig는 BOM 포함 파일도 처리)
         try:
-            df = pd.read_csv(filepath, encoding='utf-8-sig')
+            df = pd.read_csv(filepath, encoding='utf-8-sig', dtype=SNAPSHOT_DTYPES)
         except UnicodeDecodeError:
-            df = pd.read_csv(filepath, encoding='cp949')
-
-        # 마지막 행 제거 (합계/요약 행)
-        df = df.iloc[:-1]
-
-        # 컬럼 정규화 (내부 처리용 이름으로 통일)
-        df = df.rename(columns={
-            COL_PROD_CD:     'prod_cd',
-            COL_PRODUCT_NAME: 'prod_nm',
-            COL_CMS_QTY:     'cms_qty',
-            COL_WMS_QTY:     'wms_qty',
-            COL_WAITING_QTY: 'waiting_qty',
-        })
-
-        # 수치 컬럼 강제 변환 (문자열/NaN → 숫자, 변환 불가 값은 0)
-        for col in ('cms_qty', 'wms_qty', 'waiting_qty'):
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-
-        # 일치율: CSV에 이미 존재하면 그대로 사용, 없으면 계산
-        if COL_ACCURACY in df.columns:
-            # "0%" 같은 문자열이면 숫자로 변환
-            df['accuracy'] = (
-                df[COL_ACCURACY]
-                .astype(str)
-                .str.replace('%', '', regex=False)
-                .str.strip()
-                .apply(lambda x: float(x) if x not in ('', 'nan') else 0.0)
-            )
-        else:
-            df['accuracy'] = df.apply(
-                lambda row: calculate_accuracy(
-                    row.get('cms_qty'),
-                    row.get('wms_qty'),
-                    row.get('waiting_qty')
-                ), axis=1
-            )
+            df = pd.read_csv(filepath, encoding='cp949', dtype=SNAPSHOT_DTYPES)
+
+        # 정규화 (합계 행 제거, 컬럼명 통일, 수치 변환, 일치율, 상품코드 중복 정리)
+        df = snapshot_processor.process(df)
+        print_duplicates(df)
 
         print(f"  ✅ 로드 완료: {len(df)}개 상품")
         return df
@@ -184,26 +232,188 @@ def load_and_prepare_data(input_dir, file_format, target_date):
         return None
 
 
-def compare_inventory(yesterday_df, today_df):
+def print_duplicates(df):
+    """로드 시 정리된 상품코드 중복 출력 (dedupe_keys 결과, 없으면 출력 안 함)"""
+    duplicates = df.attrs.get('duplicates')
+    if duplicates:
+        print(f"  ⚠️ 상품코드 중복: {duplicates['key_count']}개 상품 / {duplicates['rows']}행 → "
+              f"{duplicates['policy']} 처리 (예: {', '.join(duplicates['keys'][:5])})")
+
+
+def _scatter_by_id(values, ids, size):
+    """
+    값 배열을 정수 ID 위치에 배치한 밀집 배열 생성 (없는 위치는 NaN/None)
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        dense = np.full(size, np.nan)
+        dense[ids] = values.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        dense = np.full(size, None, dtype=object)
+        dense[ids] = values.to_numpy(dtype=object)
+    return dense
+
+
+def align_by_product_id(today_df, yesterday_df, product_dict):
+    """
+    두 스냅샷을 상품코드 사전의 정수 ID로 정렬 (outer join과 동일한 결과)
+
+    문자열 해시 조인 대신 ID 위치에 직접 배치(direct indexing)하여 병합합니다.
+    양쪽 컬럼에는 _today / _yesterday 접미사가 붙습니다.
+    같은 상품코드가 여러 행이면 ID 위치가 겹쳐 마지막 행만 남으므로, 정렬 전에 dedupe_keys로 정리합니다
+    (로더를 거친 스냅샷은 이미 유일하므로 중복 확인만 하고 그대로 사용).
+    """
+    today_df = dedupe_keys(today_df)
+    yesterday_df = dedupe_keys(yesterday_df)
+    ids_today = product_dict.encode(today_df['prod_cd'])
+    ids_yesterday = product_dict.encode(yesterday_df['prod_cd'])
+    size = len(product_dict)
+
+    present = np.zeros(size, dtype=bool)
+    present[ids_today] = True
+    present[ids_yesterday] = True
+    universe = np.flatnonzero(present)
+
+    columns = {
+        'prod_id': universe,
+        'prod_cd': product_dict.decode(universe),
+    }
+    for df, ids, suffix in ((today_df, ids_today, '_today'), (yesterday_df, ids_yesterday, '_yesterday')):
+        for col in df.columns:
+            if col in ('prod_cd', 'prod_id'):
+                continue
+            columns[f"{col}{suffix}"] = _scatter_by_id(df[col], ids, size)[universe]
+
+    return pd.DataFrame(columns)
+
+
+def _top_positions(values, n, groups=None, per_group=0):
+    """
+    values가 큰 순서로 상위 n개 위치 (전체 정렬 대신 argpartition으로 후보만 골라 정렬)
+
+    - groups/per_group 지정 시 그룹마다 상위 per_group개까지만 포함
+      (후보를 큰 값부터 늘려가며 확인하므로 n개가 차면 나머지는 정렬하지 않음)
+    - n <= 0이면 개수 제한 없음
+    - 같은 값은 원래 위치 순서 (같은 입력이면 같은 결과)
+      후보 경계에 같은 값이 여러 개면 앞쪽 위치부터 후보에 넣으므로 잘리는 경계에서도 유지됨
+    """
+    total = len(values)
+    limit = n if n > 0 else total
+    size = limit if per_group <= 0 else max(limit * 4, 1024)
+
+    while True:
+        if size >= total:
+            candidates = np.arange(total)
+        else:
+            # size번째로 큰 값보다 큰 것은 모두, 같은 값은 앞쪽 위치부터 남은 자리만큼
+            threshold = np.partition(values, total - size)[total - size]
+            above = np.flatnonzero(values > threshold)
+            ties = np.flatnonzero(values == threshold)[:size - len(above)]
+            candidates = np.concatenate([above, ties])
+        candidates = candidates[np.lexsort((candidates, -values[candidates]))]
+        if per_group <= 0:
+            return candidates[:limit]
+
+        # 후보를 큰 값부터 보면서 그룹별 순번 → 그룹 한도 안의 것만 남김
+        seen = pd.Series(groups[candidates]).groupby(groups[candidates], sort=False).cumcount().to_numpy()
+        picked = candidates[seen < per_group]
+        if len(picked) >= limit or size >= total:
+            return picked[:limit]
+        size *= 4
+
+
+def rank_changes(changed, top_n=0, top_n_per_brand=0):
+    """
+    리포트 상세 표 순위 계산 (증가/감소 방향별)
+
+    - 방향별 변동폭이 큰 순서로 1, 2, 3 ... (표에 넣지 않는 상품은 0)
+    - top_n_per_brand: 브랜드마다 변동폭 상위 N개까지만 포함
+    - top_n: 방향별 상위 N개만 포함
+
+    Returns:
+        changed와 같은 길이의 정수 배열
+    """
+    change = changed['change'].to_numpy(dtype=float)
+    change_abs = np.abs(change)
+
+    brand_codes = None
+    if top_n_per_brand > 0:
+        brand = changed.get('brand_nm_today', pd.Series(index=changed.index, dtype=object))
+        if 'brand_nm_yesterday' in changed.columns:
+            brand = brand.fillna(changed['brand_nm_yesterday'])
+        brand_codes, _ = pd.factorize(brand.fillna('(미분류)').astype(str))
+
+    ranks = np.zeros(len(changed), dtype=np.int64)
+    for direction in (change > 0, change < 0):
+        positions = np.flatnonzero(direction)
+        if len(positions) == 0:
+            continue
+        groups = brand_codes[positions] if brand_codes is not None else None
+        top = positions[_top_positions(change_abs[positions], top_n, groups, top_n_per_brand)]
+        ranks[top] = np.arange(1, len(top) + 1)
+    return ranks
+
+
+def detail_positions(changed):
+    """
+    상세 표 순서(증가 → 감소, 방향별로 변동폭 큰 순)의 행 위치
+
+    compare_inventory가 매긴 detail_rank(방향별 1, 2, 3 ...)를 그 자리에 배치하므로 다시 정렬하지 않습니다.
+    detail_rank가 0인 상품(상위 N 밖)은 포함하지 않습니다.
+    """
+    if 'detail_rank' in changed.columns:
+        ranks = changed['detail_rank'].to_numpy(dtype=np.int64)
+    else:
+        ranks = rank_changes(changed)
+    change = changed['change'].to_numpy(dtype=float)
+
+    parts = []
+    for direction in (change > 0, change < 0):
+        selected = np.flatnonzero(direction & (ranks > 0))
+        ordered = np.empty(len(selected), dtype=np.int64)
+        ordered[ranks[selected] - 1] = selected
+        parts.append(ordered)
+    return np.concatenate(parts)
+
+
+def compare_inventory(yesterday_df, today_df, product_dict=None, min_accuracy_change=None, min_qty_delta=None,
+                      top_n=None, top_n_per_brand=None):
     """
     어제와 오늘 데이터 비교
-    
+
+    Args:
+        yesterday_df: 어제 스냅샷
+        today_df: 오늘 스냅샷
+        product_dict: 상품코드 사전 (None이면 메모리 전용 사전 사용)
+        min_accuracy_change: 변동 상품 최소 일치율 변동폭 (None이면 REPORT_MIN_ACCURACY_CHANGE)
+        min_qty_delta: 변동 상품 최소 수량 변화량 (None이면 REPORT_MIN_QTY_DELTA)
+        top_n: 방향별 상세 표 상품 수 (None이면 REPORT_TOP_N)
+        top_n_per_brand: 브랜드별 상세 표 상품 수 (None이면 REPORT_TOP_N_PER_BRAND)
+
     Returns:
-        변동이 있는 상품들의 DataFrame
+        (전체 비교 DataFrame, 변동 상품 DataFrame)
+        변동 상품에는 상세 표 순위 'detail_rank' 컬럼 포함 (rank_changes, 표에 넣지 않으면 0)
     """
+    if min_accuracy_change is None:
+        min_accuracy_change = REPORT_MIN_ACCURACY_CHANGE
+    if min_qty_delta is None:
+        min_qty_delta = REPORT_MIN_QTY_DELTA
+    if top_n is None:
+        top_n = REPORT_TOP_N
+    if top_n_per_brand is None:
+        top_n_per_brand = REPORT_TOP_N_PER_BRAND
+
     if yesterday_df is None or today_df is None:
         print("❌ 데이터 로드 실패")
         return None
     
     print("\n📊 데이터 비교 중...")
-    
-    # 병합 (상품코드 기준)
-    comparison = today_df.merge(
-        yesterday_df,
-        on='prod_cd',
-        suffixes=('_today', '_yesterday'),
-        how='outer'
-    )
+
+    if product_dict is None:
+        product_dict = ProductDictionary()
+
+    # 병합 (상품코드 정수 ID 기준)
+    comparison = align_by_product_id(today_df, yesterday_df, product_dict)
 
     # 상품명은 오늘 데이터 우선
     if 'prod_nm_today' in comparison.columns:
@@ -237,41 +447,369 @@ def compare_inventory(yesterday_df, today_df):
     comparison['physical_yesterday'] = comparison['wms_qty_yesterday'] + waiting_yesterday
     comparison['physical_diff'] = comparison['physical_today'] - comparison['physical_yesterday']
 
-    # 변동 있는 상품만 필터 (일치율 변화 & CMS/WMS수량 변화량이 다른 것만)
-    changed = comparison[
-        (comparison['change_abs'] > 0.0) &
-        (comparison['cms_diff'] != comparison['physical_diff'])
-    ].copy()
-    changed = changed.sort_values('change_abs', ascending=False)
+    # 불일치 변화(WMS수량 변화량 - CMS 변화량)를 보관 위치별로 배분 (전체 상품)
+    attribute_mismatch(comparison)
+
+    # 변동 있는 상품만 필터 (일치율 변화 & CMS/WMS수량 변화량이 다른 것만, 기준값 이상)
+    change_abs = comparison['change_abs'].to_numpy()
+    cms_diff = comparison['cms_diff'].to_numpy()
+    physical_diff = comparison['physical_diff'].to_numpy()
+    mask = (change_abs > 0.0) & (cms_diff != physical_diff)
+    if min_accuracy_change > 0:
+        mask &= change_abs >= min_accuracy_change
+    if min_qty_delta > 0:
+        mask &= np.maximum(np.abs(cms_diff), np.abs(physical_diff)) >= min_qty_delta
+    changed = comparison[mask].copy()
+
+    # 전체 정렬 없이 방향별/브랜드별 상위 상품만 순위 매김 (리포트/Notion 업로드 크기 제한)
+    changed['detail_rank'] = rank_changes(changed, top_n, top_n_per_brand)
     
     print(f"  📈 총 상품: {len(comparison)}")
     print(f"  🔄 변동 상품: {len(changed)}")
     print(f"  📊 변동 비율: {len(changed)/len(comparison)*100:.1f}%")
+    if top_n > 0 or top_n_per_brand > 0:
+        print(f"  📋 상세 표 상품: {int((changed['detail_rank'] > 0).sum())}개 "
+              f"(방향별 상위 {top_n or '전체'}, 브랜드별 상위 {top_n_per_brand or '전체'})")
     
     return comparison, changed
 
 
-def generate_markdown_report(comparison, changed, date_str):
+def attribute_mismatch(comparison):
     """
-    마크다운 형식의 리포트 생성
+    상품별 불일치 변화를 원인 위치별로 배분 (전체 상품 벡터 연산)
 
-    Claude AI가 읽기 쉽도록 최적화
+    불일치 변화 = WMS수량 변화량 - CMS 변화량 (= physical_diff - cms_diff)
+    - 불일치가 벌어진 방향(+/-)으로 움직인 보관 위치에, 움직인 양 비율대로 배분
+    - 그 방향으로 움직인 위치가 없으면 CMS만 움직인 것 → 'CMS 단독'
+    - 위치 구분 컬럼이 없는 스냅샷은 WMS 수량 변화가 'WMS 기타'로 잡힘
+    - 상품마다 원인별 배분 합계 = 불일치 변화
+
+    추가 컬럼: mismatch_diff, {원인}_mismatch (MISMATCH_SOURCES), mismatch_source (주원인 표시명)
+    """
+    def diff(col):
+        today = comparison.get(f"{col}_today")
+        yesterday = comparison.get(f"{col}_yesterday")
+        today = 0.0 if today is None else pd.to_numeric(today, errors='coerce').fillna(0).to_numpy(dtype=float)
+        yesterday = 0.0 if yesterday is None else pd.to_numeric(yesterday, errors='coerce').fillna(0).to_numpy(dtype=float)
+        return np.broadcast_to(np.asarray(today - yesterday, dtype=float), (len(comparison),))
+
+    # 위치별 변화량 (로케이션, AGV1, AGV4, 대기, WMS 기타) → 합계 = WMS수량 변화량
+    moves = [diff(col) for col in SOURCE_COLUMNS]
+    located = sum(moves[i] for i, col in enumerate(SOURCE_COLUMNS) if col != 'waiting_qty')
+    moves.append(diff('wms_qty') - located)
+    moves = np.column_stack(moves)
+
+    gap = comparison['physical_diff'].to_numpy(dtype=float) - comparison['cms_diff'].to_numpy(dtype=float)
+    weights = np.clip(moves * np.sign(gap)[:, None], 0, None)
+    weight_sum = weights.sum(axis=1)
+    has_move = weight_sum > 0
+    share = np.divide(weights, weight_sum[:, None], out=np.zeros_like(weights), where=has_move[:, None])
+    attributed = np.column_stack([share * gap[:, None], np.where(has_move, 0.0, gap)])
+
+    comparison['mismatch_diff'] = gap
+    for col, values in zip(MISMATCH_SOURCES, attributed.T):
+        comparison[f"{col}_mismatch"] = values
+    labels = np.array(list(MISMATCH_SOURCES.values()), dtype=object)
+    comparison['mismatch_source'] = np.where(gap != 0, labels[np.abs(attributed).argmax(axis=1)], '')
+
+
+def score_anomalies(changed, report_date, anomaly_state):
+    """
+    변동 상품별 이상 점수 계산 → changed['anomaly_score'] (상태 파일도 오늘 값으로 갱신)
+
+    점수 = 어제까지의 상품별 EWMA 평균/표준편차 대비 오늘 변동의 z-점수
+    (일치율 변동, WMS수량 변화량 - CMS 변화량 중 큰 쪽). 통계 준비 기간이면 NaN.
+
+    Returns:
+        이상 점수를 계산했으면 True (이전 날짜라 생략했으면 False)
+    """
+    scores = anomaly_state.score_and_update(
+        report_date,
+        changed['prod_id'].to_numpy(),
+        changed['change'].to_numpy(),
+        (changed['physical_diff'] - changed['cms_diff']).to_numpy(),
+    )
+    if scores is None:
+        return False
+    changed['anomaly_score'] = scores
+    scored = int(np.isfinite(scores).sum())
+    print(f"  🚨 이상 변동: {int((scores >= ANOMALY_Z_THRESHOLD).sum())}개 "
+          f"(점수 {ANOMALY_Z_THRESHOLD} 이상, 점수 계산 {scored}개)")
+    return True
+
+
+def format_anomaly_markdown(changed, top_n=ANOMALY_TOP_N):
+    """이상 점수 상위 상품 표 (점수가 없거나 기준 미만이면 빈 문자열)"""
+    if 'anomaly_score' not in changed.columns:
+        return ""
+    scores = changed['anomaly_score'].to_numpy(dtype=float)
+    positions = np.flatnonzero(scores >= ANOMALY_Z_THRESHOLD)
+    if len(positions) == 0:
+        return ""
+    top = positions[_top_positions(scores[positions], top_n)]
+    rows = changed.iloc[top]
+
+    count = len(positions)
+    title = f"{count}개 중 상위 {len(top)}개" if len(top) < count else f"{count}개"
+    cms_url = os.getenv("CMS_URL", "http://localcms.siliconii.com")
+    md = f"## 🚨 이상 변동 ({title})\n\n"
+    md += "평소 변동 폭(상품별 최근 추세) 대비 드문 변동입니다. 점수가 클수록 이례적입니다.\n\n"
+    md += "| No | 상품코드 | 점수 | 일치율(어제) | 일치율(오늘) | 변동 | CMS변동 | WMS변동 |\n"
+    md += "|---:|:---------|-----:|-------------:|-------------:|-----:|--------:|--------:|\n"
+    md += "".join(
+        f"| {idx} | **[{prod_cd}]({cms_url}/WMS/CmsWmsStock?ProdCd={prod_cd})** | {score:.1f} | "
+        f"{acc_yesterday:.1f}% | {acc_today:.1f}% | {change:+.1f}% | {cms_diff:+.0f} | {physical_diff:+.0f} |\n"
+        for idx, (prod_cd, score, acc_yesterday, acc_today, change, cms_diff, physical_diff) in enumerate(zip(
+            rows['prod_cd'], rows['anomaly_score'], rows['accuracy_yesterday'], rows['accuracy_today'],
+            rows['change'], rows['cms_diff'], rows['physical_diff'],
+        ), 1)
+    )
+    return md + "\n---\n\n"
+
+
+# 일치율 분포 구간 (오늘 기준)
+ACCURACY_BUCKETS = ['100%', '90~100%', '50~90%', '0~50%', '0%']
+
+
+def build_aggregate_cube(comparison, changed):
+    """
+    브랜드 × 사용여부 집계 큐브 생성 (전체 상품을 한 번의 groupby로 집계)
+
+    각 셀에는 상품 수, 변동 상품 수(증가/감소), CMS/WMS수량 변화량,
+    보관 위치별(로케이션/AGV1/AGV4/대기) 수량 및 변화량, 불일치 원인별 배분량, 일치율 분포가 들어갑니다.
+    브랜드별/사용여부별/보관위치별/불일치 원인별 요약은 이 작은 큐브를 다시 합산해서 만듭니다.
+
+    Returns:
+        {'cube', 'by_brand', 'by_active', 'by_source', 'by_mismatch'} DataFrame 딕셔너리
+    """
+    def pick(name, default):
+        """오늘 값 우선, 없으면 어제 값 (한쪽에만 있는 상품 대응)"""
+        today = comparison.get(f"{name}_today")
+        yesterday = comparison.get(f"{name}_yesterday")
+        if today is None and yesterday is None:
+            return pd.Series(default, index=comparison.index)
+        if today is None:
+            return yesterday.fillna(default)
+        if yesterday is None:
+            return today.fillna(default)
+        return today.fillna(yesterday).fillna(default)
+
+    is_changed = comparison.index.isin(changed.index)
+    change = comparison['change'].to_numpy()
+    accuracy = comparison['accuracy_today'].to_numpy()
+
+    work = pd.DataFrame({
+        'brand_nm': pick('brand_nm', '(미분류)').astype(str),
+        'prod_use_yn': pick('prod_use_yn', '-').astype(str),
+        'sku_count': 1,
+        'changed_count': is_changed,
+        'increase_count': is_changed & (change > 0),
+        'decrease_count': is_changed & (change < 0),
+        'cms_diff': comparison['cms_diff'],
+        'physical_diff': comparison['physical_diff'],
+        'accuracy_sum': accuracy,
+    })
+
+    # 일치율 분포 (구간별 상품 수)
+    bucket_masks = [
+        accuracy >= 100,
+        (accuracy >= 90) & (accuracy < 100),
+        (accuracy >= 50) & (accuracy < 90),
+        (accuracy > 0) & (accuracy < 50),
+        accuracy <= 0,
+    ]
+    for label, mask in zip(ACCURACY_BUCKETS, bucket_masks):
+        work[f"acc_{label}"] = mask
+
+    # 보관 위치별 수량/변화량/변동 상품 수
+    for col in SOURCE_COLUMNS:
+        today = comparison.get(f"{col}_today", pd.Series(0, index=comparison.index)).fillna(0)
+        yesterday = comparison.get(f"{col}_yesterday", pd.Series(0, index=comparison.index)).fillna(0)
+        work[f"{col}_today"] = today
+        work[f"{col}_diff"] = today - yesterday
+        work[f"{col}_moved"] = (today != yesterday) & is_changed
+
+    # 불일치 원인별 배분량 (순합계/절대값 합계) 및 주원인 상품 수
+    mismatch_source = comparison['mismatch_source'].to_numpy()
+    for col, label in MISMATCH_SOURCES.items():
+        attributed = comparison[f"{col}_mismatch"]
+        work[f"{col}_mismatch"] = attributed
+        work[f"{col}_mismatch_abs"] = attributed.abs()
+        work[f"{col}_mismatch_main"] = mismatch_source == label
+
+    # 한 번의 grouped pass로 가장 세밀한 셀(브랜드 × 사용여부) 집계
+    cube = work.groupby(['brand_nm', 'prod_use_yn'], sort=False).sum()
+
+    metric_cols = ['sku_count', 'changed_count', 'increase_count', 'decrease_count',
+                   'cms_diff', 'physical_diff', 'accuracy_sum'] + [f"acc_{b}" for b in ACCURACY_BUCKETS]
+
+    def rollup(level):
+        rolled = cube[metric_cols].groupby(level=level).sum()
+        rolled['avg_accuracy'] = rolled['accuracy_sum'] / rolled['sku_count']
+        return rolled.drop(columns='accuracy_sum').sort_values('changed_count', ascending=False)
+
+    totals = cube.sum()
+    by_source = pd.DataFrame([
+        {
+            'source': label,
+            'qty_today': totals[f"{col}_today"],
+            'qty_diff': totals[f"{col}_diff"],
+            'changed_sku_moved': totals[f"{col}_moved"],
+        }
+        for col, label in SOURCE_COLUMNS.items()
+    ]).set_index('source')
+
+    abs_total = sum(totals[f"{col}_mismatch_abs"] for col in MISMATCH_SOURCES)
+    by_mismatch = pd.DataFrame([
+        {
+            'source': label,
+            'mismatch_diff': totals[f"{col}_mismatch"],
+            'mismatch_abs': totals[f"{col}_mismatch_abs"],
+            'share': totals[f"{col}_mismatch_abs"] / abs_total * 100 if abs_total else 0.0,
+            'main_sku_count': totals[f"{col}_mismatch_main"],
+        }
+        for col, label in MISMATCH_SOURCES.items()
+    ]).set_index('source')
+
+    return {
+        'cube': cube,
+        'by_brand': rollup('brand_nm'),
+        'by_active': rollup('prod_use_yn'),
+        'by_source': by_source,
+        'by_mismatch': by_mismatch,
+    }
+
+
+def format_cube_markdown(cube, top_brands=10):
+    """집계 큐브를 마크다운 요약 섹션으로 변환"""
+    md = "## 🧊 집계 요약\n\n"
+
+    md += "### 보관 위치별 수량 변동\n\n"
+    md += "| 보관 위치 | 오늘 수량 | 수량 변동 | 변동 상품 중 해당 위치 변동 |\n"
+    md += "|:----------|---------:|---------:|---------:|\n"
+    for source, row in cube['by_source'].iterrows():
+        md += (
+            f"| {source} | {row['qty_today']:,.0f} | {row['qty_diff']:+,.0f} | "
+            f"{row['changed_sku_moved']:,.0f}개 |\n"
+        )
+    md += "\n"
+
+    # 불일치 원인 (배분량이 없는 원인은 생략)
+    by_mismatch = cube['by_mismatch']
+    by_mismatch = by_mismatch[by_mismatch['mismatch_abs'] > 0]
+    if len(by_mismatch):
+        md += "### 불일치 원인 (보관 위치별)\n\n"
+        md += "불일치 변화(WMS수량 변화량 - CMS 변화량)를 같은 방향으로 움직인 보관 위치에 나눠 배분했습니다. "
+        md += "움직인 위치가 없으면 CMS 단독 변동입니다.\n\n"
+        md += "| 원인 | 불일치 변화 | 절대값 합계 | 비중 | 주원인 상품 수 |\n"
+        md += "|:-----|-----------:|-----------:|-----:|-------------:|\n"
+        for source, row in by_mismatch.iterrows():
+            md += (
+                f"| {source} | {row['mismatch_diff']:+,.0f} | {row['mismatch_abs']:,.0f} | "
+                f"{row['share']:.1f}% | {row['main_sku_count']:,.0f}개 |\n"
+            )
+        md += "\n"
+
+    def format_group(df, title, label):
+        table = f"### {title}\n\n"
+        table += f"| {label} | 상품 수 | 변동 | 증가 | 감소 | CMS변동 | WMS변동 | 평균 일치율 | " + " | ".join(ACCURACY_BUCKETS) + " |\n"
+        table += "|:---|---:|---:|---:|---:|---:|---:|---:|" + "---:|" * len(ACCURACY_BUCKETS) + "\n"
+        for key, row in df.iterrows():
+            buckets = " | ".join(f"{row[f'acc_{b}']:,.0f}" for b in ACCURACY_BUCKETS)
+            table += (
+                f"| {key} | {row['sku_count']:,.0f} | {row['changed_count']:,.0f} | "
+                f"{row['increase_count']:,.0f} | {row['decrease_count']:,.0f} | "
+                f"{row['cms_diff']:+,.0f} | {row['physical_diff']:+,.0f} | "
+                f"{row['avg_accuracy']:.1f}% | {buckets} |\n"
+            )
+        return table + "\n"
+
+    md += format_group(cube['by_active'], "사용여부별", "사용여부")
+    md += format_group(cube['by_brand'].head(top_brands), f"브랜드별 (변동 상위 {top_brands}개)", "브랜드")
+    return md
+
+
+def cube_to_frame(cube):
+    """집계 요약(브랜드/사용여부/보관위치/불일치 원인)을 하나의 CSV용 DataFrame으로 합침"""
+    frames = []
+    for dimension in ('by_brand', 'by_active', 'by_source', 'by_mismatch'):
+        df = cube[dimension].copy()
+        df.index = df.index.astype(str)
+        df = df.rename_axis('key').reset_index()
+        df.insert(0, 'dimension', dimension[3:])
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_report_summary(comparison, changed, date_str, run_key=None):
     """
+    리포트 개요 수치 (마크다운 개요 섹션과 슬랙 요약이 같은 값을 사용)
 
+    Returns:
+        {'date_str', 'report_version', 'run_key', 'total', 'changed_count', 'change_ratio',
+         'avg_change', 'max_change', 'min_change', 'increase_count', 'decrease_count',
+         ['anomaly_count'], ['mismatch_main_source', 'mismatch_main_share']}
+    """
     total = len(comparison)
     change_count = len(changed)
 
     # 통계
     if change_count > 0:
-        avg_change = changed['change_abs'].mean()
-        max_change = changed['change_abs'].max()
-        min_change = changed['change_abs'].min()
-        increase_count = len(changed[changed['change'] > 0])
-        decrease_count = len(changed[changed['change'] < 0])
+        change_abs = changed['change_abs'].to_numpy()
+        change = changed['change'].to_numpy()
+        avg_change = float(change_abs.mean())
+        max_change = float(change_abs.max())
+        min_change = float(change_abs.min())
+        increase_count = int((change > 0).sum())
+        decrease_count = int((change < 0).sum())
     else:
-        avg_change = max_change = min_change = 0
+        avg_change = max_change = min_change = 0.0
         increase_count = decrease_count = 0
 
+    summary = {
+        'date_str': date_str,
+        'report_version': REPORT_LOGIC_VERSION,
+        'run_key': run_key,
+        'total': total,
+        'changed_count': change_count,
+        'change_ratio': change_count / total * 100 if total else 0.0,
+        'avg_change': avg_change,
+        'max_change': max_change,
+        'min_change': min_change,
+        'increase_count': increase_count,
+        'decrease_count': decrease_count,
+    }
+    if 'anomaly_score' in changed.columns:
+        summary['anomaly_count'] = int((changed['anomaly_score'].to_numpy(dtype=float) >= ANOMALY_Z_THRESHOLD).sum())
+
+    # 불일치 주원인 (원인별 배분량 절대값 합계가 가장 큰 원인과 비중)
+    if 'mismatch_diff' in comparison.columns:
+        mismatch_abs = np.array([np.abs(comparison[f"{col}_mismatch"].to_numpy()).sum() for col in MISMATCH_SOURCES])
+        if mismatch_abs.sum() > 0:
+            main = int(mismatch_abs.argmax())
+            summary['mismatch_main_source'] = list(MISMATCH_SOURCES.values())[main]
+            summary['mismatch_main_share'] = float(mismatch_abs[main] / mismatch_abs.sum() * 100)
+    return summary
+
+
+def generate_markdown_report(comparison, changed, date_str, cube=None, run_key=None, summary=None):
+    """
+    마크다운 형식의 리포트 생성
+
+    Claude AI가 읽기 쉽도록 최적화
+    같은 입력이면 같은 내용이 나오도록 생성 시각 대신 리포트 버전/실행 키를 기록
+    """
+    if summary is None:
+        summary = build_report_summary(comparison, changed, date_str, run_key)
+
+    total = summary['total']
+    change_count = summary['changed_count']
+    avg_change = summary['avg_change']
+    max_change = summary['max_change']
+    min_change = summary['min_change']
+    increase_count = summary['increase_count']
+    decrease_count = summary['decrease_count']
+
     # 테스트 모드 체크
     test_mode = os.getenv("TEST_MODE", "false").lower() == "true"
     test_prefix = "[TEST] " if test_mode else ""
@@ -280,7 +818,7 @@ def generate_markdown_report(comparison, changed, date_str):
     md = f"""# {test_prefix}📊 재고 일치율 변동 분석 리포트
 
 **기준일:** {date_str}  
-**생성일시:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**리포트 버전:** v{REPORT_LOGIC_VERSION}{f" ({run_key[:12]})" if run_key else ""}
 
 ---
 
@@ -290,7 +828,7 @@ def generate_markdown_report(comparison, changed, date_str):
 |------|-----|
 | 총 상품 수 | {total}개 |
 | 변동 상품 | {change_count}개 |
-| 변동 비율 | {change_count/total*100:.1f}% |
+| 변동 비율 | {summary['change_ratio']:.1f}% |
 | 평균 변동폭 | {avg_change:.2f}% |
 | 최대 변동 | {max_change:.2f}% |
 | 최소 변동 | {min_change:.2f}% |
@@ -304,6 +842,13 @@ def generate_markdown_report(comparison, changed, date_str):
 - **감소** (일치율 하락): {decrease_count}개
 
 """
+
+    # 통계적으로 드문 변동을 먼저 (상품별 평소 변동 폭 대비)
+    md += format_anomaly_markdown(changed)
+
+    # 브랜드/사용여부/보관위치 집계 요약
+    if cube is not None:
+        md += format_cube_markdown(cube)
     
     # 변동 상품 상세 정보
     if change_count > 0:
@@ -321,40 +866,44 @@ def generate_markdown_report(comparison, changed, date_str):
             table_md += "| No | 상품코드 | 일치율(어제) | 일치율(오늘) | 변동 | CMS재고 | CMS변동 | WMS수량 | WMS변동 |\n"
             table_md += "|---:|:---------|-------------:|-------------:|-----:|--------:|--------:|--------:|--------:|\n"
 
-            for idx, (_, row) in enumerate(df.iterrows(), 1):
-                waiting_today = float(row.get('waiting_qty_today', 0) or 0)
-                waiting_yesterday = float(row.get('waiting_qty_yesterday', 0) or 0)
-                cms_diff = float(row['cms_qty_today']) - float(row['cms_qty_yesterday'])
-                physical_today = float(row['wms_qty_today']) + waiting_today
-                physical_yesterday = float(row['wms_qty_yesterday']) + waiting_yesterday
-                physical_diff = physical_today - physical_yesterday
-
-                prod_cd = row['prod_cd']
-                prod_link = f"[{prod_cd}]({cms_url}/WMS/CmsWmsStock?ProdCd={prod_cd})"
-
-                table_md += (
-                    f"| {idx} | **{prod_link}** | "
-                    f"{row['accuracy_yesterday']:.1f}% | "
-                    f"{row['accuracy_today']:.1f}% | "
-                    f"{row['change']:+.1f}% | "
-                    f"{row['cms_qty_today']:.0f} | "
-                    f"{cms_diff:+.0f} | "
-                    f"{physical_today:.0f} | "
-                    f"{physical_diff:+.0f} |\n"
-                )
+            # 행 단위 iterrows 대신 컬럼 배열을 한 번에 꺼내 포맷 (compare_inventory에서 계산된 변화량 사용)
+            rows = zip(
+                df['prod_cd'], df['accuracy_yesterday'], df['accuracy_today'], df['change'],
+                df['cms_qty_today'], df['cms_diff'], df['physical_today'], df['physical_diff'],
+            )
+            table_md += "".join(
+                f"| {idx} | **[{prod_cd}]({cms_url}/WMS/CmsWmsStock?ProdCd={prod_cd})** | "
+                f"{acc_yesterday:.1f}% | "
+                f"{acc_today:.1f}% | "
+                f"{change:+.1f}% | "
+                f"{cms_today:.0f} | "
+                f"{cms_diff:+.0f} | "
+                f"{physical_today:.0f} | "
+                f"{physical_diff:+.0f} |\n"
+                for idx, (prod_cd, acc_yesterday, acc_today, change,
+                          cms_today, cms_diff, physical_today, physical_diff) in enumerate(rows, 1)
+            )
 
             table_md += "\n"
             return table_md
 
+        def section_title(label, shown, count):
+            if shown < count:
+                return f"{label} ({count}개 중 상위 {shown}개)"
+            return f"{label} ({count}개)"
+
+        # 표에 넣을 상품만 순위대로 (compare_inventory에서 상위 N개만 순위를 매김)
+        detail = changed.iloc[detail_positions(changed)]
+
         # 일치율 증가 섹션 (변동폭 큰 순)
-        increased = changed[changed['change'] > 0].sort_values('change', ascending=False)
+        increased = detail[detail['change'] > 0]
         if len(increased) > 0:
-            md += format_table(increased, f"📈 일치율 증가 ({len(increased)}개)")
+            md += format_table(increased, section_title("📈 일치율 증가", len(increased), increase_count))
 
         # 일치율 감소 섹션 (변동폭 큰 순)
-        decreased = changed[changed['change'] < 0].sort_values('change', ascending=True)
+        decreased = detail[detail['change'] < 0]
         if len(decreased) > 0:
-            md += format_table(decreased, f"📉 일치율 감소 ({len(decreased)}개)")
+            md += format_table(decreased, section_title("📉 일치율 감소", len(decreased), decrease_count))
     else:
         md += "\n✅ **변동 상품 없음** - 재고가 정상입니다.\n\n"
     
@@ -403,10 +952,13 @@ def generate_csv_report(changed, date_str):
         'wms_qty_yesterday', 'wms_qty_today',
     ]
     waiting_cols = [c for c in ['waiting_qty_yesterday', 'waiting_qty_today'] if c in changed.columns]
-    select_cols = base_cols + waiting_cols
+    mismatch_cols = ['mismatch_diff', 'mismatch_source']
+    select_cols = base_cols + waiting_cols + mismatch_cols
     select_cols = [c for c in select_cols if c in changed.columns]
 
-    report = changed[select_cols].copy()
+    # 상세 표와 같은 상품/순서 (증가 → 감소, 각각 변동폭 큰 순, REPORT_TOP_N/REPORT_TOP_N_PER_BRAND 적용)
+    # compare_inventory의 detail_rank를 그대로 사용하므로 변동 상품 전체를 다시 정렬하지 않음
+    report = changed.iloc[detail_positions(changed)][select_cols].copy()
 
     rename_map = {
         'prod_cd':  '상품코드',
@@ -420,40 +972,127 @@ def generate_csv_report(changed, date_str):
         'wms_qty_today':       '오늘_WMS재고',
         'waiting_qty_yesterday':   '어제_대기재고',
         'waiting_qty_today':       '오늘_대기재고',
+        'mismatch_diff':       '불일치변화',
+        'mismatch_source':     '불일치_주원인',
     }
     report = report.rename(columns=rename_map)
     
     return report
 
 
-def save_reports(markdown_content, csv_df, date_str, output_dir):
+def build_excel_sheets(csv_df, cube=None, summary=None):
+    """
+    엑셀 리포트 시트 구성 (요약 / 증가 / 감소 / 브랜드별)
+
+    증가/감소 시트는 CSV 리포트와 같은 컬럼/상품(방향별 변동폭 큰 순)이고, 상품코드는 CMS 링크입니다.
+    """
+    from src.reporter.excel_writer import excel_sheet
+
+    cms_url = os.getenv("CMS_URL", "http://localcms.siliconii.com")
+    sheets = []
+
+    if summary is not None:
+        labels = [
+            ('date_str', '기준 일시'), ('total', '전체 상품 수'), ('changed_count', '변동 상품 수'),
+            ('change_ratio', '변동 비율(%)'), ('increase_count', '증가 상품 수'), ('decrease_count', '감소 상품 수'),
+            ('avg_change', '평균 변동(%p)'), ('max_change', '최대 변동(%p)'), ('min_change', '최소 변동(%p)'),
+            ('anomaly_count', '이상 변동 상품 수'), ('mismatch_main_source', '불일치 주원인'),
+            ('mismatch_main_share', '불일치 주원인 비중(%)'), ('report_version', '리포트 버전'),
+        ]
+        rows = [(label, round(summary[key], 2) if isinstance(summary[key], float) else summary[key])
+                for key, label in labels if summary.get(key) is not None]
+        sheets.append(excel_sheet("요약", pd.DataFrame(rows, columns=['항목', '값']), widths={'항목': 24, '값': 24}))
+
+    if csv_df is not None and len(csv_df) > 0:
+        links = {'상품코드': f"{cms_url}/WMS/CmsWmsStock?ProdCd={{value}}"}
+        percent = [c for c in csv_df.columns if c.endswith('(%)')]
+        integer = [c for c in csv_df.columns if c.endswith('재고') or c == '불일치변화']
+        widths = {'상품코드': 16, '상품명': 40}
+        change = csv_df['변동(%)'].to_numpy()
+        # CSV 리포트가 이미 변동폭 큰 순이므로 방향별로 나누기만 함
+        for name, mask in (("증가", change > 0), ("감소", change < 0)):
+            sheets.append(excel_sheet(name, csv_df[mask], percent=percent, integer=integer, links=links, widths=widths))
+
+    if cube is not None:
+        brand_labels = {
+            'brand_nm': '브랜드', 'sku_count': '상품 수', 'changed_count': '변동 상품 수',
+            'increase_count': '증가', 'decrease_count': '감소',
+            'cms_diff': 'CMS 변화량', 'physical_diff': 'WMS 변화량', 'avg_accuracy': '평균 일치율(%)',
+            **{f"acc_{b}": f"일치율 {b}" for b in ACCURACY_BUCKETS},
+        }
+        by_brand = cube['by_brand'].reset_index()
+        by_brand = by_brand[[c for c in brand_labels if c in by_brand.columns]].rename(columns=brand_labels)
+        sheets.append(excel_sheet(
+            "브랜드별", by_brand, percent=['평균 일치율(%)'],
+            integer=[c for c in by_brand.columns if c not in ('브랜드', '평균 일치율(%)')],
+            widths={'브랜드': 24},
+        ))
+
+    return sheets
+
+
+def save_reports(markdown_content, csv_df, date_str, output_dir, cube=None, summary=None):
     """
-    리포트 저장 (마크다운 + CSV)
+    리포트 저장 (마크다운 + CSV + 집계 큐브 CSV + 개요 JSON + 엑셀)
+
+    서로 다른 파일이므로 스레드로 동시에 저장합니다.
     """
     # 출력 폴더 생성
     os.makedirs(output_dir, exist_ok=True)
-    
+
     print(f"\n💾 리포트 저장 중...")
-    
-    # 마크다운 저장
+
     md_filename = f"report_{date_str}.md"
     md_path = os.path.join(output_dir, md_filename)
-    
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(markdown_content)
-    
-    print(f"  ✅ 마크다운: {md_filename}")
-    
-    # CSV 저장
-    if csv_df is not None and len(csv_df) > 0:
+
+    def save_markdown():
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(markdown_content)
+        return f"마크다운: {md_filename}"
+
+    def save_csv():
         csv_filename = f"report_{date_str}.csv"
-        csv_path = os.path.join(output_dir, csv_filename)
-        
-        csv_df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-        print(f"  ✅ CSV: {csv_filename}")
-    
+        csv_df.to_csv(os.path.join(output_dir, csv_filename), index=False, encoding='utf-8-sig')
+        return f"CSV: {csv_filename}"
+
+    def save_cube():
+        # 집계 큐브 저장 (관리 리포트용 소형 집계)
+        cube_filename = f"report_{date_str}_cube.csv"
+        cube_to_frame(cube).to_csv(os.path.join(output_dir, cube_filename), index=False, encoding='utf-8-sig')
+        return f"집계: {cube_filename}"
+
+    def save_summary():
+        # 개요 수치 저장 (슬랙 요약용, 재실행/백필 시 마크다운을 다시 읽지 않도록)
+        summary_filename = f"report_{date_str}_summary.json"
+        with open(os.path.join(output_dir, summary_filename), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return f"개요: {summary_filename}"
+
+    def save_excel():
+        # 엑셀 리포트 (스트리밍 저장)
+        from src.reporter.excel_writer import write_xlsx
+        xlsx_filename = f"report_{date_str}.xlsx"
+        write_xlsx(os.path.join(output_dir, xlsx_filename), build_excel_sheets(csv_df, cube, summary))
+        return f"엑셀: {xlsx_filename}"
+
+    tasks = [save_markdown]
+    if csv_df is not None and len(csv_df) > 0:
+        tasks.append(save_csv)
+    if cube is not None:
+        tasks.append(save_cube)
+    if summary is not None:
+        tasks.append(save_summary)
+    if REPORT_XLSX:
+        tasks.append(save_excel)
+
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="report-save") as executor:
+        futures = [executor.submit(task) for task in tasks]
+        # 작성 순서대로 결과 출력 (저장 중 오류는 여기서 다시 발생)
+        for future in futures:
+            print(f"  ✅ {future.result()}")
+
     print(f"\n📁 저장 경로: {os.path.abspath(output_dir)}")
-    
+
     return md_path
 
 
@@ -465,6 +1104,7 @@ def get_latest_csv_files(directory, count=2):
     """
     디렉토리에서 최신 CSV 파일들을 찾습니다.
     성능 최적화: 최근 2개월 폴더만 검색 + 상위 20개만 정렬
+    검증에 실패한 파일(매니페스트 불일치, 잘린 파일)은 제외합니다.
 
     Args:
         directory: CSV 파일이 있는 기본 폴더 (월별 폴더의 부모)
@@ -473,8 +1113,6 @@ def get_latest_csv_files(directory, count=2):
     Returns:
         최신 파일들의 경로 리스트 (최신순으로 정렬)
     """
-    import glob
-    import re
     from datetime import datetime, timedelta
 
     # 현재 월과 이전 월 계산
@@ -490,16 +1128,16 @@ def get_latest_csv_files(directory, count=2):
     # 현재 월 폴더 검색
     current_month_dir = os.path.join(directory, current_month)
     if os.path.exists(current_month_dir):
-        csv_files.extend(glob.glob(os.path.join(current_month_dir, "Stock*.csv")))
+        csv_files.extend(list_snapshots(current_month_dir))
 
     # 이전 월 폴더 검색
     last_month_dir = os.path.join(directory, last_month)
     if os.path.exists(last_month_dir):
-        csv_files.extend(glob.glob(os.path.join(last_month_dir, "Stock*.csv")))
+        csv_files.extend(list_snapshots(last_month_dir))
 
     # 월별 폴더가 없는 경우 (레거시) - 루트에서 직접 검색
     if not csv_files:
-        csv_files = glob.glob(os.path.join(directory, "Stock*.csv"))
+        csv_files = list_snapshots(directory)
 
     if not csv_files:
         return []
@@ -538,7 +1176,17 @@ def get_latest_csv_files(directory, count=2):
         # 날짜 추출 실패 시 수정 시간으로 정렬
         csv_files.sort(key=os.path.getmtime, reverse=True)
 
-    return csv_files[:count]
+    # 매니페스트 검증에 실패한 스냅샷(쓰다 만 파일 등)은 건너뛰고 이전 스냅샷 사용
+    valid_files = []
+    for filepath in csv_files:
+        ok, reason = verify_snapshot(filepath)
+        if not ok:
+            print(f"⚠️ 스냅샷 건너뜀: {os.path.basename(filepath)} ({reason})")
+            continue
+        valid_files.append(filepath)
+        if len(valid_files) == count:
+            break
+    return valid_files
 
 
 def load_csv_file_directly(filepath):
@@ -554,65 +1202,36 @@ def load_csv_file_directly(filepath):
     filename = os.path.basename(filepath)
     print(f"\n📂 파일 로드: {filename}")
 
+    # 파싱 전에 매니페스트(크기/해시)로 검증
+    ok, reason = verify_snapshot(filepath)
+    if not ok:
+        print(f"  ❌ 스냅샷 검증 실패: {reason}")
+        return None
+
     try:
-        # CSV 읽기 (한글 인코딩)
-        try:
-            df = pd.read_csv(filepath, encoding='utf-8-sig')
-        except UnicodeDecodeError:
-            df = pd.read_csv(filepath, encoding='cp949')
-
-        # 마지막 행 제거 (합계/요약 행이 있을 수 있음)
-        if len(df) > 0:
-            last_row = df.iloc[-1]
-            # 마지막 행이 합계 행인지 확인 (상품코드가 비어있거나 숫자가 아닌 경우)
-            if pd.isna(last_row.get(COL_PROD_CD)) or str(last_row.get(COL_PROD_CD)).strip() == '':
-                df = df.iloc[:-1]
-
-        # 컬럼 정규화 (한글 컬럼명과 영문 컬럼명 모두 지원)
-        rename_map = {}
-
-        # 한글 컬럼명 매핑
-        if COL_PROD_CD in df.columns:
-            rename_map[COL_PROD_CD] = 'prod_cd'
-        if COL_PRODUCT_NAME in df.columns:
-            rename_map[COL_PRODUCT_NAME] = 'prod_nm'
-        if COL_CMS_QTY in df.columns:
-            rename_map[COL_CMS_QTY] = 'cms_qty'
-        if COL_WMS_QTY in df.columns:
-            rename_map[COL_WMS_QTY] = 'wms_qty'
-        if COL_WAITING_QTY in df.columns:
-            rename_map[COL_WAITING_QTY] = 'waiting_qty'
-
-        # DB export 영문 컬럼명 매핑 (이전 버전 파일 지원)
-        if 'cms_total_qty' in df.columns:
-            rename_map['cms_total_qty'] = 'cms_qty'
-        if 'wms_total_qty' in df.columns:
-            rename_map['wms_total_qty'] = 'wms_qty'
-
-        df = df.rename(columns=rename_map)
-
-        # 수치 컬럼 강제 변환
-        for col in ('cms_qty', 'wms_qty', 'waiting_qty'):
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-
-        # 일치율 처리
-        if COL_ACCURACY in df.columns:
-            df['accuracy'] = (
-                df[COL_ACCURACY]
-                .astype(str)
-                .str.replace('%', '', regex=False)
-                .str.strip()
-                .apply(lambda x: float(x) if x not in ('', 'nan') else 0.0)
-            )
+        # CSV 읽기 (한글 인코딩, 압축 보관된 스냅샷은 스트리밍으로 풀어서)
+        def read(encoding):
+            with open_snapshot(filepath) as f:
+                return pd.read_csv(f, encoding=encoding, dtype=SNAPSHOT_DTYPES)
+
+        # 같은 프로세스에서 방금 export한 스냅샷이면 파싱 생략 (파일 크기/수정 시각이 같을 때만)
+        df = snapshot_cache.get(filepath)
+        if df is not None:
+            print(f"  ⚡ 캐시 사용 (export 직후 스냅샷)")
         else:
-            df['accuracy'] = df.apply(
-                lambda row: calculate_accuracy(
-                    row.get('cms_qty'),
-                    row.get('wms_qty'),
-                    row.get('waiting_qty')
-                ), axis=1
-            )
+            try:
+                df = read('utf-8-sig')
+            except UnicodeDecodeError:
+                df = read('cp949')
+
+        rows = expected_rows(filepath)
+        if rows is not None and rows != len(df):
+            print(f"  ❌ 행 수 불일치: 매니페스트 {rows}개 / 파일 {len(df)}개")
+            return None
+
+        # 정규화 (합계 행 제거, 컬럼명 통일, 수치 변환, 일치율, 상품코드 중복 정리)
+        df = snapshot_processor.process(df)
+        print_duplicates(df)
 
         print(f"  ✅ 로드 완료: {len(df)}개 상품")
         return df
@@ -622,6 +1241,423 @@ def load_csv_file_directly(filepath):
         return None
 
 
+# ========================================
+# 🗄️ 일치율 이력 조회 (SQLite 이력 저장소)
+# ========================================
+
+def get_history_store(input_dir=None):
+    """스냅샷 폴더의 일치율 이력 저장소 반환"""
+    from src.processor.history_store import AccuracyHistoryStore
+    base_dir = Path(input_dir or INPUT_DIR)
+    return AccuracyHistoryStore(base_dir / AccuracyHistoryStore.DB_FILENAME)
+
+
+def query_sku_history(prod_cd, days=90, end_date=None, input_dir=None):
+    """
+    상품 1개의 최근 N일 일치율 이력
+
+    Args:
+        prod_cd: 상품코드
+        days: 조회 기간 (일)
+        end_date: 기준일 (YYYY-MM-DD, None이면 오늘)
+
+    Returns:
+        snapshot_date, cms_qty, wms_qty, waiting_qty, accuracy 컬럼 DataFrame
+    """
+    from datetime import timedelta
+    end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+    start = end - timedelta(days=days)
+    return get_history_store(input_dir).sku_history(
+        prod_cd, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    )
+
+
+def query_daily_distribution(date_from, date_to, input_dir=None):
+    """기간 내 일자별 일치율 분포 (상품 수, 평균, 구간별 상품 수)"""
+    return get_history_store(input_dir).daily_distribution(date_from, date_to)
+
+
+def query_top_movers(date_from, date_to, top_n=20, input_dir=None):
+    """기간 첫날 대비 마지막 날 일치율 변동 상위 상품"""
+    return get_history_store(input_dir).top_movers(date_from, date_to, top_n)
+
+
+def import_snapshots_to_history(input_dir=None, overwrite=False):
+    """
+    기존 스냅샷 CSV 파일들을 이력 저장소에 일괄 적재 (최초 구축용)
+
+    같은 날짜 파일이 여러 개면 가장 늦은 시간 파일이 남습니다.
+
+    Returns:
+        적재한 날짜 수
+    """
+    base_dir = input_dir or INPUT_DIR
+    store = get_history_store(base_dir)
+    product_dict = ProductDictionary(base_dir)
+
+    # 날짜별로 가장 늦은 시간 파일부터 시도 (로드에 실패하면 같은 날짜의 이전 시간 파일)
+    snapshots = []
+    for filepath in list_all_snapshots(base_dir):
+        match = re.search(r'Stock_?(\d{4}-\d{2}-\d{2})(?:_(\d{4}))?', os.path.basename(filepath))
+        if match:
+            snapshots.append((match.group(1), match.group(2) or "0000", filepath))
+    snapshots.sort(reverse=True)
+
+    imported = 0
+    done_dates = set()
+    for snapshot_date, _, filepath in snapshots:
+        if snapshot_date in done_dates:
+            continue
+        if not overwrite and store.has_date(snapshot_date):
+            done_dates.add(snapshot_date)
+            continue
+
+        df = load_csv_file_directly(filepath)
+        if df is None:
+            continue
+        done_dates.add(snapshot_date)
+        df['prod_id'] = product_dict.encode(df['prod_cd'])
+        store.append_snapshot(snapshot_date, df)
+        imported += 1
+
+    product_dict.save()
+    print(f"\n🗄️ 이력 저장소 적재 완료: {imported}일")
+    return imported
+
+
+def lookup_sku(prod_cd, date_str=None, input_dir=None):
+    """
+    상품 1개의 특정 날짜 수량/일치율 (바이너리 스냅샷 이진 탐색, 전체 파일을 읽지 않음)
+
+    Args:
+        prod_cd: 상품코드
+        date_str: 스냅샷 날짜 (YYYY-MM-DD, None이면 가장 최근 스냅샷)
+
+    Returns:
+        {'snapshot_date', 'prod_cd', 'cms_qty', 'wms_qty', 'waiting_qty', 'loc_qty', 'agv1_qty', 'agv4_qty', 'accuracy'}
+        또는 None (스냅샷/상품 없음)
+    """
+    from src.processor.binary_snapshot import list_binary_snapshots, open_binary_snapshot
+    snapshots = list_binary_snapshots(input_dir or INPUT_DIR)
+    if date_str is None and snapshots:
+        date_str = list(snapshots)[-1]
+    path = snapshots.get(date_str)
+    if path is None:
+        return None
+    record = open_binary_snapshot(path).lookup(prod_cd)
+    return None if record is None else {'snapshot_date': date_str, **record}
+
+
+def build_binary_snapshots(input_dir=None, overwrite=False):
+    """
+    바이너리 스냅샷이 없는 기존 CSV 스냅샷(압축 보관본 포함)을 변환 (최초 구축용)
+
+    Returns:
+        변환한 스냅샷 수
+    """
+    from src.processor.binary_snapshot import binary_path, write_binary_snapshot
+    built = 0
+    for filepath in list_all_snapshots(input_dir or INPUT_DIR):
+        target = binary_path(filepath)
+        if target.exists() and not overwrite:
+            continue
+        df = load_csv_file_directly(filepath)
+        if df is None:
+            continue
+        write_binary_snapshot(df, target)
+        built += 1
+    print(f"\n🗂️ 바이너리 스냅샷 변환 완료: {built}개")
+    return built
+
+
+def get_datetime_from_filename(filepath):
+    """
+    파일명에서 스냅샷 일시 추출 (Stock_2026-02-23_1430.csv -> "2026-02-23 14:30")
+    """
+    filename = os.path.basename(filepath)
+
+    # Stock_{yyyy-mm-dd}_{hhmm} 형식 (시간 포함)
+    match = re.search(r'Stock_?(\d{4}-\d{2}-\d{2})_(\d{4})', filename)
+    if match:
+        date_part = match.group(1)
+        time_part = match.group(2)
+        return f"{date_part} {time_part[:2]}:{time_part[2:]}"
+
+    # Stock_{yyyy-mm-dd} 또는 Stock{yyyy-mm-dd} 형식 (시간 없음)
+    match = re.search(r'Stock_?(\d{4}-\d{2}-\d{2})', filename)
+    if match:
+        return f"{match.group(1)} (시간 미상)"
+
+    # 파일명에 날짜가 없으면 수정 시간 사용
+    return datetime.fromtimestamp(os.path.getmtime(filepath)).strftime("%Y-%m-%d %H:%M")
+
+
+def build_and_save_report(yesterday_df, today_df, today_str, output_dir=OUTPUT_DIR, product_dict=None, run_key=None,
+                          anomaly_state=None):
+    """
+    비교 → 이상 점수 → 집계 → 마크다운/CSV 렌더링 → 저장 (main, backfill 공용)
+
+    anomaly_state(AnomalyState)를 주면 변동 상품 이상 점수를 계산하고 상태 파일을 갱신합니다
+    (날짜순으로 한 번씩 반영해야 하므로 일일 실행에서만 사용, 백필은 생략).
+
+    Returns:
+        리포트 결과 딕셔너리 (report_date, md_report, md_path, comparison, changed, cube, summary)
+        비교 실패 시 None
+    """
+    result = compare_inventory(yesterday_df, today_df, product_dict)
+    if result is None:
+        return None
+    comparison, changed = result
+
+    print("\n📝 마크다운 리포트 생성 중...")
+    # 리포트용 날짜 문자열 (파일명에 사용하기 위해 yyyy-mm-dd만 추출)
+    report_date = today_str.split()[0]  # "2026-02-23 14:30" -> "2026-02-23"
+    if anomaly_state is not None and len(changed) > 0:
+        score_anomalies(changed, report_date, anomaly_state)
+    cube = build_aggregate_cube(comparison, changed)
+    summary = build_report_summary(comparison, changed, today_str, run_key)
+    md_report = generate_markdown_report(comparison, changed, today_str, cube, run_key, summary)
+
+    print("📝 CSV 리포트 생성 중...")
+    csv_report = generate_csv_report(changed, report_date)
+
+    md_path = save_reports(md_report, csv_report, report_date, output_dir, cube, summary)
+
+    return {
+        'report_date': report_date,
+        'md_report': md_report,
+        'md_path': md_path,
+        'comparison': comparison,
+        'changed': changed,
+        'cube': cube,
+        'summary': summary,
+    }
+
+
+def load_brand_summary(output_dir, report_date):
+    """
+    저장된 집계 큐브 CSV에서 브랜드별 집계 로드 (슬랙 브랜드 담당자 요약용)
+
+    Returns:
+        {브랜드: 집계 행 dict}, 파일이 없으면 None
+    """
+    cube_path = os.path.join(output_dir, f"report_{report_date}_cube.csv")
+    if not os.path.exists(cube_path):
+        return None
+    cube_df = pd.read_csv(cube_path, encoding='utf-8-sig', dtype={'key': str})
+    return cube_df[cube_df['dimension'] == 'brand'].set_index('key').to_dict('index')
+
+
+def load_report_summary(output_dir, report_date):
+    """
+    저장된 리포트 개요 JSON 로드 (슬랙 요약용)
+
+    Returns:
+        build_report_summary 결과 dict, 파일이 없으면 None (이전 버전 리포트)
+    """
+    summary_path = os.path.join(output_dir, f"report_{report_date}_summary.json")
+    if not os.path.exists(summary_path):
+        return None
+    with open(summary_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _open_run_record(payload):
+    """작업 페이로드의 실행 기록 열기 (더 새로운 실행으로 바뀌었으면 None)"""
+    info = payload.get('run')
+    if not info:
+        return None
+    run = ReportRun(info['output_dir'], info['report_date'])
+    return run if run.run_key == info['run_key'] else None
+
+
+def _notion_delivery_handler(job, outbox):
+    """
+    전송 대기열 Notion 작업 처리
+
+    페이지가 만들어져 URL이 나오는 즉시 작업 결과에 기록해서
+    나머지 블록 추가가 끝나기 전에 슬랙 작업이 링크를 넣어 전송할 수 있게 합니다.
+    """
+    from src.reporter.notion_client import send_report_to_notion
+
+    payload = job['payload']
+    # 이전 시도에서 페이지까지 만들었으면 새로 만들지 않고 그 페이지를 갱신
+    page_id = (job['result'] or {}).get('page_id') or payload.get('page_id')
+    result = send_report_to_notion(
+        markdown_content=payload['markdown'],
+        title=payload['title'],
+        page_id=page_id,
+        database_id=payload.get('database_id'),
+        date_str=payload['date_str'],
+        on_page_created=lambda page: outbox.set_result(job['id'], page)
+    )
+    if not result.get("success"):
+        raise RetryDelivery(result.get('error') or "Notion 전송 실패")
+
+    page = {'page_id': result.get('page_id'), 'url': result.get('url')}
+    print(f"✅ Notion 페이지 생성 완료")
+    print(f"   URL: {page['url']}")
+    with _run_record_lock:
+        run = _open_run_record(payload)
+        if run is not None:
+            run.record_delivery('notion', **page)
+    return page
+
+
+def _slack_delivery_handler(job, outbox):
+    """
+    전송 대기열 슬랙 작업 처리
+
+    같은 리포트의 Notion 작업이 있으면 페이지 URL이 나올 때까지만 기다립니다
+    (NOTION_URL_WAIT_SECONDS 초과 시 URL 없이 전송). 일부 수신자만 실패하면
+    실패한 수신자만 남겨 재시도합니다.
+    """
+    from src.reporter.slack_notifier import add_notion_link, send_payloads
+
+    payload = job['payload']
+    notion_url = payload.get('notion_url')
+    notion_job_id = payload.get('notion_job_id')
+    if notion_url is None and notion_job_id is not None:
+        notion_job = outbox.get(notion_job_id)
+        notion_url = ((notion_job or {}).get('result') or {}).get('url')
+        waiting = notion_job is not None and notion_job['status'] in ('pending', 'running')
+        if notion_url is None and waiting and time.time() - job['created_at'] < NOTION_URL_WAIT_SECONDS:
+            raise RetryDelivery("Notion 페이지 URL 대기", delay=1.0, count_attempt=False)
+
+    result = send_payloads(add_notion_link(payload['items'], notion_url))
+    sent = [r for r, res in result.get("results", {}).items() if res["onResult"] == 1]
+    remaining = [item for item in payload['items'] if item['dmReceiver'] not in sent]
+    print(f"✅ 슬랙 전송: {result.get('ovErrDesc')}")
+
+    # 성공한 수신자만 기록 → 재실행 시 실패한 수신자에게만 다시 전송
+    with _run_record_lock:
+        run = _open_run_record(payload)
+        if run is not None:
+            receivers = list(dict.fromkeys(run.delivered_receivers('slack') + sent))
+            run.record_delivery('slack', receivers=receivers, complete=not remaining)
+
+    if remaining:
+        raise RetryDelivery(result.get('ovErrDesc'), payload={**payload, 'items': remaining})
+    return {'receivers': sent}
+
+
+def get_delivery_worker():
+    """
+    프로세스 공용 전송 워커 (처음 호출 시 시작)
+
+    스케줄러 모드에서는 서비스 시작 시 바로 띄워서, 이전 실행에서 남은 전송도 재시도합니다.
+    """
+    global _delivery_worker
+    with _delivery_worker_lock:
+        if _delivery_worker is None:
+            _delivery_worker = DeliveryWorker(
+                DeliveryOutbox(),
+                {'notion': _notion_delivery_handler, 'slack': _slack_delivery_handler}
+            )
+        return _delivery_worker.start()
+
+
+def send_report_notifications(md_report, changed_count, report_date, yesterday_str, run=None, brand_summary=None,
+                              summary=None):
+    """
+    Notion 페이지 생성과 슬랙 요약 전송 (환경변수 설정에 따라 선택적)
+
+    - 전송할 내용을 먼저 전송 대기열(DELIVERY_OUTBOX_PATH)에 저장한 뒤 백그라운드 워커가 전송
+    - 슬랙은 Notion 페이지가 만들어져 URL이 나오는 즉시 전송 (나머지 블록 추가와 병행)
+    - 최대 DELIVERY_WAIT_SECONDS 동안 전송 완료를 기다리고, 끝나지 않은 전송은 워커가 계속 재시도
+      (프로세스가 종료돼도 대기열에 남아 다음 실행/서비스 시작 때 이어서 전송)
+
+    Args:
+        run: 리포트 실행 기록 (ReportRun). 지정 시 같은 실행 키로 이미 전송된 채널/수신자는 건너뛰고,
+             이전에 만든 Notion 페이지가 있으면 새로 만들지 않고 내용을 교체
+        brand_summary: 브랜드별 집계 (load_brand_summary). 있으면 SLACK_BRAND_ROUTES 담당자에게 브랜드 요약 전송
+        summary: 리포트 개요 수치 (build_report_summary). 있으면 마크다운 대신 이 값으로 슬랙 요약 작성
+
+    Returns:
+        Notion 페이지 URL (생성하지 않았거나 아직 전송되지 않았으면 None)
+    """
+    send_to_notion = os.getenv("SEND_NOTION_REPORT", "false").lower() == "true"
+    send_to_slack = os.getenv("SEND_SLACK_NOTIFICATION", "false").lower() == "true"
+    print(f"\n🔍 전송 체크:")
+    print(f"  변동 상품 수: {changed_count}개")
+    print(f"  SEND_NOTION_REPORT: {os.getenv('SEND_NOTION_REPORT', 'false')} → {send_to_notion}")
+    print(f"  SEND_SLACK_NOTIFICATION: {os.getenv('SEND_SLACK_NOTIFICATION', 'false')} → {send_to_slack}")
+
+    if changed_count <= 0 or not (send_to_notion or send_to_slack):
+        return None
+
+    # 같은 실행 키의 작업은 대기열에 한 번만 등록 (재실행해도 중복 전송 없음)
+    run_key = run.run_key if run is not None else None
+    run_info = {'output_dir': str(run.path.parent), 'report_date': report_date, 'run_key': run_key} if run else None
+
+    def dedup_key(channel):
+        return f"{channel}:{report_date}:{run_key}" if run_key else None
+
+    outbox = DeliveryOutbox()
+    job_ids = []
+    notion_url = None
+    notion_job_id = None
+
+    if send_to_notion and run is not None and run.is_delivered('notion'):
+        notion_url = run.delivery('notion').get('url')
+        print(f"♻️ 동일 리포트가 이미 Notion에 있음 → 전송 생략 ({notion_url})")
+    elif send_to_notion:
+        # 테스트 모드 체크
+        test_mode = os.getenv("TEST_MODE", "false").lower() == "true"
+        test_prefix = "[TEST] " if test_mode else ""
+        # NOTION_PARENT_TYPE=database면 데이터베이스에서 같은 날짜(Date) 행을 찾아 갱신
+        use_database = os.getenv("NOTION_PARENT_TYPE", "page").lower() == "database"
+        notion_job_id = outbox.enqueue('notion', {
+            'markdown': md_report,
+            'title': f"{test_prefix}재고 일치율 변동 분석 ({report_date})",
+            'page_id': run.delivery('notion').get('page_id') if run is not None else None,
+            'database_id': os.getenv("NOTION_DATABASE_ID", "") if use_database else None,
+            'date_str': report_date,
+            'run': run_info,
+        }, ordering_key=f"notion:{report_date}", dedup_key=dedup_key('notion'))
+        job_ids.append(notion_job_id)
+
+    if send_to_slack and run is not None and run.is_delivered('slack'):
+        print("♻️ 동일 리포트가 이미 슬랙으로 전송됨 → 전송 생략")
+    elif send_to_slack:
+        from src.reporter.slack_notifier import build_stock_report_payloads
+        items = build_stock_report_payloads(
+            md_report,
+            today_str=report_date,
+            yesterday_str=yesterday_str.split()[0] if ' ' in yesterday_str else yesterday_str,
+            brand_summary=brand_summary,
+            skip_receivers=run.delivered_receivers('slack') if run is not None else (),
+            summary=summary
+        )
+        if items:
+            job_ids.append(outbox.enqueue('slack', {
+                'items': items,
+                'notion_url': notion_url,
+                'notion_job_id': notion_job_id,
+                'run': run_info,
+            }, ordering_key=f"slack:{report_date}", dedup_key=dedup_key('slack')))
+
+    if not job_ids:
+        return notion_url
+
+    print(f"\n📤 전송 중... (대기열 {len(job_ids)}건, 최대 {DELIVERY_WAIT_SECONDS}초 대기)")
+    worker = get_delivery_worker()
+    worker.wake()
+    if not worker.wait(job_ids, DELIVERY_WAIT_SECONDS):
+        print(f"⚠️ 전송이 아직 끝나지 않음 → 백그라운드에서 재시도합니다 ({outbox.db_path})")
+
+    for job_id in job_ids:
+        job = outbox.get(job_id)
+        if job['status'] in ('pending', 'running'):
+            print(f"  #{job_id} {job['channel']}: 재시도 대기 ({job['attempts']}회 실패: {job['last_error']})")
+        elif job['status'] == 'dead':
+            print(f"  ⚠️ #{job_id} {job['channel']}: 전송 실패 ({job['last_error']})")
+
+    if notion_job_id is not None:
+        notion_url = (outbox.get(notion_job_id)['result'] or {}).get('url')
+    return notion_url
+
+
 def main():
     print("=" * 60)
     print("📊 재고 일치율 변동 분석 시작")
@@ -640,25 +1676,6 @@ def main():
     yesterday_file = latest_files[1]
 
     # 파일명에서 날짜+시간 추출
-    import re
-    def get_datetime_from_filename(filepath):
-        filename = os.path.basename(filepath)
-
-        # Stock_{yyyy-mm-dd}_{hhmm} 형식 (시간 포함)
-        match = re.search(r'Stock_?(\d{4}-\d{2}-\d{2})_(\d{4})', filename)
-        if match:
-            date_part = match.group(1)
-            time_part = match.group(2)
-            return f"{date_part} {time_part[:2]}:{time_part[2:]}"
-
-        # Stock_{yyyy-mm-dd} 또는 Stock{yyyy-mm-dd} 형식 (시간 없음)
-        match = re.search(r'Stock_?(\d{4}-\d{2}-\d{2})', filename)
-        if match:
-            return f"{match.group(1)} (시간 미상)"
-
-        # 파일명에 날짜가 없으면 수정 시간 사용
-        return datetime.fromtimestamp(os.path.getmtime(filepath)).strftime("%Y-%m-%d %H:%M")
-
     today_str = get_datetime_from_filename(today_file)
     yesterday_str = get_datetime_from_filename(yesterday_file)
 
@@ -668,105 +1685,60 @@ def main():
     print(f"  이전: {os.path.basename(yesterday_file)}")
     print(f"        일시: {yesterday_str}")
 
-    # 2. 데이터 로드
-    today_df = load_csv_file_directly(today_file)
-    yesterday_df = load_csv_file_directly(yesterday_file)
-
-    if today_df is None or yesterday_df is None:
-        print("\n❌ 데이터 로드 실패")
-        return
-    
-    # 2. 데이터 비교
-    comparison, changed = compare_inventory(yesterday_df, today_df)
-    
-    if comparison is None:
-        return
-    
-    # 3. 리포트 생성
-    print("\n📝 마크다운 리포트 생성 중...")
-    # 리포트용 날짜 문자열 (파일명에 사용하기 위해 yyyy-mm-dd만 추출)
-    report_date = today_str.split()[0]  # "2026-02-23 14:30" -> "2026-02-23"
-    md_report = generate_markdown_report(comparison, changed, today_str)
-
-    print("📝 CSV 리포트 생성 중...")
-    csv_report = generate_csv_report(changed, report_date)
-
-    # 4. 리포트 저장
-    md_path = save_reports(md_report, csv_report, report_date, OUTPUT_DIR)
-
-    # 5. Notion 전송 (선택적)
-    notion_url = None
-    send_to_notion = os.getenv("SEND_NOTION_REPORT", "false").lower() == "true"
-    print(f"\n🔍 Notion 전송 체크:")
-    print(f"  변동 상품 수: {len(changed)}개")
-    print(f"  SEND_NOTION_REPORT: {os.getenv('SEND_NOTION_REPORT', 'false')} → {send_to_notion}")
-
-    if send_to_notion and len(changed) > 0:
-        print("\n📤 Notion 페이지 생성 중...")
-        try:
-            from pathlib import Path
-            project_root = Path(__file__).resolve().parent.parent.parent
-            if str(project_root) not in sys.path:
-                sys.path.insert(0, str(project_root))
-
-            from src.reporter.notion_client import send_report_to_notion
-
-            # 테스트 모드 체크
-            test_mode = os.getenv("TEST_MODE", "false").lower() == "true"
-            test_prefix = "[TEST] " if test_mode else ""
-            title = f"{test_prefix}재고 일치율 변동 분석 ({report_date})"
-            result = send_report_to_notion(
-                markdown_content=md_report,
-                title=title
-            )
-
-            if result.get("success"):
-                notion_url = result.get('url')
-                print(f"✅ Notion 페이지 생성 완료")
-                print(f"   URL: {notion_url}")
-            else:
-                print(f"⚠️ Notion 페이지 생성 실패: {result.get('error')}")
+    # 2. 실행 키 확인 (입력 스냅샷 + 리포트 로직 버전이 같으면 렌더링 생략)
+    report_date = today_str.split()[0]
+    run_key = compute_run_key([yesterday_file, today_file], report_logic_key())
+    run = ReportRun(OUTPUT_DIR, report_date)
+
+    if run.is_rendered(run_key):
+        print(f"\n♻️ 입력 스냅샷과 리포트 로직이 이전 실행과 동일 → 리포트 재생성 생략")
+        md_path = run.data['md_path']
+        changed_count = run.data['changed_count']
+        with open(md_path, encoding='utf-8') as f:
+            md_report = f.read()
+    else:
+        # 3. 데이터 로드
+        today_df = load_csv_file_directly(today_file)
+        yesterday_df = load_csv_file_directly(yesterday_file)
 
-        except ImportError as e:
-            print(f"⚠️ Notion 클라이언트 모듈 로드 실패: {e}")
-        except Exception as e:
-            print(f"⚠️ Notion 전송 실패: {e}")
+        if today_df is None or yesterday_df is None:
+            print("\n❌ 데이터 로드 실패")
+            return
 
-    # 6. 슬랙 전송 (선택적)
-    send_to_slack = os.getenv("SEND_SLACK_NOTIFICATION", "false").lower() == "true"
-    print(f"\n🔍 슬랙 전송 체크:")
-    print(f"  SEND_SLACK_NOTIFICATION: {os.getenv('SEND_SLACK_NOTIFICATION', 'false')} → {send_to_slack}")
-
-    if send_to_slack and len(changed) > 0:
-        print("\n📤 슬랙 메시지 전송 중...")
+        # 4. 데이터 비교 (상품코드 사전의 정수 ID로 병합) → 리포트 생성/저장
         try:
-            from pathlib import Path
-            project_root = Path(__file__).resolve().parent.parent.parent
-            if str(project_root) not in sys.path:
-                sys.path.insert(0, str(project_root))
-
-            from src.reporter.slack_notifier import send_stock_report_to_slack
-            result = send_stock_report_to_slack(
-                md_report=md_report,
-                today_str=report_date,
-                yesterday_str=yesterday_str.split()[0] if ' ' in yesterday_str else yesterday_str,
-                notion_url=notion_url
-            )
-            print(f"✅ 슬랙 전송 완료: {result}")
-        except ImportError as e:
-            print(f"⚠️ 슬랙 전송 모듈 로드 실패: {e}")
-        except Exception as e:
-            print(f"⚠️ 슬랙 전송 실패: {e}")
+            product_dict = ProductDictionary(INPUT_DIR)
+            anomaly_state = AnomalyState(INPUT_DIR) if ANOMALY_SCORING else None
+        except ValueError as e:
+            # 사전이 손상돼도 리포트는 보냄 (메모리 사전은 ID가 파일과 다르므로 이상 점수는 끔)
+            print(f"\n⚠️ 상품코드 사전 로드 실패 → 메모리 사전으로 비교, 이상 점수 생략: {e}")
+            product_dict = ProductDictionary()
+            anomaly_state = None
+            # 실행 키는 실제로 만든 리포트(이상 점수 없음) 기준으로 기록 → 사전 복구 후 다시 생성됨
+            run_key = compute_run_key([yesterday_file, today_file], report_logic_key(anomaly=False))
+        report = build_and_save_report(yesterday_df, today_df, today_str, OUTPUT_DIR, product_dict, run_key,
+                                       anomaly_state)
+        # 이상 점수 상태는 prod_id 위치로 저장하므로 새로 부여된 ID도 사전에 남김
+        product_dict.save()
+
+        if report is None:
+            return
+
+        md_report, md_path = report['md_report'], report['md_path']
+        changed_count = len(report['changed'])
+        run.record_render(run_key, [yesterday_file, today_file], md_path, changed_count)
+
+    # 5. Notion / 슬랙 전송 (선택적, 같은 실행 키로 이미 전송된 채널은 생략)
+    send_report_notifications(
+        md_report, changed_count, report_date, yesterday_str, run,
+        load_brand_summary(OUTPUT_DIR, report_date), load_report_summary(OUTPUT_DIR, report_date)
+    )
 
-    # 7. 완료
+    # 6. 완료
     print("\n" + "=" * 60)
     print("✅ 분석 완료!")
     print("=" * 60)
 
-    # 마크다운 미리보기 (처음 부분만)
-    # print(f"\n📄 리포트 미리보기:\n")
-    # print(md_report[:500] + "...\n")
-
     print(f"💡 마크다운 파일을 Claude AI에 복사해서 붙여넣으세요!")
     print(f"   또는 VS Code에서 {md_path} 파일을 열어보세요.")
 
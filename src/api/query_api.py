@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 조회 API (HTTP, 표준 라이브러리만 사용)
+
+- 최신 스냅샷 2개의 비교 결과를 메모리에 한 번만 만들어 두고 모든 요청이 같이 읽음 (요청마다 CSV를 읽지 않음)
+- 캐시는 DB Export 잡이 끝나면 새로 만들고, 다 만든 뒤 한 번에 교체 (읽는 쪽은 잠금 없음)
+- 단독 실행(serve)처럼 Export 잡이 다른 프로세스면 요청 시 최신 스냅샷 2개의 경로/수정 시각/크기를
+  QUERY_API_REFRESH_SECONDS 간격으로 확인해 바뀌었으면 갱신 (파일 내용은 읽지 않음)
+- 응답은 JSON 기본, ?format=csv면 CSV (엑셀에서 바로 열 수 있게 utf-8-sig)
+
+엔드포인트 (GET):
+    /health                      캐시 상태 (비교 스냅샷, 생성 시각)
+    /diff?direction=&limit=      최신 변동 상품 (direction: increase / decrease)
+    /sku/<상품코드>?days=90       상품 1개의 어제/오늘 값과 날짜별 이력
+    /top-movers?limit=20         최신 변동폭 상위 상품 (from/to를 주면 이력 저장소 기간 비교)
+    /stats                       개요 수치 + 브랜드/사용여부/보관위치/불일치 원인 집계
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.processor.snapshot_archive import archived_entry
+
+
+QUERY_API_ENABLED = os.getenv("QUERY_API_ENABLED", "false").lower() == "true"
+QUERY_API_HOST = os.getenv("QUERY_API_HOST", "127.0.0.1")
+QUERY_API_PORT = int(os.getenv("QUERY_API_PORT", "8765"))
+# 요청 시 최신 스냅샷이 바뀌었는지 확인하는 최소 간격 (초, 0이면 요청마다 확인)
+QUERY_API_REFRESH_SECONDS = float(os.getenv("QUERY_API_REFRESH_SECONDS", "30"))
+
+# 프로세스 공용 캐시 (서버를 띄운 경우에만 생성)
+_query_cache = None
+_query_cache_lock = threading.Lock()
+
+
+class _CacheState(NamedTuple):
+    """한 번 만들면 바꾸지 않는 캐시 내용 (교체만 함)"""
+    files: tuple
+    today_str: str
+    yesterday_str: str
+    comparison: pd.DataFrame
+    changed: pd.DataFrame
+    diff: pd.DataFrame
+    cube: dict
+    summary: dict
+    positions: dict
+    built_at: str
+
+
+def _snapshot_stamp(path) -> tuple:
+    """스냅샷 변경 확인용 값 (경로 + 수정 시각/크기, 압축 보관본은 인덱스의 sha256)"""
+    try:
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+    except OSError:
+        entry = archived_entry(path) or {}
+        return path, entry.get("sha256")
+
+
+class SnapshotQueryCache:
+    """최신 스냅샷 2개 비교 결과 캐시"""
+
+    def __init__(self, input_dir=None):
+        from src.analyzer import daily_stock_accuracy_analyzer as analyzer
+        self.analyzer = analyzer
+        self.input_dir = input_dir or analyzer.INPUT_DIR
+        self._state: Optional[_CacheState] = None
+        self._refresh_lock = threading.Lock()
+        self._checked_at = 0.0  # 마지막 변경 확인 시각 (time.monotonic)
+
+    @property
+    def state(self) -> Optional[_CacheState]:
+        if self._state is None:
+            self.refresh()
+        elif time.monotonic() - self._checked_at >= QUERY_API_REFRESH_SECONDS:
+            # 다른 요청이 이미 확인/갱신 중이면 기다리지 않고 기존 캐시로 응답
+            if self._refresh_lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                finally:
+                    self._refresh_lock.release()
+        return self._state
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        최신 스냅샷 2개가 바뀌었으면 비교 결과를 다시 만듦
+
+        Returns:
+            새로 만들었으면 True
+        """
+        with self._refresh_lock:
+            return self._refresh(force)
+
+    def _refresh(self, force: bool = False) -> bool:
+        """refresh() 본체 (_refresh_lock을 잡은 상태에서 호출)"""
+        analyzer = self.analyzer
+        self._checked_at = time.monotonic()
+        files = analyzer.get_latest_csv_files(self.input_dir, count=2)
+        if len(files) < 2:
+            logger.warning(f"조회 API: 비교할 스냅샷이 부족합니다 ({self.input_dir})")
+            return False
+        today_file, yesterday_file = files
+        key = tuple(_snapshot_stamp(path) for path in files)
+        if not force and self._state is not None and self._state.files == key:
+            return False
+
+        today_df = analyzer.load_csv_file_directly(today_file)
+        yesterday_df = analyzer.load_csv_file_directly(yesterday_file)
+        if today_df is None or yesterday_df is None:
+            return False
+        result = analyzer.compare_inventory(yesterday_df, today_df, analyzer.ProductDictionary(self.input_dir))
+        if result is None:
+            return False
+        comparison, changed = result
+
+        today_str = analyzer.get_datetime_from_filename(today_file)
+        diff = analyzer.generate_csv_report(changed, today_str.split()[0])
+        self._state = _CacheState(
+            files=key,
+            today_str=today_str,
+            yesterday_str=analyzer.get_datetime_from_filename(yesterday_file),
+            comparison=comparison,
+            changed=changed,
+            diff=diff if diff is not None else pd.DataFrame(),
+            cube=analyzer.build_aggregate_cube(comparison, changed),
+            summary=analyzer.build_report_summary(comparison, changed, today_str),
+            positions={prod_cd: i for i, prod_cd in enumerate(comparison['prod_cd'].astype(str))},
+            built_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        logger.info(f"조회 API 캐시 갱신: {today_str} vs {self._state.yesterday_str} (변동 {len(changed)}개)")
+        return True
+
+
+def get_query_cache(input_dir=None) -> SnapshotQueryCache:
+    global _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = SnapshotQueryCache(input_dir)
+        return _query_cache
+
+
+def refresh_query_cache():
+    """DB Export 후 호출: 조회 API를 띄운 프로세스면 캐시 갱신 (아니면 아무것도 하지 않음)"""
+    if _query_cache is not None:
+        _query_cache.refresh()
+
+
+# ----------------------------------------
+# 조회 (캐시 상태 → DataFrame / dict)
+# ----------------------------------------
+
+def _records(df: pd.DataFrame):
+    return json.loads(df.to_json(orient="records", force_ascii=False, date_format="iso"))
+
+
+def query_diff(state: _CacheState, direction: str = None, limit: int = 0) -> pd.DataFrame:
+    diff = state.diff
+    if direction in ("increase", "decrease") and len(diff):
+        change = diff["변동(%)"].to_numpy()
+        diff = diff[change > 0] if direction == "increase" else diff[change < 0]
+    return diff.head(limit) if limit > 0 else diff
+
+
+def query_top_movers(cache: SnapshotQueryCache, limit: int = 20, date_from: str = None, date_to: str = None) -> pd.DataFrame:
+    if date_from and date_to:
+        return cache.analyzer.query_top_movers(date_from, date_to, limit, cache.input_dir)
+    top = cache.state.changed.nlargest(limit, "change_abs")
+    return top[["prod_cd", "prod_nm", "accuracy_yesterday", "accuracy_today", "change", "cms_diff", "physical_diff"]]
+
+
+def query_sku(cache: SnapshotQueryCache, prod_cd: str, days: int = 90) -> Optional[dict]:
+    """상품 1개의 어제/오늘 값 (캐시) + 날짜별 이력 (바이너리 스냅샷, 없으면 이력 저장소)"""
+    state = cache.state
+    position = state.positions.get(prod_cd)
+    if position is None:
+        return None
+    row = state.comparison.iloc[position]
+    columns = ["prod_nm", "accuracy_yesterday", "accuracy_today", "change",
+               "cms_qty_yesterday", "cms_qty_today", "wms_qty_yesterday", "wms_qty_today",
+               "physical_diff", "cms_diff", "mismatch_diff", "mismatch_source"]
+    latest = {c: row[c] for c in columns if c in row.index}
+
+    from src.processor.binary_snapshot import list_binary_snapshots, sku_snapshot_history
+    date_to = state.today_str.split()[0]
+    date_from = (datetime.strptime(date_to, "%Y-%m-%d") - timedelta(days=days)).strftime("%Y-%m-%d")
+    if list_binary_snapshots(cache.input_dir):
+        history = sku_snapshot_history(cache.input_dir, prod_cd, date_from, date_to)
+    else:
+        history = cache.analyzer.get_history_store(cache.input_dir).sku_history(prod_cd, date_from, date_to)
+    return {
+        "prod_cd": prod_cd,
+        "today": state.today_str,
+        "yesterday": state.yesterday_str,
+        "latest": json.loads(pd.Series(latest).to_json(force_ascii=False)),
+        "history": _records(history),
+    }
+
+
+def query_stats(state: _CacheState) -> dict:
+    return {
+        "summary": state.summary,
+        **{name: _records(state.cube[name].reset_index())
+           for name in ("by_brand", "by_active", "by_source", "by_mismatch")},
+    }
+
+
+# ----------------------------------------
+# HTTP 서버
+# ----------------------------------------
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    cache: SnapshotQueryCache = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"조회 API {self.address_string()} - {format % args}")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        try:
+            self._route(parts, params)
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+        except Exception as e:
+            logger.exception(f"조회 API 오류: {self.path}")
+            self._send_json({"error": str(e)}, 500)
+
+    def _route(self, parts, params):
+        cache = self.cache
+        fmt = params.get("format", "json")
+        limit = int(params.get("limit", "0"))
+
+        if parts == ["health"]:
+            state = cache.state
+            self._send_json({
+                "status": "ok" if state is not None else "empty",
+                "today": state.today_str if state else None,
+                "yesterday": state.yesterday_str if state else None,
+                "built_at": state.built_at if state else None,
+            })
+            return
+
+        state = cache.state
+        if state is None:
+            self._send_json({"error": "비교할 스냅샷이 없습니다"}, 503)
+        elif parts == ["diff"]:
+            self._send_frame(query_diff(state, params.get("direction"), limit), fmt, f"diff_{state.today_str.split()[0]}")
+        elif parts == ["top-movers"]:
+            df = query_top_movers(cache, limit or 20, params.get("from"), params.get("to"))
+            self._send_frame(df, fmt, "top_movers")
+        elif parts == ["stats"]:
+            if fmt == "csv":
+                self._send_frame(cache.analyzer.cube_to_frame(state.cube), fmt, f"stats_{state.today_str.split()[0]}")
+            else:
+                self._send_json(query_stats(state))
+        elif len(parts) == 2 and parts[0] == "sku":
+            result = query_sku(cache, parts[1], int(params.get("days", "90")))
+            if result is None:
+                self._send_json({"error": f"상품 없음: {parts[1]}"}, 404)
+            elif fmt == "csv":
+                self._send_frame(pd.DataFrame(result["history"]), fmt, f"sku_{parts[1]}")
+            else:
+                self._send_json(result)
+        else:
+            self._send_json({"error": "알 수 없는 경로", "paths": ["/health", "/diff", "/sku/<상품코드>", "/top-movers", "/stats"]}, 404)
+
+    def _send(self, body: bytes, content_type: str, status: int = 200, filename: str = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status: int = 200):
+        body = json.dumps(data, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self._send(body, "application/json; charset=utf-8", status)
+
+    def _send_frame(self, df: pd.DataFrame, fmt: str, name: str):
+        if fmt == "csv":
+            self._send(df.to_csv(index=False).encode("utf-8-sig"), "text/csv; charset=utf-8", filename=f"{name}.csv")
+        else:
+            self._send_json(_records(df))
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"JSON 변환 불가: {type(value)}")
+
+
+def create_query_server(host: str = QUERY_API_HOST, port: int = QUERY_API_PORT, input_dir=None) -> ThreadingHTTPServer:
+    """조회 API 서버 생성 (요청마다 스레드, 캐시는 공유)"""
+    handler = type("BoundQueryRequestHandler", (QueryRequestHandler,), {"cache": get_query_cache(input_dir)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_query_server(host: str = QUERY_API_HOST, port: int = QUERY_API_PORT, input_dir=None) -> ThreadingHTTPServer:
+    """백그라운드 스레드로 조회 API 시작 (스케줄러와 같은 프로세스), 캐시는 미리 만들어 둠"""
+    server = create_query_server(host, port, input_dir)
+    threading.Thread(target=server.serve_forever, name="query-api", daemon=True).start()
+    threading.Thread(target=get_query_cache(input_dir).refresh, name="query-api-warmup", daemon=True).start()
+    logger.info(f"조회 API 시작: http://{host}:{port}")
+    return server
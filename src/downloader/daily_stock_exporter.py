@@ -206,6 +206,78 @@ class DBExporter:
         else:
             raise ValueError(f"지원하지 않는 DB 타입: {self.db_type}")
 
+    def _update_product_dictionary(self, df: pd.DataFrame):
+        """
+        상품코드 사전(prod_cd → 정수 ID)에 신규 상품을 추가하고 상품명/브랜드 사이드 테이블 갱신
+        사전 갱신 실패는 CSV export 결과에 영향을 주지 않음
+        """
+        try:
+            from src.processor.product_dictionary import ProductDictionary
+
+            product_dict = ProductDictionary(self.output_dir)
+            prod_ids = product_dict.encode(df['prod_cd'])
+            added = product_dict.save()
+            product_dict.save_info(df)
+            logger.info(f"상품코드 사전 갱신 완료: 신규 {added}개 / 전체 {len(product_dict)}개")
+            return prod_ids
+        except Exception as e:
+            logger.warning(f"상품코드 사전 갱신 실패 (export는 정상 완료): {e}")
+            return None
+
+    def _append_history(self, snapshot_date: str, df: pd.DataFrame, accuracy, prod_ids=None):
+        """
+        일치율 이력 저장소(SQLite)에 오늘 스냅샷 적재
+        이력 적재 실패는 CSV export 결과에 영향을 주지 않음
+        """
+        try:
+            from src.processor.history_store import AccuracyHistoryStore
+
+            store = AccuracyHistoryStore(self.output_dir / AccuracyHistoryStore.DB_FILENAME)
+            store.append_snapshot(snapshot_date, pd.DataFrame({
+                'prod_cd': df['prod_cd'],
+                'prod_id': prod_ids,
+                'cms_qty': df['cms_total_qty'],
+                'wms_qty': df['wms_total_qty'],
+                'waiting_qty': df['waiting_qty'],
+                'accuracy': accuracy,
+            }))
+        except Exception as e:
+            logger.warning(f"일치율 이력 적재 실패 (export는 정상 완료): {e}")
+
+    def _write_binary_snapshot(self, csv_path: Path, df: pd.DataFrame, accuracy):
+        """
+        상품 1개 조회용 바이너리 스냅샷(Stock_*.bin) 저장
+        저장 실패는 CSV export 결과에 영향을 주지 않음
+        """
+        try:
+            from src.processor.binary_snapshot import binary_path, write_binary_snapshot
+
+            write_binary_snapshot(pd.DataFrame({
+                'prod_cd': df['prod_cd'],
+                'cms_qty': df['cms_total_qty'],
+                'wms_qty': df['wms_total_qty'],
+                'waiting_qty': df['waiting_qty'],
+                'loc_qty': df.get('loc_qty'),
+                'agv1_qty': df.get('agv1_qty'),
+                'agv4_qty': df.get('agv4_qty'),
+                'accuracy': accuracy,
+            }), binary_path(csv_path))
+        except Exception as e:
+            logger.warning(f"바이너리 스냅샷 저장 실패 (export는 정상 완료): {e}")
+
+    def _publish_snapshot(self, csv_path: Path, df_export: pd.DataFrame):
+        """
+        방금 저장한 스냅샷을 프로세스 내 캐시에 등록 (CSV 파일이 기준, 경로/수정 시각으로 검증)
+        등록 실패는 CSV export 결과에 영향을 주지 않음
+        """
+        try:
+            from src.processor.snapshot_cache import publish_csv_snapshot
+
+            if publish_csv_snapshot(csv_path, df_export):
+                logger.info(f"스냅샷 캐시 등록: {csv_path.name}")
+        except Exception as e:
+            logger.warning(f"스냅샷 캐시 등록 실패 (export는 정상 완료): {e}")
+
     def export_to_csv(self, query: str, filename: str = None) -> Path:
         """
         DB 쿼리 결과를 CSV 파일로 저장
@@ -261,6 +333,18 @@ class DBExporter:
             df_export['WMS 재고'] = df['wms_total_qty']
             df_export['대기 수량'] = df['waiting_qty']
 
+            # 분석용 차원 컬럼 (브랜드/사용여부/보관위치별 재고) - 쿼리 결과에 있는 경우만 유지
+            dimension_cols = {
+                'brand_nm': '브랜드',
+                'prod_use_yn': '사용여부',
+                'loc_qty': '로케이션 재고',
+                'agv1_qty': 'AGV1 재고',
+                'agv4_qty': 'AGV4 재고',
+            }
+            for src_col, export_col in dimension_cols.items():
+                if src_col in df.columns:
+                    df_export[export_col] = df[src_col]
+
             # 일치율 계산: min(cms, physical) / max(cms, physical) * 100
             # physical = wms + waiting
             physical_qty = df['wms_total_qty'] + df['waiting_qty']
@@ -290,11 +374,30 @@ class DBExporter:
 
             df_export['일치율'] = accuracy
 
-            # CSV 저장
-            df_export.to_csv(output_path, index=False, encoding="utf-8-sig")
-            logger.info(f"CSV 저장 완료: {output_path} ({len(df_export)} rows, {len(df_export.columns)} columns)")
+            # CSV 저장 (임시 파일 → fsync → 이름 교체, 행 수/해시 매니페스트 기록)
+            from src.processor.snapshot_manifest import write_snapshot_csv
+            manifest = write_snapshot_csv(df_export, output_path)
+            logger.info(f"CSV 저장 완료: {output_path} ({manifest['rows']} rows, {len(df_export.columns)} columns)")
             logger.info(f"컬럼: {list(df_export.columns)}")
 
+            # 품질 검사 (상품코드 중복, 행 수 급변, 빈 값/음수 비율, 컬럼 변경)
+            # 오류면 quarantine/으로 격리하고 캐시/바이너리/이력 적재를 하지 않음 → 리포트는 이전 정상 스냅샷 사용
+            from src.processor.snapshot_quality import run_quality_gate
+            if not run_quality_gate(output_path, df_export):
+                return None
+
+            # 같은 프로세스(스케줄러)의 리포트 잡이 CSV를 다시 파싱하지 않도록 캐시에 등록
+            self._publish_snapshot(output_path, df_export)
+
+            # 상품 1개 조회용 바이너리 스냅샷 (상품코드 정렬, memmap 이진 탐색)
+            self._write_binary_snapshot(output_path, df, accuracy)
+
+            # 상품코드 사전 갱신 (신규 SKU에 정수 ID 부여)
+            prod_ids = self._update_product_dictionary(df)
+
+            # 일치율 이력 저장소 적재 (날짜 범위 조회용)
+            self._append_history(now.strftime("%Y-%m-%d"), df, accuracy, prod_ids)
+
             return output_path
 
         except ImportError as e:
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+상품별 변동 이상 점수 상태 (EWMA)
+
+- 상품마다 일간 일치율 변동(Δ일치율)과 미설명 수량 변동(WMS수량 변화량 - CMS 변화량)의
+  지수가중 평균(m1)/제곱평균(m2)을 누적 → 분산 = m2 - m1²
+- 오늘 변동을 어제까지의 통계로 z-점수화 → 평소 자주 흔들리는 상품은 낮게, 안정적이던 상품의 급변은 높게
+- prod_id(상품코드 사전 정수 ID) 위치에 고정 길이 레코드로 저장하고 변동 상품 레코드만 읽고 씀 (memmap)
+- 변동이 없는 날은 관측값 0으로 보고, 다음 갱신 때 건너뛴 일수만큼 한 번에 감쇠 (m1, m2 모두 (1-α)^k)
+"""
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+
+
+# EWMA 기간 (α = 2 / (span + 1))
+ANOMALY_EWMA_SPAN = int(os.getenv("ANOMALY_EWMA_SPAN", "30"))
+
+# 상태 누적 일수가 이보다 적으면 점수를 내지 않음 (통계 준비 기간)
+ANOMALY_MIN_HISTORY_DAYS = int(os.getenv("ANOMALY_MIN_HISTORY_DAYS", "7"))
+
+# 표준편차 하한 (변동이 거의 없던 상품의 작은 변동이 과하게 튀지 않도록): 일치율 %p, 수량
+ANOMALY_MIN_STD_ACCURACY = float(os.getenv("ANOMALY_MIN_STD_ACCURACY", "5"))
+ANOMALY_MIN_STD_QTY = float(os.getenv("ANOMALY_MIN_STD_QTY", "2"))
+
+# 상품별 레코드 (last_day=0이면 상태 시작 이후 변동 없음 → 통계 0)
+RECORD_DTYPE = np.dtype([
+    ("last_day", "<i4"),
+    ("acc_m1", "<f4"),
+    ("acc_m2", "<f4"),
+    ("gap_m1", "<f4"),
+    ("gap_m2", "<f4"),
+])
+
+
+def _day_number(date_str: str) -> int:
+    return date.fromisoformat(date_str[:10]).toordinal()
+
+
+class AnomalyState:
+    """
+    상품별 EWMA 통계 상태 파일
+
+    파일 구성 (base_dir 하위):
+        anomaly_state.bin       : prod_id 순서 고정 길이 레코드 (RECORD_DTYPE)
+        anomaly_state.json      : 시작일, 마지막 반영일(과 그 이전 반영일), EWMA 기간
+        anomaly_state.undo.npy  : 마지막 반영일에 바꾼 레코드의 이전 값 (같은 날 재실행 시 되돌림)
+
+    날짜는 앞으로만 반영합니다. 마지막 반영일보다 이전 날짜는 점수를 내지 않습니다 (백필 등).
+    """
+
+    STATE_FILENAME = "anomaly_state.bin"
+    META_FILENAME = "anomaly_state.json"
+    UNDO_FILENAME = "anomaly_state.undo.npy"
+
+    def __init__(self, base_dir, span: int = ANOMALY_EWMA_SPAN):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.base_dir / self.STATE_FILENAME
+        self.meta_path = self.base_dir / self.META_FILENAME
+        self.undo_path = self.base_dir / self.UNDO_FILENAME
+
+        self.meta = {"started": None, "applied_through": None, "previous": None, "span": span}
+        if self.meta_path.exists():
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.meta.update(json.load(f))
+        if self.meta["span"] != span:
+            logger.warning(f"EWMA 기간 변경 ({self.meta['span']} → {span}): 기존 통계에 이어서 적용합니다")
+            self.meta["span"] = span
+        self.alpha = 2.0 / (span + 1)
+
+        # 레코드를 바꾼 뒤 반영일을 기록하기 전에 중단된 경우 → 이전 값으로 되돌림
+        undo = self._load_undo()
+        if undo is not None and undo["day"] != self.meta["applied_through"]:
+            logger.warning("이상 점수 상태 갱신이 중간에 중단됨 → 이전 상태로 복구")
+            self._restore(undo)
+
+    def __len__(self) -> int:
+        return self.state_path.stat().st_size // RECORD_DTYPE.itemsize if self.state_path.exists() else 0
+
+    # ----------------------------------------
+    # 점수 계산 + 갱신
+    # ----------------------------------------
+
+    def score_and_update(self, report_date: str, prod_ids, acc_change, qty_gap) -> Optional[np.ndarray]:
+        """
+        오늘 변동 상품의 이상 점수를 계산하고 상태에 반영
+
+        Args:
+            report_date: 리포트 날짜 (YYYY-MM-DD)
+            prod_ids: 변동 상품 prod_id 배열
+            acc_change: 일치율 변동 (%p)
+            qty_gap: WMS수량 변화량 - CMS 변화량
+
+        Returns:
+            상품별 점수 max(|z_일치율|, |z_수량|) 배열 (준비 기간이면 NaN),
+            마지막 반영일보다 이전 날짜면 None
+        """
+        day = _day_number(report_date)
+        prod_ids = np.asarray(prod_ids, dtype=np.int64)
+        acc_change = np.asarray(acc_change, dtype=np.float64)
+        qty_gap = np.asarray(qty_gap, dtype=np.float64)
+
+        applied = self.meta["applied_through"]
+        if applied is not None and day < applied:
+            logger.info(f"이상 점수 생략: {report_date}는 상태 반영일 이후가 아닙니다")
+            return None
+        if applied is not None and day == applied:
+            # 같은 날 재실행 (입력 변경) → 그날 반영분을 되돌리고 다시 계산
+            self._rollback_last_day()
+        if self.meta["started"] is None:
+            self.meta["started"] = day
+
+        state = self._open(int(prod_ids.max()) + 1 if len(prod_ids) else len(self))
+        before = state[prod_ids]
+
+        # 되돌리기 파일을 먼저 저장 (중단 시 복구용)
+        self._save_undo(day, prod_ids, before)
+
+        # 마지막 갱신 이후 변동 없던 날(관측값 0)만큼 감쇠
+        last_day = np.where(before["last_day"] > 0, before["last_day"], self.meta["started"] - 1)
+        decay = (1.0 - self.alpha) ** np.maximum(day - last_day - 1, 0)
+        acc_m1 = before["acc_m1"] * decay
+        acc_m2 = before["acc_m2"] * decay
+        gap_m1 = before["gap_m1"] * decay
+        gap_m2 = before["gap_m2"] * decay
+
+        z_acc = (acc_change - acc_m1) / np.sqrt(np.maximum(acc_m2 - acc_m1 ** 2, ANOMALY_MIN_STD_ACCURACY ** 2))
+        z_gap = (qty_gap - gap_m1) / np.sqrt(np.maximum(gap_m2 - gap_m1 ** 2, ANOMALY_MIN_STD_QTY ** 2))
+        scores = np.maximum(np.abs(z_acc), np.abs(z_gap))
+        if day - self.meta["started"] < ANOMALY_MIN_HISTORY_DAYS:
+            scores[:] = np.nan
+
+        after = np.empty(len(prod_ids), dtype=RECORD_DTYPE)
+        after["last_day"] = day
+        after["acc_m1"] = (1 - self.alpha) * acc_m1 + self.alpha * acc_change
+        after["acc_m2"] = (1 - self.alpha) * acc_m2 + self.alpha * acc_change ** 2
+        after["gap_m1"] = (1 - self.alpha) * gap_m1 + self.alpha * qty_gap
+        after["gap_m2"] = (1 - self.alpha) * gap_m2 + self.alpha * qty_gap ** 2
+        state[prod_ids] = after
+        state.flush()
+        del state
+
+        if applied != day:
+            self.meta["previous"] = applied
+        self.meta["applied_through"] = day
+        self._save_meta()
+        logger.info(f"이상 점수 상태 반영: {report_date} ({len(prod_ids)}개 상품)")
+        return scores
+
+    def _rollback_last_day(self):
+        undo = self._load_undo()
+        # 반영일을 먼저 되돌려 두면, 복구 중 중단돼도 다음 실행에서 되돌리기 파일로 다시 복구됨
+        self.meta["applied_through"] = self.meta["previous"]
+        self._save_meta()
+        if undo is not None:
+            self._restore(undo)
+
+    # ----------------------------------------
+    # 파일 입출력
+    # ----------------------------------------
+
+    def _open(self, size: int) -> np.memmap:
+        """레코드 파일을 최소 size개로 늘려서 쓰기 모드로 열기 (새 레코드는 0)"""
+        if len(self) < max(size, 1):
+            with open(self.state_path, "ab") as f:
+                f.truncate(max(size, 1) * RECORD_DTYPE.itemsize)
+        return np.memmap(self.state_path, dtype=RECORD_DTYPE, mode="r+")
+
+    def _save_meta(self):
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def _save_undo(self, day: int, ids: np.ndarray, records: np.ndarray):
+        """되돌리기 파일 (첫 행 = 반영일, 이후 id 행과 이전 레코드 행)"""
+        header = np.zeros(1, dtype=RECORD_DTYPE)
+        header["last_day"] = day
+        id_rows = np.zeros(len(ids), dtype=RECORD_DTYPE)
+        id_rows["last_day"] = ids
+        tmp_path = self.undo_path.with_name(self.undo_path.stem + ".tmp.npy")
+        np.save(tmp_path, np.concatenate([header, id_rows, records]))
+        os.replace(tmp_path, self.undo_path)
+
+    def _load_undo(self) -> Optional[dict]:
+        if not self.undo_path.exists():
+            return None
+        packed = np.load(self.undo_path, allow_pickle=False)
+        count = (len(packed) - 1) // 2
+        return {
+            "day": int(packed["last_day"][0]),
+            "ids": packed["last_day"][1:1 + count].astype(np.int64),
+            "records": packed[1 + count:],
+        }
+
+    def _restore(self, undo: dict):
+        if len(undo["ids"]):
+            state = self._open(int(undo["ids"].max()) + 1)
+            state[undo["ids"]] = undo["records"]
+            state.flush()
+            del state
+        self.undo_path.unlink()
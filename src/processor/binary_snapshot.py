@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+정렬된 고정 길이 바이너리 스냅샷 (상품 1개 조회용)
+
+- CSV 옆에 Stock_*.bin으로 저장: 헤더 | 상품코드 블록(정렬, 고정 길이) | 수량/일치율 블록
+- 조회는 memmap + 상품코드 이진 탐색 → 파일 전체를 읽지 않고 몇 페이지만 접근
+- 상품코드 블록을 따로 연속 저장해서 np.searchsorted가 복사 없이 바로 탐색
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+MAGIC = b"STKBIN01"
+HEADER_ALIGN = 64
+
+# 상품코드 외에 저장하는 값 (없는 컬럼은 NaN)
+VALUE_FIELDS = ("cms_qty", "wms_qty", "waiting_qty", "loc_qty", "agv1_qty", "agv4_qty", "accuracy")
+VALUE_DTYPE = np.dtype([(name, "<f8") for name in VALUE_FIELDS])
+
+_SNAPSHOT_PATTERN = re.compile(r'Stock_?(\d{4}-\d{2}-\d{2})(?:_(\d{4}))?')
+
+# 열어 둔 바이너리 스냅샷 (경로 → (수정 시각, BinarySnapshot))
+_open_cache = {}
+
+
+def binary_path(csv_path) -> Path:
+    """CSV 스냅샷에 대응하는 바이너리 스냅샷 경로 (Stock_2026-02-23_0800.csv → Stock_2026-02-23_0800.bin)"""
+    return Path(csv_path).with_suffix(".bin")
+
+
+def write_binary_snapshot(df: pd.DataFrame, path) -> Path:
+    """
+    정규화된 스냅샷 DataFrame(prod_cd, cms_qty, wms_qty, ... , accuracy)을 바이너리로 저장
+
+    상품코드는 UTF-8 바이트 순으로 정렬해서 저장합니다 (임시 파일 → fsync → 이름 교체).
+    """
+    path = Path(path)
+    prod_cd = df["prod_cd"]
+    valid = prod_cd.notna().to_numpy()
+    keys = np.array(prod_cd[valid].astype(str).str.strip().str.encode("utf-8").tolist(), dtype=np.bytes_)
+    if len(keys) == 0:
+        keys = np.zeros(0, dtype="S1")
+    order = np.argsort(keys, kind="stable")
+
+    values = np.full(len(keys), np.nan, dtype=VALUE_DTYPE)
+    for name in VALUE_FIELDS:
+        if name in df.columns:
+            values[name] = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)[valid]
+
+    header = json.dumps({
+        "count": int(len(keys)),
+        "key_width": int(keys.dtype.itemsize),
+        "fields": list(VALUE_FIELDS),
+    }).encode("utf-8")
+    prefix = MAGIC + len(header).to_bytes(4, "little") + header
+    prefix += b"\0" * (-len(prefix) % HEADER_ALIGN)
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(prefix)
+            f.write(keys[order].tobytes())
+            f.write(values[order].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+class BinarySnapshot:
+    """
+    바이너리 스냅샷 읽기 (memmap, 읽기 전용)
+
+    사용 예:
+        snapshot = BinarySnapshot("Stock_2026-02-23_0800.bin")
+        snapshot.lookup("P001")  # {'prod_cd': 'P001', 'cms_qty': 100.0, ...} 또는 None
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"바이너리 스냅샷 형식이 아닙니다: {self.path}")
+            header_len = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(header_len))
+        if header["fields"] != list(VALUE_FIELDS):
+            raise ValueError(f"바이너리 스냅샷 필드가 다릅니다: {header['fields']}")
+
+        offset = len(MAGIC) + 4 + header_len
+        offset += -offset % HEADER_ALIGN
+        self.count = header["count"]
+        self.key_width = header["key_width"]
+        if self.count == 0:
+            self.keys = np.zeros(0, dtype=f"S{self.key_width}")
+            self.values = np.zeros(0, dtype=VALUE_DTYPE)
+            return
+        key_dtype = np.dtype(f"S{self.key_width}")
+        self.keys = np.memmap(self.path, dtype=key_dtype, mode="r", offset=offset, shape=(self.count,))
+        self.values = np.memmap(self.path, dtype=VALUE_DTYPE, mode="r",
+                                offset=offset + self.count * key_dtype.itemsize, shape=(self.count,))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _position(self, prod_cd: str) -> int:
+        """상품코드 위치 (없으면 -1)"""
+        key = str(prod_cd).strip().encode("utf-8")
+        if not key or len(key) > self.key_width:
+            return -1
+        position = int(np.searchsorted(self.keys, key))
+        if position < self.count and self.keys[position] == key:
+            return position
+        return -1
+
+    def lookup(self, prod_cd: str) -> Optional[Dict[str, float]]:
+        """상품 1개의 수량/일치율 (없으면 None)"""
+        position = self._position(prod_cd)
+        if position < 0:
+            return None
+        record = self.values[position]
+        return {"prod_cd": str(prod_cd).strip(), **{name: float(record[name]) for name in VALUE_FIELDS}}
+
+    def lookup_many(self, prod_cds: Iterable[str]) -> pd.DataFrame:
+        """여러 상품 조회 (없는 상품은 제외)"""
+        keys = np.array([str(p).strip().encode("utf-8") for p in prod_cds], dtype=np.bytes_)
+        if len(keys) == 0 or self.count == 0:
+            return pd.DataFrame(columns=["prod_cd", *VALUE_FIELDS])
+        fits = np.char.str_len(keys) <= self.key_width
+        positions = np.searchsorted(self.keys, keys.astype(self.keys.dtype))
+        positions = np.minimum(positions, self.count - 1)
+        found = fits & (self.keys[positions] == keys.astype(self.keys.dtype))
+        result = pd.DataFrame(np.asarray(self.values[positions[found]]))
+        result.insert(0, "prod_cd", np.char.decode(keys[found], "utf-8"))
+        return result
+
+
+def open_binary_snapshot(path) -> BinarySnapshot:
+    """열어 둔 바이너리 스냅샷 재사용 (파일이 바뀌면 다시 열기)"""
+    path = Path(path)
+    mtime = path.stat().st_mtime_ns
+    cached = _open_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, BinarySnapshot(path))
+        _open_cache[path] = cached
+    return cached[1]
+
+
+def list_binary_snapshots(base_dir) -> Dict[str, Path]:
+    """스냅샷 폴더(루트 + 월별 폴더)의 날짜별 바이너리 스냅샷 (날짜당 가장 늦은 시간 파일)"""
+    base_dir = Path(base_dir)
+    latest = {}
+    for path in list(base_dir.glob("Stock*.bin")) + list(base_dir.glob("*/Stock*.bin")):
+        match = _SNAPSHOT_PATTERN.search(path.name)
+        if not match:
+            continue
+        date_str, time_str = match.group(1), match.group(2) or "0000"
+        if date_str not in latest or time_str > latest[date_str][0]:
+            latest[date_str] = (time_str, path)
+    return {date_str: latest[date_str][1] for date_str in sorted(latest)}
+
+
+def sku_snapshot_history(base_dir, prod_cd: str, date_from: str = None, date_to: str = None) -> pd.DataFrame:
+    """
+    상품 1개의 날짜별 수량/일치율 (바이너리 스냅샷마다 이진 탐색)
+
+    Returns:
+        snapshot_date, cms_qty, wms_qty, waiting_qty, loc_qty, agv1_qty, agv4_qty, accuracy 컬럼 DataFrame
+    """
+    rows = []
+    for date_str, path in list_binary_snapshots(base_dir).items():
+        if (date_from and date_str < date_from) or (date_to and date_str > date_to):
+            continue
+        record = open_binary_snapshot(path).lookup(prod_cd)
+        if record is not None:
+            record.pop("prod_cd")
+            rows.append({"snapshot_date": date_str, **record})
+    return pd.DataFrame(rows, columns=["snapshot_date", *VALUE_FIELDS])
@@ -1,22 +1,222 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
 from loguru import logger
 from config.settings import RAW_DIR, PROCESSED_DIR
+from src.processor.snapshot_archive import open_snapshot
+
+
+# 스냅샷 CSV 컬럼명 → 내부 처리용 이름 (파일 컬럼명이 바뀌면 여기만 수정)
+COLUMN_MAP = {
+    "상품코드": "prod_cd",
+    "상품명": "prod_nm",
+    "브랜드": "brand_nm",
+    "사용여부": "prod_use_yn",
+    "CMS 재고": "cms_qty",
+    "WMS 재고": "wms_qty",
+    "대기 수량": "waiting_qty",
+    "로케이션 재고": "loc_qty",
+    "AGV1 재고": "agv1_qty",
+    "AGV4 재고": "agv4_qty",
+    # DB export 영문 컬럼명 (이전 버전 파일 지원)
+    "cms_total_qty": "cms_qty",
+    "wms_total_qty": "wms_qty",
+}
+KEY_COLUMN = "상품코드"
+ACCURACY_COLUMN = "일치율"    # CSV에 이미 존재하는 일치율 컬럼
+# 상품코드는 항상 문자열로 읽음 ("00123"이 123으로 바뀌면 상품코드 사전에서 다른 상품 ID가 됨)
+SNAPSHOT_DTYPES = {KEY_COLUMN: str, "prod_cd": str}
+QTY_COLUMNS = ("cms_qty", "wms_qty", "waiting_qty", "loc_qty", "agv1_qty", "agv4_qty")
+
+# 상품코드 중복 처리: sum (수량 합산, 일치율 재계산) / first (처음 행 유지) / error (DuplicateKeyError)
+DUPLICATE_POLICIES = ("sum", "first", "error")
+SNAPSHOT_DUPLICATE_POLICY = os.getenv("SNAPSHOT_DUPLICATE_POLICY", "first").strip().lower()
+# 로그/예외 메시지에 남길 중복 상품코드 수
+_DUPLICATE_SAMPLE = 20
+
+# 정규화 단계: (이름, DataFrame → DataFrame 함수)
+Step = Tuple[str, Callable[[pd.DataFrame], pd.DataFrame]]
+
+
+# ----------------------------------------
+# 정규화 단계 (모두 컬럼 단위 벡터 연산)
+# ----------------------------------------
+
+def drop_empty_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """모든 값이 빈 행 제거"""
+    return df.dropna(how="all")
+
+
+def drop_summary_row(df: pd.DataFrame, key_column: str = KEY_COLUMN) -> pd.DataFrame:
+    """마지막 행이 합계/요약 행(상품코드가 비어 있음)이면 제거"""
+    key_column = key_column if key_column in df.columns else COLUMN_MAP.get(key_column)
+    if len(df) == 0 or key_column not in df.columns:
+        return df
+    last = df[key_column].iloc[-1]
+    if pd.isna(last) or str(last).strip() == "":
+        return df.iloc[:-1]
+    return df
+
+
+def rename_columns(df: pd.DataFrame, column_map: Dict[str, str] = COLUMN_MAP) -> pd.DataFrame:
+    """한글/영문 컬럼명을 내부 처리용 이름으로 통일 (있는 컬럼만)"""
+    return df.rename(columns={c: column_map[c] for c in df.columns if c in column_map})
+
+
+def coerce_quantities(df: pd.DataFrame, columns: Sequence[str] = QTY_COLUMNS) -> pd.DataFrame:
+    """수치 컬럼 강제 변환 (문자열/NaN → 숫자, 변환 불가 값은 0)"""
+    for col in columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    return df
+
+
+def compute_accuracy(cms_qty, wms_qty, waiting_qty) -> np.ndarray:
+    """
+    일치율 계산 (calculate_accuracy와 같은 정책, 배열 단위)
+
+    - cms == 0 AND physical == 0 → 100.0
+    - cms == 0 OR physical == 0, 또는 음수 → 0.0
+    - 그 외 → round(min/max * 100, 1), 반올림으로 100이 됐지만 실제로 다르면 99.9
+    """
+    cms = np.nan_to_num(np.asarray(cms_qty, dtype=float))
+    physical = np.nan_to_num(np.asarray(wms_qty, dtype=float)) + np.nan_to_num(np.asarray(waiting_qty, dtype=float))
+    least = np.minimum(cms, physical)
+    greatest = np.maximum(cms, physical)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid = np.round(least / greatest * 100, 1)
+    valid = np.where((valid >= 100) & (least != greatest), 99.9, valid)
+    valid = np.where((cms == 0) | (physical == 0) | (cms < 0) | (physical < 0), 0.0, valid)
+    return np.where((cms == 0) & (physical == 0), 100.0, valid)
+
+
+def parse_accuracy(df: pd.DataFrame, accuracy_column: str = ACCURACY_COLUMN) -> pd.DataFrame:
+    """accuracy 컬럼 생성: CSV 일치율("99.5", "0%" 등)을 숫자로, 없으면 수량으로 계산"""
+    if accuracy_column in df.columns:
+        values = df[accuracy_column]
+        if not pd.api.types.is_numeric_dtype(values.dtype):
+            values = pd.to_numeric(values.astype(str).str.replace("%", "", regex=False).str.strip(), errors="coerce")
+        df["accuracy"] = values.astype(float).fillna(0.0)
+    else:
+        zeros = np.zeros(len(df))
+        df["accuracy"] = compute_accuracy(
+            df["cms_qty"] if "cms_qty" in df.columns else zeros,
+            df["wms_qty"] if "wms_qty" in df.columns else zeros,
+            df["waiting_qty"] if "waiting_qty" in df.columns else zeros,
+        )
+    return df
+
+
+class DuplicateKeyError(ValueError):
+    """스냅샷에 같은 상품코드가 여러 행 있음 (SNAPSHOT_DUPLICATE_POLICY=error)"""
+
+    def __init__(self, keys: Sequence, rows: int):
+        self.keys = list(keys)
+        self.rows = rows
+        super().__init__(f"상품코드 중복: {len(self.keys)}개 상품 / {rows}행 "
+                         f"(예: {', '.join(map(str, self.keys[:5]))})")
+
+
+def dedupe_keys(df: pd.DataFrame, policy: Optional[str] = None, key: str = "prod_cd") -> pd.DataFrame:
+    """
+    상품코드가 한 행씩만 남도록 정리 (해시 기반 O(n), 중복이 없으면 그대로 반환)
+
+    SQL의 다국어 테이블(TB_PROD_LANG/TB_BRAND_LANG)에 같은 언어 행이 두 개 있으면 상품 행이 복제되는데,
+    비교 단계는 상품코드당 한 행을 전제로 하므로 로드 시점에 정리합니다.
+
+    Args:
+        policy: sum / first / error (None이면 SNAPSHOT_DUPLICATE_POLICY)
+
+    Returns:
+        상품코드가 유일한 DataFrame (처음 나온 순서 유지)
+        중복이 있었으면 df.attrs['duplicates']에 {'policy', 'keys'(예시), 'key_count', 'rows'} 기록
+    """
+    policy = (policy or SNAPSHOT_DUPLICATE_POLICY).lower()
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"알 수 없는 상품코드 중복 처리 방식: {policy} (sum/first/error)")
+    if key not in df.columns or len(df) == 0:
+        return df
+
+    keys = df[key]
+    if pd.Index(keys).is_unique:    # 해시 테이블 한 번으로 확인 (정상 스냅샷은 여기서 끝)
+        return df
+    duplicated = keys.duplicated(keep=False).to_numpy() & keys.notna().to_numpy()
+    if not duplicated.any():
+        return df
+
+    duplicate_keys = pd.unique(keys[duplicated])
+    rows = int(duplicated.sum())
+    if policy == "error":
+        raise DuplicateKeyError(duplicate_keys, rows)
+
+    keep = ~keys.duplicated(keep="first").to_numpy() | keys.isna().to_numpy()
+    result = df[keep].copy()
+    if policy == "sum":
+        qty_columns = [c for c in QTY_COLUMNS if c in df.columns]
+        totals = df.loc[duplicated, qty_columns].groupby(keys[duplicated], sort=False).sum()
+        merged = result[key].isin(totals.index).to_numpy() & result[key].notna().to_numpy()
+        result.loc[merged, qty_columns] = totals.loc[result.loc[merged, key]].to_numpy()
+        if "accuracy" in result.columns:
+            zeros = np.zeros(int(merged.sum()))
+            result.loc[merged, "accuracy"] = compute_accuracy(
+                result.loc[merged, "cms_qty"] if "cms_qty" in result.columns else zeros,
+                result.loc[merged, "wms_qty"] if "wms_qty" in result.columns else zeros,
+                result.loc[merged, "waiting_qty"] if "waiting_qty" in result.columns else zeros,
+            )
+
+    result.attrs["duplicates"] = {
+        "policy": policy,
+        "keys": [str(k) for k in duplicate_keys[:_DUPLICATE_SAMPLE]],
+        "key_count": len(duplicate_keys),
+        "rows": rows,
+    }
+    logger.warning(f"상품코드 중복 {len(duplicate_keys)}개 상품 / {rows}행 → {policy} 처리 "
+                   f"(예: {', '.join(result.attrs['duplicates']['keys'][:5])})")
+    return result
+
+
+def default_steps(column_map: Dict[str, str] = COLUMN_MAP) -> List[Step]:
+    """스냅샷 정규화 기본 단계"""
+    return [
+        ("drop_empty_rows", drop_empty_rows),
+        ("drop_summary_row", drop_summary_row),
+        ("rename_columns", partial(rename_columns, column_map=column_map)),
+        ("coerce_quantities", coerce_quantities),
+        ("parse_accuracy", parse_accuracy),
+        ("dedupe_keys", dedupe_keys),
+    ]
 
 
 class DataProcessor:
     """
-    raw/ 폴더의 CSV 파일을 읽어 전처리 후 processed/ 폴더에 저장합니다.
+    스냅샷 CSV 정규화 엔진 (분석기/조회 API/백필이 모두 같은 단계를 사용)
+
+    정규화 단계는 (이름, 함수) 리스트로 조합하며, 단계별 소요 시간을 기록합니다.
+    run/run_many는 정규화 결과를 processed/ 폴더에 저장해 다른 작업에서 다시 쓸 수 있게 합니다.
     """
 
-    def __init__(self):
-        PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    def __init__(self, steps: Optional[Iterable[Step]] = None, column_map: Dict[str, str] = COLUMN_MAP):
+        self.steps = list(steps) if steps is not None else default_steps(column_map)
+        self.last_timings: Dict[str, float] = {}
 
     def load_csv(self, file_path: Path, encoding: str = "utf-8-sig") -> pd.DataFrame | None:
-        """CSV 파일을 읽어 DataFrame으로 반환합니다."""
+        """CSV 파일을 읽어 DataFrame으로 반환합니다 (압축 보관된 스냅샷 포함, 한글 인코딩 대체)."""
+        def read(enc):
+            with open_snapshot(file_path) as f:
+                return pd.read_csv(f, encoding=enc, dtype=SNAPSHOT_DTYPES)
+
         try:
-            df = pd.read_csv(file_path, encoding=encoding)
-            logger.info(f"CSV 로드 완료: {file_path.name} ({len(df)} rows)")
+            try:
+                df = read(encoding)
+            except UnicodeDecodeError:
+                df = read("cp949")
+            logger.info(f"CSV 로드 완료: {Path(file_path).name} ({len(df)} rows)")
             return df
         except Exception as e:
             logger.error(f"CSV 로드 실패 [{file_path}]: {e}")
@@ -24,26 +224,91 @@ class DataProcessor:
 
     def process(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        전처리 로직을 구현합니다.
-        예: 결측값 처리, 타입 변환, 컬럼 정리 등
+        정규화 단계를 순서대로 적용합니다.
+
+        Returns:
+            정규화된 DataFrame (prod_cd, prod_nm, cms_qty, wms_qty, waiting_qty, ..., accuracy)
+            기본 단계는 상품코드당 한 행 (중복 처리 결과는 df.attrs['duplicates'])
+
+        Raises:
+            DuplicateKeyError: 상품코드 중복이 있고 SNAPSHOT_DUPLICATE_POLICY=error
         """
-        # TODO: 실제 전처리 로직 구현
-        df = df.dropna(how="all")
-        logger.info("데이터 전처리 완료")
+        timings = {}
+        for name, step in self.steps:
+            started = time.perf_counter()
+            df = step(df)
+            timings[name] = time.perf_counter() - started
+        self.last_timings = timings
+        logger.debug("데이터 정규화 완료 ({} rows): {}".format(
+            len(df), ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in timings.items())))
         return df
 
     def save_csv(self, df: pd.DataFrame, filename: str) -> Path:
-        """전처리된 DataFrame을 processed/ 폴더에 저장합니다."""
+        """전처리된 DataFrame을 processed/ 폴더에 저장합니다 (임시 파일 → 이름 교체)."""
+        PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
         output_path = PROCESSED_DIR / filename
-        df.to_csv(output_path, index=False, encoding="utf-8-sig")
+        tmp_path = output_path.with_name(f".{filename}.tmp")
+        df.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+        tmp_path.replace(output_path)
         logger.info(f"전처리 데이터 저장: {output_path}")
         return output_path
 
-    def run(self, file_path: Path) -> pd.DataFrame | None:
+    def run(self, file_path: Path, save: bool = True) -> pd.DataFrame | None:
         """로드 → 전처리 → 저장 파이프라인을 실행합니다."""
+        file_path = Path(file_path)
         df = self.load_csv(file_path)
         if df is None:
             return None
         df = self.process(df)
-        self.save_csv(df, f"processed_{file_path.name}")
+        if save:
+            self.save_csv(df, f"processed_{file_path.name}")
         return df
+
+    def run_many(self, file_paths: Iterable, save: bool = True, keep: bool = True,
+                 max_workers: int = 4) -> Dict[str, pd.DataFrame | None]:
+        """
+        여러 스냅샷을 한 번에 정규화 (예: 한 달치), 파일 읽기는 스레드로 동시에
+
+        Args:
+            file_paths: 스냅샷 경로들
+            save: processed/ 폴더에 저장
+            keep: 결과 DataFrame을 반환값에 유지 (False면 저장만 하고 메모리에 두지 않음)
+            max_workers: 동시에 읽을 파일 수
+
+        Returns:
+            {경로: 정규화된 DataFrame (실패 시 None, keep=False면 None)}
+        """
+        file_paths = [Path(p) for p in file_paths]
+        workers = max(1, max_workers)
+        results = {}
+        totals = {name: 0.0 for name, _ in self.steps}
+        started = time.perf_counter()
+        rows = failed = 0
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="data-processor") as executor:
+            # 읽기(I/O)는 workers개씩 동시에, 정규화는 순서대로 (메모리에는 한 묶음만 유지)
+            for i in range(0, len(file_paths), workers):
+                batch = file_paths[i:i + workers]
+                for file_path, df in zip(batch, executor.map(self.load_csv, batch)):
+                    if df is not None:
+                        try:
+                            df = self.process(df)
+                        except DuplicateKeyError as e:
+                            logger.error(f"정규화 실패 [{file_path.name}]: {e}")
+                            df = None
+                    if df is None:
+                        failed += 1
+                    else:
+                        for name, seconds in self.last_timings.items():
+                            totals[name] = totals.get(name, 0.0) + seconds
+                        rows += len(df)
+                        if save:
+                            self.save_csv(df, f"processed_{file_path.name}")
+                    results[str(file_path)] = df if keep else None
+
+        logger.info(
+            f"일괄 정규화 완료: {len(file_paths)}개 파일, {rows}행, 실패 {failed}개, "
+            f"{time.perf_counter() - started:.1f}초 ("
+            + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in totals.items()) + ")"
+        )
+        return results
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+일치율 이력 저장소 (SQLite)
+
+- (snapshot_date, prod_cd) 키로 일자별 재고/일치율을 누적 저장
+- 일자별 분포(daily_summary)는 적재 시점에 미리 집계하여 범위 조회를 즉시 응답
+- 표준 라이브러리 sqlite3만 사용 (추가 패키지 불필요)
+"""
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+from loguru import logger
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock_history (
+    snapshot_date TEXT NOT NULL,
+    prod_cd       TEXT NOT NULL,
+    prod_id       INTEGER,
+    cms_qty       REAL NOT NULL DEFAULT 0,
+    wms_qty       REAL NOT NULL DEFAULT 0,
+    waiting_qty   REAL NOT NULL DEFAULT 0,
+    accuracy      REAL NOT NULL,
+    PRIMARY KEY (snapshot_date, prod_cd)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS ix_stock_history_prod
+    ON stock_history (prod_cd, snapshot_date);
+
+CREATE TABLE IF NOT EXISTS daily_summary (
+    snapshot_date TEXT PRIMARY KEY,
+    sku_count     INTEGER NOT NULL,
+    avg_accuracy  REAL NOT NULL,
+    acc_100       INTEGER NOT NULL,
+    acc_90_100    INTEGER NOT NULL,
+    acc_50_90     INTEGER NOT NULL,
+    acc_0_50      INTEGER NOT NULL,
+    acc_0         INTEGER NOT NULL,
+    cms_total     REAL NOT NULL,
+    physical_total REAL NOT NULL
+);
+"""
+
+_HISTORY_COLUMNS = ['prod_cd', 'prod_id', 'cms_qty', 'wms_qty', 'waiting_qty', 'accuracy']
+
+
+class AccuracyHistoryStore:
+    """
+    일자별 재고 일치율 이력 저장소
+
+    같은 날짜를 다시 적재하면 해당 날짜 데이터를 교체합니다 (하루 = 최신 스냅샷 1개).
+    """
+
+    DB_FILENAME = "stock_history.sqlite3"
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ----------------------------------------
+    # 적재
+    # ----------------------------------------
+
+    def append_snapshot(self, snapshot_date: str, df: pd.DataFrame) -> int:
+        """
+        정규화된 스냅샷 1일치를 적재
+
+        Args:
+            snapshot_date: 스냅샷 날짜 (YYYY-MM-DD)
+            df: prod_cd, cms_qty, wms_qty, waiting_qty, accuracy (, prod_id) 컬럼을 가진 DataFrame
+
+        Returns:
+            적재한 행 수
+        """
+        rows = df.reindex(columns=_HISTORY_COLUMNS).copy()
+        rows['prod_cd'] = rows['prod_cd'].astype(str)
+        for col in ('cms_qty', 'wms_qty', 'waiting_qty', 'accuracy'):
+            rows[col] = pd.to_numeric(rows[col], errors='coerce').fillna(0).astype(float)
+        prod_id = pd.to_numeric(rows['prod_id'], errors='coerce')
+        rows['prod_id'] = prod_id.astype(object).where(prod_id.notna(), None)
+        rows = rows.drop_duplicates('prod_cd', keep='last')
+        rows.insert(0, 'snapshot_date', snapshot_date)
+
+        accuracy = rows['accuracy']
+        summary = (
+            snapshot_date,
+            len(rows),
+            float(accuracy.mean()) if len(rows) else 0.0,
+            int((accuracy >= 100).sum()),
+            int(((accuracy >= 90) & (accuracy < 100)).sum()),
+            int(((accuracy >= 50) & (accuracy < 90)).sum()),
+            int(((accuracy > 0) & (accuracy < 50)).sum()),
+            int((accuracy <= 0).sum()),
+            float(rows['cms_qty'].sum()),
+            float((rows['wms_qty'] + rows['waiting_qty']).sum()),
+        )
+
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute("DELETE FROM stock_history WHERE snapshot_date = ?", (snapshot_date,))
+                conn.executemany(
+                    "INSERT INTO stock_history (snapshot_date, prod_cd, prod_id, cms_qty, wms_qty, waiting_qty, accuracy) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows.itertuples(index=False, name=None),
+                )
+                conn.execute("INSERT OR REPLACE INTO daily_summary VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", summary)
+
+        logger.info(f"이력 저장소 적재 완료: {snapshot_date} ({len(rows)}개 상품)")
+        return len(rows)
+
+    def has_date(self, snapshot_date: str) -> bool:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT 1 FROM daily_summary WHERE snapshot_date = ?", (snapshot_date,)).fetchone()
+        return row is not None
+
+    # ----------------------------------------
+    # 조회
+    # ----------------------------------------
+
+    def _query(self, sql: str, params: tuple) -> pd.DataFrame:
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def sku_history(self, prod_cd: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> pd.DataFrame:
+        """상품 1개의 일자별 재고/일치율 이력 (ix_stock_history_prod 인덱스 사용)"""
+        return self._query(
+            "SELECT snapshot_date, cms_qty, wms_qty, waiting_qty, accuracy "
+            "FROM stock_history "
+            "WHERE prod_cd = ? AND snapshot_date BETWEEN ? AND ? "
+            "ORDER BY snapshot_date",
+            (str(prod_cd), date_from or "0000-00-00", date_to or "9999-12-31"),
+        )
+
+    def daily_distribution(self, date_from: str, date_to: str) -> pd.DataFrame:
+        """기간 내 일자별 일치율 분포 (적재 시 미리 집계된 daily_summary 조회)"""
+        return self._query(
+            "SELECT * FROM daily_summary WHERE snapshot_date BETWEEN ? AND ? ORDER BY snapshot_date",
+            (date_from, date_to),
+        )
+
+    def top_movers(self, date_from: str, date_to: str, top_n: int = 20) -> pd.DataFrame:
+        """
+        기간 첫날 대비 마지막 날 일치율 변동이 큰 상품
+
+        기간 내 실제로 적재된 첫/마지막 날짜를 기준으로 비교합니다.
+        """
+        with closing(self._connect()) as conn:
+            first, last = conn.execute(
+                "SELECT MIN(snapshot_date), MAX(snapshot_date) FROM daily_summary WHERE snapshot_date BETWEEN ? AND ?",
+                (date_from, date_to),
+            ).fetchone()
+            if first is None or first == last:
+                return pd.DataFrame(columns=['prod_cd', 'date_from', 'date_to', 'accuracy_from', 'accuracy_to', 'change'])
+
+            return pd.read_sql_query(
+                "SELECT t.prod_cd, ? AS date_from, ? AS date_to, "
+                "       f.accuracy AS accuracy_from, t.accuracy AS accuracy_to, "
+                "       t.accuracy - f.accuracy AS change "
+                "FROM stock_history t "
+                "JOIN stock_history f ON f.snapshot_date = ? AND f.prod_cd = t.prod_cd "
+                "WHERE t.snapshot_date = ? AND t.accuracy != f.accuracy "
+                "ORDER BY ABS(t.accuracy - f.accuracy) DESC "
+                "LIMIT ?",
+                conn,
+                params=(first, last, first, last, int(top_n)),
+            )
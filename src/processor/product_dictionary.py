@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+상품코드 사전 (prod_cd ↔ 정수 ID)
+
+- 한 번 부여된 ID는 절대 바뀌지 않는 append-only 사전
+- 일자별 스냅샷 비교/추이/집계를 문자열 해시 조인 대신 정수 배열 인덱싱으로 처리
+- 상품명/브랜드는 사이드 테이블(product_info.csv)에 최신값으로 보관
+- 여러 프로세스(export/분석/백필)가 같은 사전을 쓰므로 새 ID는 파일 잠금 안에서
+  파일 끝을 다시 읽은 뒤 부여하고 바로 기록 (한 번 내준 ID = 파일의 ID)
+"""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """프로세스 간 배타 잠금 (잠금 파일 기준, Windows는 msvcrt / 그 외는 fcntl)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK은 약 10초 재시도 후 OSError → 잠금을 얻을 때까지 반복
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ProductDictionary:
+    """
+    prod_cd → prod_id(0부터 시작하는 연속 정수) 영구 사전
+
+    파일 구성 (base_dir 하위):
+        product_dict.csv : prod_id, prod_cd   (append-only)
+        product_info.csv : prod_id, prod_cd, prod_nm, brand_nm   (매 export마다 갱신)
+
+    base_dir가 None이면 파일 없이 메모리에서만 동작합니다.
+    """
+
+    DICT_FILENAME = "product_dict.csv"
+    INFO_FILENAME = "product_info.csv"
+    LOCK_FILENAME = "product_dict.lock"
+
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = Path(base_dir) if base_dir is not None else None
+        self._codes: list = []
+        self._index = pd.Index([], dtype=object)
+        self._codes_array = None  # decode용 캐시 (코드 추가 시 무효화)
+        self._added = 0  # 마지막 save() 이후 이 인스턴스가 새로 등록한 코드 수
+
+        if self.base_dir is not None:
+            self._load()
+
+    # ----------------------------------------
+    # 파일 입출력
+    # ----------------------------------------
+
+    @property
+    def dict_path(self) -> Optional[Path]:
+        return self.base_dir / self.DICT_FILENAME if self.base_dir is not None else None
+
+    @property
+    def info_path(self) -> Optional[Path]:
+        return self.base_dir / self.INFO_FILENAME if self.base_dir is not None else None
+
+    @property
+    def lock_path(self) -> Optional[Path]:
+        return self.base_dir / self.LOCK_FILENAME if self.base_dir is not None else None
+
+    def _read_codes(self) -> list:
+        """사전 파일의 상품코드 목록 (prod_id 순서)"""
+        df = pd.read_csv(self.dict_path, dtype={"prod_cd": str}, encoding="utf-8")
+        df = df.sort_values("prod_id", kind="stable")
+
+        # append-only 보장: prod_id는 0..n-1 연속이어야 함
+        expected = np.arange(len(df))
+        if not np.array_equal(df["prod_id"].to_numpy(), expected):
+            raise ValueError(f"상품코드 사전이 손상되었습니다 (prod_id 불연속): {self.dict_path}")
+        return df["prod_cd"].tolist()
+
+    def _set_codes(self, codes: list):
+        self._codes = codes
+        self._index = pd.Index(self._codes, dtype=object)
+        self._codes_array = None
+
+    def _load(self):
+        """사전 파일 로드 (prod_id 순서 = 파일 행 순서)"""
+        if not self.dict_path.exists():
+            return
+
+        # 다른 프로세스가 끝에 덧붙이는 중인 줄을 읽지 않도록 잠금 안에서 읽음
+        with _file_lock(self.lock_path):
+            self._set_codes(self._read_codes())
+        logger.info(f"상품코드 사전 로드: {len(self._codes)}개 ({self.dict_path.name})")
+
+    def _refresh(self):
+        """
+        다른 프로세스가 파일 끝에 추가한 코드 반영 (잠금 안에서 호출)
+
+        이미 알고 있는 코드의 ID가 파일과 다르면 사전이 갈라진 것이므로 오류
+        """
+        if not self.dict_path.exists():
+            if self._codes:
+                raise ValueError(f"상품코드 사전 파일이 사라졌습니다: {self.dict_path}")
+            return
+
+        codes = self._read_codes()
+        if codes[:len(self._codes)] != self._codes:
+            raise ValueError(f"상품코드 사전이 다른 프로세스와 어긋났습니다: {self.dict_path}")
+        if len(codes) > len(self._codes):
+            self._set_codes(codes)
+
+    def _register(self, new_codes: list):
+        """
+        새 코드 등록
+
+        파일 사전이면 잠금 → 파일 끝 재확인 → 아직 없는 코드만 파일 길이부터 번호를 매겨 즉시 기록.
+        이렇게 해야 save() 전에 넘겨준 ID(비교/이상 점수/이력)가 다른 프로세스의 ID와 겹치지 않음
+        """
+        if self.base_dir is None:
+            self._set_codes(self._codes + new_codes)
+            self._added += len(new_codes)
+            return
+
+        with _file_lock(self.lock_path):
+            self._refresh()
+            new_codes = [code for code in new_codes if code not in self._index]
+            if not new_codes:
+                return
+
+            is_new_file = not self.dict_path.exists()
+            new_rows = pd.DataFrame({
+                "prod_id": np.arange(len(self._codes), len(self._codes) + len(new_codes)),
+                "prod_cd": new_codes,
+            })
+            # 사전 파일은 이어쓰기하므로 BOM 없는 utf-8 사용
+            new_rows.to_csv(self.dict_path, mode="a", header=is_new_file, index=False, encoding="utf-8")
+            self._set_codes(self._codes + new_codes)
+            self._added += len(new_codes)
+
+    def save(self) -> int:
+        """
+        새 코드 기록 결과 보고
+
+        새 ID는 encode() 시점에 잠금 안에서 바로 파일에 기록되므로 여기서는 쓰지 않습니다.
+
+        Returns:
+            마지막 save() 이후 이 인스턴스가 새로 기록한 코드 수
+        """
+        if self.base_dir is None:
+            return 0
+
+        added, self._added = self._added, 0
+        if added:
+            logger.info(f"상품코드 사전 추가: {added}개 (총 {len(self._codes)}개)")
+        return added
+
+    def save_info(self, df: pd.DataFrame):
+        """
+        상품명/브랜드 사이드 테이블 갱신 (기존 정보 + 이번 스냅샷 정보, 최신값 우선)
+
+        Args:
+            df: prod_cd, prod_nm, (brand_nm) 컬럼을 가진 DataFrame
+        """
+        if self.base_dir is None:
+            return
+
+        info = pd.DataFrame({
+            "prod_id": self.encode(df["prod_cd"]),
+            "prod_cd": df["prod_cd"].astype(str).to_numpy(),
+            "prod_nm": df["prod_nm"].to_numpy() if "prod_nm" in df.columns else None,
+            "brand_nm": df["brand_nm"].to_numpy() if "brand_nm" in df.columns else None,
+        })
+
+        # 읽기 → 병합 → 교체 사이에 다른 프로세스가 끼어들면 그쪽 갱신이 사라지므로 잠금 안에서 처리
+        with _file_lock(self.lock_path):
+            if self.info_path.exists():
+                previous = pd.read_csv(self.info_path, dtype={"prod_cd": str}, encoding="utf-8")
+                info = pd.concat([previous, info], ignore_index=True)
+
+            info = info.drop_duplicates("prod_id", keep="last").sort_values("prod_id")
+
+            tmp_path = self.info_path.with_suffix(".tmp")
+            info.to_csv(tmp_path, index=False, encoding="utf-8")
+            tmp_path.replace(self.info_path)
+
+    def load_info(self) -> pd.DataFrame:
+        """상품명/브랜드 사이드 테이블 로드 (prod_id 인덱스)"""
+        if self.info_path is None or not self.info_path.exists():
+            return pd.DataFrame(columns=["prod_cd", "prod_nm", "brand_nm"]).rename_axis("prod_id")
+        info = pd.read_csv(self.info_path, dtype={"prod_cd": str}, encoding="utf-8")
+        return info.set_index("prod_id")
+
+    # ----------------------------------------
+    # 인코딩 / 디코딩
+    # ----------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def encode(self, prod_cds: Iterable, add: bool = True) -> np.ndarray:
+        """
+        상품코드 배열을 정수 ID 배열로 변환 (벡터화)
+
+        Args:
+            prod_cds: 상품코드 배열 (Series, list 등)
+            add: 사전에 없는 코드를 새 ID로 등록할지 여부 (False면 -1 반환)
+
+        Returns:
+            int64 ID 배열 (입력과 같은 길이/순서)
+        """
+        values = pd.Index(pd.Series(prod_cds, dtype=object).astype(str), dtype=object)
+        ids = self._index.get_indexer(values)
+
+        if add:
+            missing = ids < 0
+            if missing.any():
+                self._register(values[missing].unique().tolist())
+                ids = self._index.get_indexer(values)
+
+        return ids.astype(np.int64)
+
+    def decode(self, ids: Iterable) -> np.ndarray:
+        """정수 ID 배열을 상품코드 배열로 변환"""
+        if self._codes_array is None:
+            self._codes_array = np.asarray(self._codes, dtype=object)
+        return self._codes_array[np.asarray(ids, dtype=np.int64)]
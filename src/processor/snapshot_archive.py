@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+스냅샷 월별 압축 보관
+
+- 오래된 Stock_*.csv를 월 폴더의 묶음 파일(snapshots.archive.gz)에 gzip 멤버로 이어 붙이고 원본 삭제
+- 인덱스(snapshots.archive.json)에 파일명별 위치(offset/length), 원본 크기, 행 수, sha256 기록
+- 로더는 원본이 없으면 묶음 파일에서 해당 멤버만 스트리밍으로 풀어 읽음 (경로는 원래 CSV 경로 그대로 사용)
+- 묶음 전체도 표준 gzip 파일이라 gzip 도구로 풀 수 있음 (스냅샷이 이어진 형태)
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from src.processor.snapshot_manifest import manifest_path, read_manifest, verify_snapshot
+
+
+ARCHIVE_FILENAME = "snapshots.archive.gz"
+INDEX_FILENAME = "snapshots.archive.json"
+
+# 이 일수보다 오래된 스냅샷을 압축 보관 (0이면 보관하지 않음)
+SNAPSHOT_ARCHIVE_AFTER_DAYS = int(os.getenv("SNAPSHOT_ARCHIVE_AFTER_DAYS", "90"))
+
+# gzip 압축 수준 (1 빠름 ~ 9 작음)
+SNAPSHOT_ARCHIVE_LEVEL = int(os.getenv("SNAPSHOT_ARCHIVE_LEVEL", "6"))
+
+_SNAPSHOT_PATTERN = re.compile(r'Stock_?(\d{4}-\d{2}-\d{2})')
+_MONTH_DIR_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+# 인덱스 캐시 (경로 → (수정 시각, 인덱스))
+_index_cache = {}
+
+
+def load_index(directory) -> Dict[str, dict]:
+    """월 폴더의 압축 보관 인덱스 {파일명: {'offset', 'length', 'size', 'rows', 'sha256'}}"""
+    index_path = Path(directory) / INDEX_FILENAME
+    try:
+        mtime = index_path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    cached = _index_cache.get(index_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f).get("files", {})
+    _index_cache[index_path] = (mtime, index)
+    return index
+
+
+def archived_entry(path) -> Optional[dict]:
+    """CSV 경로에 해당하는 압축 보관 항목 (보관되지 않았으면 None)"""
+    path = Path(path)
+    return load_index(path.parent).get(path.name)
+
+
+def list_snapshots(directory) -> List[str]:
+    """폴더 안의 스냅샷 경로 목록 (원본 CSV + 압축 보관된 CSV의 원래 경로)"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    names = {p.name for p in directory.glob("Stock*.csv")}
+    names.update(load_index(directory))
+    return [str(directory / name) for name in sorted(names)]
+
+
+def list_all_snapshots(base_dir) -> List[str]:
+    """스냅샷 폴더 전체 (루트 + 월별 하위 폴더)의 스냅샷 경로 목록"""
+    base_dir = Path(base_dir)
+    files = list_snapshots(base_dir)
+    if base_dir.is_dir():
+        for sub_dir in sorted(p for p in base_dir.iterdir() if p.is_dir()):
+            files.extend(list_snapshots(sub_dir))
+    return files
+
+
+class _MemberReader(io.RawIOBase):
+    """묶음 파일에서 한 멤버 구간(offset ~ offset+length)만 읽는 파일 객체"""
+
+    def __init__(self, path, offset: int, length: int):
+        self._file = open(path, "rb")
+        self._file.seek(offset)
+        self._remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_snapshot(path):
+    """
+    스냅샷 CSV를 바이너리 스트림으로 열기 (원본이 없으면 압축 보관본을 스트리밍으로 풀어서)
+
+    Raises:
+        FileNotFoundError: 원본도 보관본도 없는 경우
+    """
+    path = Path(path)
+    if path.exists():
+        return open(path, "rb")
+    entry = archived_entry(path)
+    if entry is None:
+        raise FileNotFoundError(f"스냅샷 없음: {path}")
+    member = io.BufferedReader(_MemberReader(path.parent / ARCHIVE_FILENAME, entry["offset"], entry["length"]), 1024 * 1024)
+    return gzip.GzipFile(fileobj=member, mode="rb")
+
+
+def verify_archived(path):
+    """압축 보관본 검증 (인덱스 항목 존재 + 묶음 파일 길이, 내용은 읽을 때 gzip CRC로 확인)"""
+    entry = archived_entry(path)
+    if entry is None:
+        return False, "파일 없음"
+    archive_path = Path(path).parent / ARCHIVE_FILENAME
+    size = archive_path.stat().st_size if archive_path.exists() else 0
+    if size < entry["offset"] + entry["length"]:
+        return False, f"압축 보관 묶음이 잘림 ({archive_path.name})"
+    return True, "압축 보관본"
+
+
+def snapshot_sha256(path) -> str:
+    """스냅샷 원본 내용의 sha256 (압축 보관본은 인덱스 값 → 보관 전후 실행 키가 같음)"""
+    entry = None if Path(path).exists() else archived_entry(path)
+    if entry is not None:
+        return entry["sha256"]
+    digest = hashlib.sha256()
+    with open_snapshot(path) as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _snapshot_date(path: Path) -> Optional[date]:
+    match = _SNAPSHOT_PATTERN.search(path.name)
+    return date.fromisoformat(match.group(1)) if match else None
+
+
+def _save_index(directory: Path, index: Dict[str, dict]):
+    index_path = directory / INDEX_FILENAME
+    tmp_path = index_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format": "gzip-members", "files": index}, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, index_path)
+
+
+def _remove_original(path: Path):
+    path.unlink(missing_ok=True)
+    manifest_path(path).unlink(missing_ok=True)
+
+
+def archive_month(directory, before: date, level: int = SNAPSHOT_ARCHIVE_LEVEL) -> int:
+    """
+    월 폴더에서 before 이전 날짜 스냅샷을 묶음 파일에 압축 보관
+
+    - 멤버를 묶음 끝에 쓰고 fsync → 다시 풀어서 sha256 확인 → 인덱스 저장 → 원본 삭제
+    - 인덱스에 없는 꼬리(중단된 이전 실행)는 잘라내고 이어 씀
+    - 검증에 실패한 스냅샷은 보관하지 않고 그대로 둠
+
+    Returns:
+        새로 보관한 스냅샷 수
+    """
+    directory = Path(directory)
+    index = dict(load_index(directory))
+    targets = []
+    for path in sorted(directory.glob("Stock*.csv")):
+        snapshot_date = _snapshot_date(path)
+        if snapshot_date is None or snapshot_date >= before:
+            continue
+        if path.name in index:
+            # 인덱스 저장 후 원본 삭제 전에 중단된 경우
+            if index[path.name]["sha256"] == snapshot_sha256(path):
+                _remove_original(path)
+            continue
+        ok, reason = verify_snapshot(path)
+        if not ok:
+            logger.warning(f"압축 보관 제외: {path.name} ({reason})")
+            continue
+        targets.append(path)
+
+    if not targets:
+        return 0
+
+    archive_path = directory / ARCHIVE_FILENAME
+    committed_end = max((e["offset"] + e["length"] for e in index.values()), default=0)
+    with open(archive_path, "ab") as archive:
+        archive.truncate(committed_end)
+        archive.seek(committed_end)
+        for path in targets:
+            offset = archive.tell()
+            digest = hashlib.sha256()
+            size = 0
+            with open(path, "rb") as src, gzip.GzipFile(filename=path.name, fileobj=archive, mode="wb",
+                                                       compresslevel=level, mtime=0) as member:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    member.write(chunk)
+            manifest = read_manifest(path)
+            index[path.name] = {
+                "offset": offset,
+                "length": archive.tell() - offset,
+                "size": size,
+                "rows": manifest.get("rows") if manifest else None,
+                "sha256": digest.hexdigest(),
+                "archived_at": datetime.now().isoformat(timespec="seconds"),
+            }
+        archive.flush()
+        os.fsync(archive.fileno())
+
+    # 새로 쓴 멤버를 다시 풀어서 원본과 같은지 확인한 뒤 인덱스에 반영
+    verified = {}
+    _index_cache.pop(directory / INDEX_FILENAME, None)
+    for path in targets:
+        entry = index[path.name]
+        digest = hashlib.sha256()
+        with gzip.GzipFile(fileobj=io.BufferedReader(_MemberReader(archive_path, entry["offset"], entry["length"]))) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        if digest.hexdigest() == entry["sha256"]:
+            verified[path.name] = entry
+        else:
+            logger.error(f"압축 보관 검증 실패: {path.name} (원본 유지)")
+
+    committed = {name: entry for name, entry in index.items() if name not in {p.name for p in targets}}
+    committed.update(verified)
+    _save_index(directory, committed)
+    for path in targets:
+        if path.name in verified:
+            _remove_original(path)
+    return len(verified)
+
+
+def archive_snapshots(base_dir, older_than_days: int = SNAPSHOT_ARCHIVE_AFTER_DAYS, today: date = None) -> int:
+    """
+    스냅샷 폴더의 월별 폴더마다 older_than_days보다 오래된 스냅샷을 압축 보관
+
+    Returns:
+        새로 보관한 스냅샷 수
+    """
+    if older_than_days <= 0:
+        return 0
+    before = (today or date.today()) - timedelta(days=older_than_days)
+    base_dir = Path(base_dir)
+    if not base_dir.is_dir():
+        return 0
+
+    archived = 0
+    for directory in sorted(p for p in base_dir.iterdir() if p.is_dir() and _MONTH_DIR_PATTERN.match(p.name)):
+        # 보관 기준일 이후의 월 폴더는 볼 필요 없음
+        if directory.name > before.strftime("%Y-%m"):
+            continue
+        count = archive_month(directory, before)
+        if count:
+            logger.info(f"스냅샷 압축 보관: {directory.name} ({count}개)")
+        archived += count
+    return archived
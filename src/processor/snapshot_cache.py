@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+프로세스 내 스냅샷 캐시
+
+- DB Export 잡이 방금 저장한 스냅샷 DataFrame을 경로 기준으로 올려 두면,
+  같은 프로세스(스케줄러)의 리포트 잡이 CSV를 다시 파싱하지 않고 바로 사용
+- 디스크의 CSV가 기준: 저장 당시 파일 크기/수정 시각이 지금과 다르면 캐시를 버림
+- 전체 메모리 사용량 상한(SNAPSHOT_CACHE_MAX_MB)을 넘으면 오래 안 쓴 항목부터 제거 (LRU)
+"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.processor.data_processor import SNAPSHOT_DTYPES
+
+
+# 캐시 메모리 상한 (MB, 0이면 사용 안 함)
+SNAPSHOT_CACHE_MAX_MB = int(os.getenv("SNAPSHOT_CACHE_MAX_MB", "512"))
+
+
+class SnapshotCache:
+    """경로 → (파일 크기, 수정 시각, DataFrame) LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_bytes: int = SNAPSHOT_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).resolve())
+
+    def put(self, path, df: pd.DataFrame) -> bool:
+        """
+        저장을 마친 스냅샷 파일과 그 내용 DataFrame 등록
+
+        Returns:
+            캐시에 올렸으면 True (상한보다 큰 DataFrame은 올리지 않음)
+        """
+        if self.max_bytes <= 0:
+            return False
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            logger.info(f"스냅샷 캐시 생략: {Path(path).name} ({nbytes / 1024 / 1024:.0f}MB > 상한)")
+            return False
+        stat = os.stat(path)
+        key = self._key(path)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (stat.st_size, stat.st_mtime_ns, df, nbytes)
+            self._total_bytes += nbytes
+            while self._total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def get(self, path) -> Optional[pd.DataFrame]:
+        """
+        캐시된 스냅샷 (복사본). 없거나 파일이 바뀌었으면 None
+        """
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is None or (stat.st_size, stat.st_mtime_ns) != entry[:2]:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            df = entry[2]
+        # 호출 쪽에서 컬럼을 바꿔도 캐시 원본은 그대로 유지
+        return df.copy()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[3]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 프로세스 공용 캐시
+snapshot_cache = SnapshotCache()
+
+
+def publish_csv_snapshot(path, df: pd.DataFrame, encoding: str = "utf-8-sig") -> bool:
+    """
+    방금 저장한 CSV와 같은 내용의 DataFrame을 공용 캐시에 등록
+
+    캐시 사용 여부와 관계없이 리포트 결과가 같도록, 파일 앞부분을 read_csv로 읽어
+    컬럼별 dtype을 맞춥니다 (숫자 문자열/빈 문자열 처리 등). 맞출 수 없는 컬럼이 있으면 등록하지 않음.
+
+    Returns:
+        등록했으면 True
+    """
+    if snapshot_cache.max_bytes <= 0:
+        return False
+    sample = pd.read_csv(path, encoding=encoding, nrows=1000, dtype=SNAPSHOT_DTYPES)
+    if list(sample.columns) != [str(c) for c in df.columns]:
+        return False
+
+    frame = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for col, values in zip(sample.columns, (df[c] for c in df.columns)):
+        values = values.reset_index(drop=True)
+        want = sample[col].dtype
+        if want == object or pd.api.types.is_string_dtype(want):
+            text = values.astype(object)
+            text = text.where(text.notna() & (text.astype(str) != ""), np.nan)
+            text = text.where(text.isna(), text.astype(str))
+            frame[col] = text if want == object else text.astype(want)
+            continue
+        converted = pd.to_numeric(values, errors="coerce")
+        if (converted.isna() != values.isna()).any():
+            return False
+        if want.kind in "iu":
+            if converted.isna().any() or (converted % 1 != 0).any():
+                return False
+            frame[col] = converted.astype(want)
+        elif want.kind == "f":
+            frame[col] = converted.astype(want)
+        else:
+            return False
+    return snapshot_cache.put(path, frame)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+스냅샷 CSV 안전 저장 / 검증 (매니페스트)
+
+- 임시 파일에 쓰고 fsync 후 원래 이름으로 교체 (중간에 죽어도 잘린 Stock_*.csv가 남지 않음)
+- 옆에 매니페스트(Stock_*.csv.manifest.json)로 행 수, 파일 크기, sha256 기록
+- 로더는 파싱 전에 매니페스트로 파일을 검증하고, 맞지 않으면 이전 스냅샷을 사용
+- 매니페스트가 없는 이전 파일은 마지막 줄바꿈 여부로 잘린 파일만 걸러냄
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from loguru import logger
+
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+# 로드 전 sha256까지 검증할지 (false면 파일 크기만 비교)
+SNAPSHOT_VERIFY_HASH = os.getenv("SNAPSHOT_VERIFY_HASH", "true").lower() == "true"
+
+# 검증 결과 캐시 (경로, 크기, 수정 시각) → (정상 여부, 사유) - 목록 선택과 로드에서 두 번 해시하지 않도록
+_verified = {}
+
+
+def manifest_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + MANIFEST_SUFFIX)
+
+
+def _sha256(path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fsync_dir(directory: Path):
+    """이름 변경을 디스크에 반영 (디렉터리 fsync를 지원하지 않는 Windows는 생략)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_durable(path: Path, write):
+    """write(f)로 임시 파일에 쓰고 fsync 후 path로 교체"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8-sig" if path.suffix == ".csv" else "utf-8", newline="") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_snapshot_csv(df, path) -> dict:
+    """
+    DataFrame을 스냅샷 CSV로 안전하게 저장 (utf-8-sig) + 매니페스트 기록
+
+    Returns:
+        매니페스트 딕셔너리 {'file', 'rows', 'columns', 'size', 'sha256', 'written_at'}
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 이전 매니페스트를 먼저 지워서, 새 CSV로 교체된 뒤 옛 매니페스트와 짝지어지지 않게 함
+    manifest_path(path).unlink(missing_ok=True)
+    _write_durable(path, lambda f: df.to_csv(f, index=False))
+
+    manifest = {
+        "file": path.name,
+        "rows": int(len(df)),
+        "columns": [str(c) for c in df.columns],
+        "size": path.stat().st_size,
+        "sha256": _sha256(path),
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    _write_durable(manifest_path(path), lambda f: json.dump(manifest, f, ensure_ascii=False, indent=2))
+    _fsync_dir(path.parent)
+    return manifest
+
+
+def read_manifest(path) -> Optional[dict]:
+    """스냅샷의 매니페스트 (없거나 읽을 수 없으면 None)"""
+    try:
+        with open(manifest_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify_snapshot(path, check_hash: bool = SNAPSHOT_VERIFY_HASH) -> Tuple[bool, str]:
+    """
+    스냅샷 파일을 파싱하기 전에 검증
+
+    - 매니페스트 있음: 파일 크기 → (check_hash면) sha256 비교
+    - 매니페스트 없음 (이전 파일): 비어 있지 않고 줄바꿈으로 끝나는지만 확인
+    - 원본 없음: 월별 압축 보관본 확인
+
+    Returns:
+        (정상 여부, 사유)
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        # 원본이 없으면 월별 압축 보관본 확인
+        from src.processor.snapshot_archive import verify_archived
+        return verify_archived(path)
+
+    cache_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns, check_hash)
+    if cache_key in _verified:
+        return _verified[cache_key]
+
+    manifest = read_manifest(path)
+    if manifest is None:
+        result = _verify_legacy(path, stat.st_size)
+    elif manifest.get("size") != stat.st_size:
+        result = False, f"크기 불일치 (매니페스트 {manifest.get('size')} / 파일 {stat.st_size})"
+    elif check_hash and manifest.get("sha256") != _sha256(path):
+        result = False, "sha256 불일치"
+    else:
+        result = True, "매니페스트 일치"
+
+    if not result[0]:
+        logger.warning(f"스냅샷 검증 실패: {path.name} - {result[1]}")
+    _verified[cache_key] = result
+    return result
+
+
+def _verify_legacy(path: Path, size: int) -> Tuple[bool, str]:
+    if size == 0:
+        return False, "빈 파일"
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            return False, "마지막 줄이 잘림 (매니페스트 없음)"
+    return True, "매니페스트 없음 (이전 파일)"
+
+
+def expected_rows(path) -> Optional[int]:
+    """매니페스트(압축 보관본은 보관 인덱스)에 기록된 데이터 행 수 (기록이 없으면 None)"""
+    manifest = read_manifest(path)
+    if manifest is None and not Path(path).exists():
+        from src.processor.snapshot_archive import archived_entry
+        manifest = archived_entry(path)
+    return None if manifest is None else manifest.get("rows")
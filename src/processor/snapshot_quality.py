@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+스냅샷 품질 검증 / 격리
+
+- export 직후, 리포트/바이너리/이력 적재 전에 스냅샷 내용을 검사 (모두 컬럼 단위 벡터 연산)
+  - 상품코드 중복 (SNAPSHOT_DUPLICATE_POLICY=error면 오류, sum/first면 로드 시 정리되므로 경고)
+  - 이전 스냅샷 대비 행 수 변화 (절반만 export된 파일이 "수천 개 변동"으로 보이는 것 방지)
+  - 상품코드/수량 빈 값 비율, 수량 음수 비율
+  - 컬럼 변경 (이전 스냅샷에 있던 컬럼이 없어짐 = 오류, 새 컬럼 = 경고)
+- 오류가 있으면 월 폴더의 quarantine/ 로 옮기고 검사 결과(*.quality.json)를 남김
+  → 리포트/조회 API는 격리된 파일을 보지 않고 이전 정상 스냅샷을 계속 사용
+- 행 수/컬럼이 실제로 바뀐 경우(상품 대량 등록 등) 직전 정상 스냅샷과 계속 달라 모두 격리되므로,
+  직전 격리 스냅샷들이 이번 스냅샷과 같은 수준이면 새 기준으로 받아들임 (SNAPSHOT_QUALITY_ACCEPT_AFTER)
+- 격리/새 기준 수용은 슬랙으로 알림 (SEND_SLACK_NOTIFICATION)
+"""
+import json
+import os
+import re
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.processor.data_processor import (
+    QTY_COLUMNS, SNAPSHOT_DUPLICATE_POLICY, DataProcessor, drop_empty_rows, drop_summary_row, rename_columns,
+)
+from src.processor.snapshot_archive import list_snapshots
+from src.processor.snapshot_manifest import manifest_path, read_manifest, verify_snapshot
+
+
+SNAPSHOT_QUALITY_CHECK = os.getenv("SNAPSHOT_QUALITY_CHECK", "true").lower() == "true"
+# 이전 스냅샷 대비 행 수 변화 허용 비율 (%)
+SNAPSHOT_QUALITY_MAX_ROW_CHANGE = float(os.getenv("SNAPSHOT_QUALITY_MAX_ROW_CHANGE", "20"))
+# 상품코드/수량 컬럼별 빈 값(숫자로 읽을 수 없는 값 포함) 허용 비율 (%)
+SNAPSHOT_QUALITY_MAX_NULL_RATE = float(os.getenv("SNAPSHOT_QUALITY_MAX_NULL_RATE", "5"))
+# 수량 컬럼별 음수 허용 비율 (%)
+SNAPSHOT_QUALITY_MAX_NEGATIVE_RATE = float(os.getenv("SNAPSHOT_QUALITY_MAX_NEGATIVE_RATE", "1"))
+# 직전 정상 스냅샷 대비 행 수/컬럼 변화로만 격리된 스냅샷이 이번 것까지 연속 N개이고 서로 같은 수준이면 새 기준으로 수용
+# (0이면 수용하지 않고 계속 격리)
+SNAPSHOT_QUALITY_ACCEPT_AFTER = int(os.getenv("SNAPSHOT_QUALITY_ACCEPT_AFTER", "3"))
+
+QUARANTINE_DIRNAME = "quarantine"
+QUALITY_SUFFIX = ".quality.json"
+
+# 없으면 비교 자체가 안 되는 컬럼 (내부 처리용 이름)
+REQUIRED_COLUMNS = ("prod_cd", "cms_qty", "wms_qty")
+
+# 보고서에 남길 중복 상품코드 수
+_DUPLICATE_SAMPLE = 20
+
+_SNAPSHOT_PATTERN = re.compile(r'Stock_?(\d{4}-\d{2}-\d{2})(?:_(\d{4}))?')
+_MONTH_DIR_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+
+def _snapshot_key(path) -> tuple:
+    match = _SNAPSHOT_PATTERN.search(Path(path).name)
+    return (match.group(1), match.group(2) or "0000") if match else ("", Path(path).name)
+
+
+def previous_snapshot(path) -> Optional[Path]:
+    """같은 스냅샷 폴더에서 path 직전의 정상 스냅샷 (이번 달 + 지난달 폴더, 없으면 None)"""
+    path = Path(path)
+    current = _snapshot_key(path)
+    candidates = sorted(
+        (p for d in _month_dirs(path) for p in map(Path, list_snapshots(d)) if _snapshot_key(p) < current),
+        key=_snapshot_key, reverse=True,
+    )
+    for candidate in candidates:
+        if verify_snapshot(candidate)[0]:
+            return candidate
+    return None
+
+
+def _month_dirs(path: Path) -> list:
+    """path가 있는 폴더 + (월별 폴더면) 지난달 폴더"""
+    directories = [path.parent]
+    if _MONTH_DIR_PATTERN.match(path.parent.name):
+        month = datetime.strptime(path.parent.name, "%Y-%m")
+        last_month = (month - timedelta(days=1)).strftime("%Y-%m")
+        directories.append(path.parent.parent / last_month)
+    return directories
+
+
+def _previous_profile(previous_path: Path) -> Optional[dict]:
+    """직전 스냅샷의 행 수/컬럼 (매니페스트 우선, 없으면 파일을 읽음)"""
+    manifest = read_manifest(previous_path)
+    if manifest is not None and "rows" in manifest and "columns" in manifest:
+        return {"rows": int(manifest["rows"]), "columns": list(manifest["columns"])}
+    df = DataProcessor().load_csv(previous_path)
+    if df is None:
+        return None
+    df = drop_summary_row(drop_empty_rows(df))
+    return {"rows": len(df), "columns": [str(c) for c in df.columns]}
+
+
+def check_snapshot(df: pd.DataFrame, previous: Optional[dict] = None) -> dict:
+    """
+    스냅샷 DataFrame(CSV 그대로의 컬럼) 품질 검사
+
+    Args:
+        df: 검사할 스냅샷 (정규화 전)
+        previous: 직전 스냅샷 {'rows', 'columns'} (없으면 행 수/컬럼 비교 생략)
+
+    Returns:
+        {'ok', 'rows', 'errors', 'warnings', 'duplicate_rows', 'duplicate_keys',
+         'null_pct', 'negative_pct', 'row_change_pct', 'missing_columns', 'added_columns',
+         'level_shift' (오류가 직전 스냅샷 대비 행 수/컬럼 변화뿐이면 True)}
+    """
+    errors, warnings = [], []
+    shift_errors = 0  # 직전 스냅샷과 비교해서만 생긴 오류 수
+    raw_columns = [str(c) for c in df.columns]
+    df = rename_columns(drop_summary_row(drop_empty_rows(df)))
+    rows = len(df)
+    report = {"rows": rows}
+
+    # 컬럼 구성
+    missing_required = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing_required:
+        errors.append(f"필수 컬럼 없음: {missing_required}")
+    if previous is not None:
+        missing = [c for c in previous["columns"] if c not in raw_columns]
+        added = [c for c in raw_columns if c not in previous["columns"]]
+        report["missing_columns"], report["added_columns"] = missing, added
+        if missing:
+            errors.append(f"이전 스냅샷 대비 없어진 컬럼: {missing}")
+            shift_errors += 1
+        if added:
+            warnings.append(f"이전 스냅샷 대비 새 컬럼: {added}")
+
+    if rows == 0:
+        errors.append("데이터 행 없음")
+
+    # 이전 스냅샷 대비 행 수
+    if previous is not None and previous["rows"] > 0:
+        change = (rows - previous["rows"]) / previous["rows"] * 100
+        report["row_change_pct"] = round(change, 2)
+        if abs(change) > SNAPSHOT_QUALITY_MAX_ROW_CHANGE:
+            errors.append(f"행 수 변화 {change:+.1f}% ({previous['rows']} → {rows}, 허용 ±{SNAPSHOT_QUALITY_MAX_ROW_CHANGE:g}%)")
+            shift_errors += 1
+
+    # 상품코드 중복 / 빈 값
+    null_pct, negative_pct = {}, {}
+    if "prod_cd" in df.columns and rows:
+        keys = df["prod_cd"].astype("string").str.strip()
+        blank = (keys.isna() | (keys == "")).to_numpy()
+        null_pct["prod_cd"] = round(float(blank.mean() * 100), 3)
+        duplicated = keys.duplicated(keep=False).to_numpy() & ~blank
+        report["duplicate_rows"] = int(duplicated.sum())
+        if duplicated.any():
+            duplicate_keys = pd.unique(keys[duplicated])
+            report["duplicate_keys"] = [str(k) for k in duplicate_keys[:_DUPLICATE_SAMPLE]]
+            message = (f"상품코드 중복: {len(duplicate_keys)}개 상품 / {int(duplicated.sum())}행 "
+                       f"(예: {', '.join(report['duplicate_keys'][:5])})")
+            if SNAPSHOT_DUPLICATE_POLICY == "error":
+                errors.append(message)
+            else:
+                warnings.append(f"{message} → 로드 시 {SNAPSHOT_DUPLICATE_POLICY} 처리")
+
+    # 수량 빈 값 / 음수 비율
+    for col in QTY_COLUMNS:
+        if col not in df.columns or not rows:
+            continue
+        values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        null_pct[col] = round(float(np.isnan(values).mean() * 100), 3)
+        negative_pct[col] = round(float((values < 0).mean() * 100), 3)
+    report["null_pct"], report["negative_pct"] = null_pct, negative_pct
+
+    for col, pct in null_pct.items():
+        if pct > SNAPSHOT_QUALITY_MAX_NULL_RATE:
+            errors.append(f"{col} 빈 값 {pct:.1f}% (허용 {SNAPSHOT_QUALITY_MAX_NULL_RATE:g}%)")
+    for col, pct in negative_pct.items():
+        if pct > SNAPSHOT_QUALITY_MAX_NEGATIVE_RATE:
+            errors.append(f"{col} 음수 {pct:.1f}% (허용 {SNAPSHOT_QUALITY_MAX_NEGATIVE_RATE:g}%)")
+
+    report["errors"], report["warnings"] = errors, warnings
+    report["ok"] = not errors
+    report["level_shift"] = bool(errors) and shift_errors == len(errors)
+    return report
+
+
+def validate_snapshot_file(path, df: Optional[pd.DataFrame] = None, previous_path=None) -> Optional[dict]:
+    """
+    스냅샷 파일 품질 검사 (직전 정상 스냅샷과 비교)
+
+    Args:
+        path: 검사할 스냅샷 CSV
+        df: 이미 메모리에 있는 스냅샷 내용 (없으면 파일을 읽음)
+        previous_path: 비교할 스냅샷 (없으면 같은 폴더에서 직전 스냅샷을 찾음)
+
+    Returns:
+        check_snapshot 결과 + 'file', 'previous_file', 'checked_at' (파일을 읽을 수 없으면 None)
+    """
+    path = Path(path)
+    if df is None:
+        df = DataProcessor().load_csv(path)
+        if df is None:
+            return None
+    previous_path = Path(previous_path) if previous_path else previous_snapshot(path)
+    previous = _previous_profile(previous_path) if previous_path else None
+
+    report = check_snapshot(df, previous)
+    report["file"] = path.name
+    report["columns"] = [str(c) for c in df.columns]
+    report["previous_file"] = previous_path.name if previous_path else None
+    report["previous_rows"] = previous["rows"] if previous else None
+    report["checked_at"] = datetime.now().isoformat(timespec="seconds")
+    return report
+
+
+def quarantine_snapshot(path, report: dict) -> Path:
+    """
+    스냅샷을 같은 폴더의 quarantine/ 로 옮기고 검사 결과를 남김 (매니페스트/바이너리도 같이 이동)
+
+    다시 사용하려면 quarantine/의 파일들을 원래 폴더로 옮기면 됩니다.
+
+    Returns:
+        격리된 CSV 경로
+    """
+    path = Path(path)
+    target_dir = path.parent / QUARANTINE_DIRNAME
+    target_dir.mkdir(parents=True, exist_ok=True)
+    for source in (path, manifest_path(path), path.with_suffix(".bin")):
+        if source.exists():
+            shutil.move(str(source), str(target_dir / source.name))
+    with open(target_dir / f"{path.name}{QUALITY_SUFFIX}", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return target_dir / path.name
+
+
+def _recent_quarantined(path: Path, previous_file: Optional[str]) -> list:
+    """
+    직전 정상 스냅샷 이후 격리된 스냅샷들의 검사 결과 (최신순)
+
+    직전 정상 스냅샷과 path 사이의 파일은 모두 격리된 것이므로 연속된 격리 기록입니다.
+    """
+    current = _snapshot_key(path)
+    floor = _snapshot_key(previous_file) if previous_file else ("", "")
+    reports = []
+    for directory in _month_dirs(path):
+        for report_path in (directory / QUARANTINE_DIRNAME).glob(f"*{QUALITY_SUFFIX}"):
+            name = report_path.name[:-len(QUALITY_SUFFIX)]
+            if floor < _snapshot_key(name) < current:
+                with open(report_path, encoding="utf-8") as f:
+                    reports.append(json.load(f))
+    return sorted(reports, key=lambda r: _snapshot_key(r["file"]), reverse=True)
+
+
+def _same_level(current: dict, previous: dict) -> bool:
+    """두 스냅샷의 행 수/컬럼이 같은 수준인지 (행 수 변화 허용 비율 이내 + 같은 컬럼 구성)"""
+    if set(current["columns"]) != set(previous["columns"]) or previous["rows"] <= 0:
+        return False
+    change = (current["rows"] - previous["rows"]) / previous["rows"] * 100
+    return abs(change) <= SNAPSHOT_QUALITY_MAX_ROW_CHANGE
+
+
+def _level_shift_confirmed(path, report: dict) -> bool:
+    """
+    직전 정상 스냅샷 대비 행 수/컬럼 변화로만 실패한 스냅샷이 새 기준인지 확인
+
+    이번 스냅샷을 포함해 최근 SNAPSHOT_QUALITY_ACCEPT_AFTER개가 모두 같은 이유로 격리됐고,
+    격리된 스냅샷들이 이번 스냅샷과 같은 수준(행 수 허용 비율 이내, 같은 컬럼)이면 True
+    """
+    if SNAPSHOT_QUALITY_ACCEPT_AFTER <= 0 or not report.get("level_shift"):
+        return False
+    recent = _recent_quarantined(Path(path), report.get("previous_file"))[:SNAPSHOT_QUALITY_ACCEPT_AFTER - 1]
+    if len(recent) < SNAPSHOT_QUALITY_ACCEPT_AFTER - 1:
+        return False
+    current = {"rows": report["rows"], "columns": report["columns"]}
+    for previous in recent:
+        if not previous.get("level_shift") or "columns" not in previous:
+            return False
+        if not _same_level(current, previous):
+            return False
+    return True
+
+
+def _notify(report: dict, accepted: bool = False):
+    """격리/새 기준 수용 슬랙 알림 (전송 실패는 export에 영향 없음)"""
+    if os.getenv("SEND_SLACK_NOTIFICATION", "false").lower() != "true":
+        return
+    try:
+        from src.reporter.slack_notifier import send_snapshot_quality_alert
+        send_snapshot_quality_alert(report, accepted)
+    except Exception as e:
+        logger.warning(f"스냅샷 품질 알림 전송 실패: {e}")
+
+
+def run_quality_gate(path, df: Optional[pd.DataFrame] = None) -> bool:
+    """
+    export 직후 품질 검사, 오류가 있으면 격리
+
+    Returns:
+        스냅샷을 사용해도 되면 True (검사 비활성화/검사 자체 실패 시에도 True)
+    """
+    if not SNAPSHOT_QUALITY_CHECK:
+        return True
+    try:
+        report = validate_snapshot_file(path, df)
+    except Exception as e:
+        logger.warning(f"스냅샷 품질 검사 실패 (검사 없이 진행): {e}")
+        return True
+    if report is None:
+        return True
+
+    for warning in report["warnings"]:
+        logger.warning(f"스냅샷 품질 경고 [{report['file']}]: {warning}")
+    if report["ok"]:
+        logger.info(f"스냅샷 품질 검사 통과: {report['file']} ({report['rows']}행, 직전 {report['previous_file']})")
+        return True
+
+    if _level_shift_confirmed(path, report):
+        logger.warning(
+            f"스냅샷 새 기준 수용: {report['file']} ({report['rows']}행) - 최근 {SNAPSHOT_QUALITY_ACCEPT_AFTER}개 스냅샷이 "
+            f"같은 수준으로 직전 정상 스냅샷({report['previous_file']})과 다름: {'; '.join(report['errors'])}"
+        )
+        _notify(report, accepted=True)
+        return True
+
+    quarantined = quarantine_snapshot(path, report)
+    for error in report["errors"]:
+        logger.error(f"스냅샷 품질 오류 [{report['file']}]: {error}")
+    logger.error(f"스냅샷 격리: {quarantined} (리포트는 이전 정상 스냅샷 기준으로 유지)")
+    _notify(report)
+    return False
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+전송 대기열 (SQLite outbox)
+
+- Notion 페이지/슬랙 메시지를 전송 전에 먼저 저장 → 프로세스가 재시작돼도 누락 없음
+- 백그라운드 워커가 지수 백오프(+지터)로 재시도, 동시 전송 수 제한
+- 같은 ordering_key(예: 같은 날짜 Notion 페이지)의 작업은 등록 순서대로 하나씩 처리
+- 표준 라이브러리 sqlite3만 사용 (추가 패키지 불필요)
+
+작업 상태: pending → running → done
+                              ↘ pending (재시도 대기) → ... → dead (재시도 한도 초과)
+          pending → superseded (같은 순서 키로 더 새로운 작업이 등록됨)
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from config.path_helper import resolve_data_path
+
+# 재시도 설정 (1회차 실패 후 30초, 60초, 120초 ... 최대 1시간 간격)
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "10"))
+DELIVERY_RETRY_BASE_SECONDS = float(os.getenv("DELIVERY_RETRY_BASE_SECONDS", "30"))
+DELIVERY_RETRY_MAX_SECONDS = 3600.0
+
+# 동시 전송 작업 수 (외부 API 부하 제한)
+DELIVERY_MAX_CONCURRENCY = int(os.getenv("DELIVERY_MAX_CONCURRENCY", "4"))
+
+# 실행 중 작업 임대 시간 - 처리 중 프로세스가 죽으면 이 시간 뒤 다른 워커가 다시 가져감
+DELIVERY_LEASE_SECONDS = 600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel         TEXT NOT NULL,
+    ordering_key    TEXT NOT NULL,
+    dedup_key       TEXT UNIQUE,
+    payload         TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until     REAL,
+    last_error      TEXT,
+    result          TEXT,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_outbox_ready
+    ON outbox (status, next_attempt_at);
+
+CREATE INDEX IF NOT EXISTS ix_outbox_order
+    ON outbox (ordering_key, id);
+"""
+
+
+class RetryDelivery(Exception):
+    """
+    다시 시도해야 하는 전송 (핸들러에서 발생)
+
+    Args:
+        message: 실패 사유
+        delay: 다음 시도까지 대기 시간(초), None이면 지수 백오프
+        payload: 다음 시도에 사용할 페이로드 (예: 실패한 수신자만 남김)
+        count_attempt: False면 재시도 횟수에 포함하지 않음 (선행 작업 대기 등)
+    """
+
+    def __init__(self, message: str, delay: float = None, payload: Dict[str, Any] = None,
+                 count_attempt: bool = True):
+        super().__init__(message)
+        self.delay = delay
+        self.payload = payload
+        self.count_attempt = count_attempt
+
+
+class PermanentDeliveryError(Exception):
+    """다시 보내도 같은 결과인 전송 실패 (바로 dead 처리)"""
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+class DeliveryOutbox:
+    """
+    전송 대기열 저장소
+
+    여러 스레드/프로세스가 같은 파일을 써도 되도록 작업 가져오기(claim)는
+    쓰기 트랜잭션(BEGIN IMMEDIATE) 안에서 상태를 바꿉니다.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else resolve_data_path(
+            os.getenv("DELIVERY_OUTBOX_PATH", "data/delivery_outbox.sqlite3")
+        )
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ----------------------------------------
+    # 등록
+    # ----------------------------------------
+
+    def enqueue(
+        self,
+        channel: str,
+        payload: Dict[str, Any],
+        ordering_key: str,
+        dedup_key: str = None,
+        supersede: bool = True
+    ) -> int:
+        """
+        전송 작업 등록
+
+        Args:
+            channel: 핸들러 이름 (예: "notion", "slack")
+            payload: 전송 내용 (JSON 직렬화 가능해야 함)
+            ordering_key: 같은 키의 작업은 등록 순서대로 하나씩 처리
+            dedup_key: 같은 키의 작업이 이미 있으면 새로 만들지 않음 (dead/superseded면 다시 대기열로)
+            supersede: True면 같은 ordering_key로 아직 시작하지 않은 이전 작업을 취소
+
+        Returns:
+            작업 ID
+        """
+        now = time.time()
+        body = json.dumps(payload, ensure_ascii=False)
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = None
+                if dedup_key is not None:
+                    existing = conn.execute(
+                        "SELECT id, status FROM outbox WHERE dedup_key = ?", (dedup_key,)
+                    ).fetchone()
+
+                if existing is not None and existing["status"] in ("pending", "running", "done"):
+                    conn.execute("COMMIT")
+                    return existing["id"]
+
+                if supersede:
+                    conn.execute(
+                        "UPDATE outbox SET status = 'superseded', updated_at = ? "
+                        "WHERE ordering_key = ? AND status = 'pending'",
+                        (now, ordering_key),
+                    )
+
+                if existing is not None:
+                    # 재시도 한도를 넘겼거나 취소된 작업을 같은 내용으로 다시 실행
+                    conn.execute(
+                        "UPDATE outbox SET payload = ?, status = 'pending', attempts = 0, next_attempt_at = ?, "
+                        "lease_until = NULL, last_error = NULL, updated_at = ? WHERE id = ?",
+                        (body, now, now, existing["id"]),
+                    )
+                    job_id = existing["id"]
+                else:
+                    job_id = conn.execute(
+                        "INSERT INTO outbox (channel, ordering_key, dedup_key, payload, next_attempt_at, "
+                        "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (channel, ordering_key, dedup_key, body, now, now, now),
+                    ).lastrowid
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        logger.info(f"전송 대기열 등록: #{job_id} {channel} ({ordering_key})")
+        return job_id
+
+    # ----------------------------------------
+    # 처리
+    # ----------------------------------------
+
+    def claim(self, limit: int, lease_seconds: float = DELIVERY_LEASE_SECONDS) -> List[Dict[str, Any]]:
+        """
+        지금 실행할 수 있는 작업을 최대 limit개 가져와 running으로 표시
+
+        순서 키마다 가장 먼저 등록된 미완료 작업만 대상입니다
+        (앞 작업이 재시도 대기 중이면 뒤 작업도 기다림).
+        임대 시간이 지난 running 작업(처리 중 종료된 프로세스)도 다시 가져옵니다.
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM outbox o "
+                    "WHERE ((o.status = 'pending' AND o.next_attempt_at <= ?) "
+                    "       OR (o.status = 'running' AND o.lease_until < ?)) "
+                    "  AND NOT EXISTS (SELECT 1 FROM outbox p "
+                    "                  WHERE p.ordering_key = o.ordering_key AND p.id < o.id "
+                    "                    AND p.status IN ('pending', 'running')) "
+                    "ORDER BY o.id LIMIT ?",
+                    (now, now, limit),
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE outbox SET status = 'running', lease_until = ?, updated_at = ? WHERE id = ?",
+                    [(now + lease_seconds, now, row["id"]) for row in rows],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return [_row_to_job(row) for row in rows]
+
+    def complete(self, job_id: int, result: Dict[str, Any] = None):
+        """전송 성공"""
+        self._update(job_id, status="done", result=result, lease_until=None, last_error=None)
+
+    def set_result(self, job_id: int, result: Dict[str, Any]):
+        """실행 중 중간 결과 기록 (예: 페이지 생성 직후 URL)"""
+        self._update(job_id, result=result)
+
+    def retry(self, job_id: int, error: str, delay: float = None, payload: Dict[str, Any] = None,
+              count_attempt: bool = True):
+        """
+        전송 실패 → 재시도 예약 (한도 초과 시 dead)
+
+        Args:
+            delay: 대기 시간(초), None이면 시도 횟수에 따른 지수 백오프 + 지터
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        attempts = job["attempts"] + (1 if count_attempt else 0)
+        fields = {"attempts": attempts, "last_error": error, "lease_until": None}
+        if payload is not None:
+            fields["payload"] = payload
+
+        if attempts >= DELIVERY_MAX_ATTEMPTS:
+            logger.error(f"전송 포기: #{job_id} {job['channel']} ({attempts}회 실패): {error}")
+            self._update(job_id, status="dead", **fields)
+            return
+
+        if delay is None:
+            # 여러 작업이 같은 시각에 몰리지 않도록 지터 추가
+            delay = min(DELIVERY_RETRY_MAX_SECONDS, DELIVERY_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+            delay *= random.uniform(0.5, 1.5)
+        if count_attempt:
+            logger.warning(f"전송 실패, {delay:.0f}초 후 재시도: #{job_id} {job['channel']} "
+                           f"({attempts}/{DELIVERY_MAX_ATTEMPTS}): {error}")
+        self._update(job_id, status="pending", next_attempt_at=time.time() + delay, **fields)
+
+    def fail(self, job_id: int, error: str):
+        """재시도하지 않는 실패"""
+        logger.error(f"전송 실패 (재시도 안 함): #{job_id}: {error}")
+        self._update(job_id, status="dead", last_error=error, lease_until=None)
+
+    def _update(self, job_id: int, **fields):
+        fields["updated_at"] = time.time()
+        for key in ("payload", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key], ensure_ascii=False)
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with closing(self._connect()) as conn:
+            conn.execute(f"UPDATE outbox SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    # ----------------------------------------
+    # 조회
+    # ----------------------------------------
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM outbox WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def is_finished(self, job_ids: Iterable[int]) -> bool:
+        """작업들이 모두 더 이상 처리되지 않는 상태인지"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return True
+        placeholders = ",".join("?" * len(job_ids))
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT COUNT(*) FROM outbox WHERE id IN ({placeholders}) AND status IN ('pending', 'running')",
+                job_ids,
+            ).fetchone()
+        return row[0] == 0
+
+    def counts(self) -> Dict[str, int]:
+        """상태별 작업 수"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class DeliveryWorker:
+    """
+    전송 대기열 처리 워커 (백그라운드 스레드)
+
+    - handlers: {channel: handler(job, outbox) -> 결과 dict}
+      핸들러가 RetryDelivery/기타 예외를 내면 재시도, PermanentDeliveryError면 포기
+    - 동시에 최대 max_concurrency개 작업만 실행 (나머지는 대기열에 남음)
+    """
+
+    def __init__(
+        self,
+        outbox: DeliveryOutbox,
+        handlers: Dict[str, Callable[[Dict[str, Any], DeliveryOutbox], Optional[Dict[str, Any]]]],
+        max_concurrency: int = DELIVERY_MAX_CONCURRENCY,
+        poll_seconds: float = 1.0
+    ):
+        self.outbox = outbox
+        self.handlers = handlers
+        self.max_concurrency = max_concurrency
+        self.poll_seconds = poll_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="delivery")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "DeliveryWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="delivery-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """새 작업 가져오기를 멈추고 실행 중인 작업이 끝날 때까지 대기"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+
+    def wake(self):
+        """새 작업 등록 알림 (다음 폴링까지 기다리지 않고 바로 가져감)"""
+        self._wake.set()
+
+    def wait(self, job_ids: Iterable[int], timeout: float) -> bool:
+        """
+        작업들이 끝날 때까지 대기
+
+        Returns:
+            모두 끝났으면 True (시간 초과 시 False, 남은 작업은 워커가 계속 재시도)
+        """
+        job_ids = list(job_ids)
+        deadline = time.monotonic() + timeout
+        while not self.outbox.is_finished(job_ids):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(min(0.5, max(deadline - time.monotonic(), 0)))
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                free = self.max_concurrency - self._in_flight
+            try:
+                jobs = self.outbox.claim(free)
+            except sqlite3.Error as e:
+                logger.error(f"전송 대기열 조회 실패: {e}")
+                jobs = []
+
+            for job in jobs:
+                with self._lock:
+                    self._in_flight += 1
+                try:
+                    self._executor.submit(self._execute, job)
+                except RuntimeError:
+                    # 인터프리터 종료 중 → 가져온 작업을 바로 대기 상태로 돌려놓음
+                    self.outbox.retry(job["id"], "워커 종료", delay=0, count_attempt=False)
+                    with self._lock:
+                        self._in_flight -= 1
+
+            # 가져온 작업이 없거나 동시 실행 한도에 도달하면 완료/등록 알림 또는 폴링 주기까지 대기
+            if not jobs or len(jobs) == free:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _execute(self, job: Dict[str, Any]):
+        try:
+            handler = self.handlers.get(job["channel"])
+            if handler is None:
+                raise PermanentDeliveryError(f"처리기 없음: {job['channel']}")
+            result = handler(job, self.outbox)
+            self.outbox.complete(job["id"], result)
+        except RetryDelivery as e:
+            self.outbox.retry(job["id"], str(e), delay=e.delay, payload=e.payload, count_attempt=e.count_attempt)
+        except PermanentDeliveryError as e:
+            self.outbox.fail(job["id"], str(e))
+        except Exception as e:
+            self.outbox.retry(job["id"], f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._wake.set()
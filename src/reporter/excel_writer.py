@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+대용량 xlsx 스트리밍 저장 (메모리 일정)
+
+- 시트 XML을 청크 단위로 만들어 zip 항목에 바로 흘려 씀 → 행 수와 관계없이 워크북을 메모리에 올리지 않음
+- 셀 XML은 컬럼 단위로 한 번에 만들고(pandas 문자열 연산) 행으로 이어 붙임 (셀마다 객체를 만들지 않음)
+- 시트마다 컬럼 서식 지정: 퍼센트(값이 이미 % 단위), 정수, 링크(HYPERLINK 수식)
+- 한 시트 최대 행 수(1,048,576)를 넘으면 "시트명 (2)"처럼 이어지는 시트로 나눔
+- XML에 쓸 수 없는 제어 문자(탭/줄바꿈 제외)는 모든 텍스트(셀/링크/시트 이름)에서 제거
+"""
+import os
+import re
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+
+EXCEL_MAX_ROWS = 1_048_576
+
+# 한 번에 XML로 바꿔서 쓰는 행 수
+_CHUNK_ROWS = 10_000
+
+# styles.xml의 cellXfs 순서
+_STYLE_HEADER = 1
+_STYLE_PERCENT = 2
+_STYLE_INTEGER = 3
+_STYLE_LINK = 4
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# XML 1.0에서 허용하지 않는 제어 문자 (있으면 엑셀이 파일을 복구 대상으로 엶)
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# 시트 이름에 쓸 수 없는 문자
+_ILLEGAL_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+_STYLES_XML = f"""{_XML_DECL}<styleSheet xmlns="{_MAIN_NS}">
+<numFmts count="1"><numFmt numFmtId="164" formatCode="0.0&quot;%&quot;"/></numFmts>
+<fonts count="3">
+<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>
+<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>
+<font><u/><sz val="11"/><color rgb="FF0563C1"/><name val="Calibri"/><family val="2"/></font>
+</fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="5">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="3" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+
+def excel_sheet(name: str, df: pd.DataFrame, percent: Iterable[str] = (), integer: Iterable[str] = (),
+                links: Optional[Dict[str, str]] = None, widths: Optional[Dict[str, float]] = None) -> dict:
+    """
+    시트 정의
+
+    Args:
+        name: 시트 이름 (31자까지)
+        df: 시트 내용 (인덱스는 쓰지 않음)
+        percent: 퍼센트 서식 컬럼 (99.5 → 99.5%)
+        integer: 천 단위 구분 정수 서식 컬럼
+        links: {컬럼: URL 템플릿} - 템플릿의 {value}를 셀 값으로 바꿔 링크 생성
+        widths: {컬럼: 너비}
+    """
+    return {
+        "name": name,
+        "df": df,
+        "percent": set(percent),
+        "integer": set(integer),
+        "links": links or {},
+        "widths": widths or {},
+    }
+
+
+def _sheet_titles(name: str, rows: int) -> List[str]:
+    name = _ILLEGAL_SHEET_CHARS.sub("_", _ILLEGAL_XML_CHARS.sub("", name)) or "Sheet"
+    per_sheet = EXCEL_MAX_ROWS - 1
+    count = max(1, -(-rows // per_sheet))
+    titles = [name[:31]]
+    for i in range(2, count + 1):
+        suffix = f" ({i})"
+        titles.append(name[:31 - len(suffix)] + suffix)
+    return titles
+
+
+def _escape(text: str) -> str:
+    return escape(_ILLEGAL_XML_CHARS.sub("", text))
+
+
+def _escape_series(text: pd.Series) -> pd.Series:
+    return (text.str.replace(_ILLEGAL_XML_CHARS, "", regex=True)
+                .str.replace("&", "&amp;", regex=False)
+                .str.replace("<", "&lt;", regex=False)
+                .str.replace(">", "&gt;", regex=False))
+
+
+def _text_cell(text: str, style: str = "") -> str:
+    return f'<c{style} t="inlineStr"><is><t xml:space="preserve">{_escape(text)}</t></is></c>'
+
+
+def _object_cell(value, style: str) -> str:
+    """object 컬럼 값 하나 (숫자/문자 혼합 컬럼 대응)"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c{style}><v>{value!r}</v></c>" if np.isfinite(value) else "<c/>"
+    return _text_cell(str(value))
+
+
+def _column_cells(values: pd.Series, style_id: int, link_template: Optional[str]) -> pd.Series:
+    """컬럼 하나의 셀 XML (행마다 문자열 하나, 빈 값은 빈 셀)"""
+    style = f' s="{style_id}"' if style_id else ""
+    missing = values.isna().to_numpy()
+
+    if link_template is not None:
+        # =HYPERLINK("URL","값"), 캐시 값도 같이 넣어 재계산 없이 보이게 함
+        text = values.astype(str)
+        quoted = _escape_series(text.str.replace('"', '""', regex=False)).str.replace('"', "&quot;", regex=False)
+        head, _, tail = _escape(link_template.replace('"', '""')).replace('"', "&quot;").partition("{value}")
+        cells = (f'<c s="{_STYLE_LINK}" t="str"><f>HYPERLINK(&quot;{head}' + quoted + f'{tail}&quot;,&quot;'
+                 + quoted + "&quot;)</f><v>" + _escape_series(text) + "</v></c>")
+    elif pd.api.types.is_bool_dtype(values.dtype):
+        cells = '<c t="b"><v>' + values.astype("Int8").astype(str) + "</v></c>"
+    elif pd.api.types.is_integer_dtype(values.dtype):
+        cells = f"<c{style}><v>" + values.astype(str) + "</v></c>"
+    elif pd.api.types.is_numeric_dtype(values.dtype):
+        number = values.to_numpy(dtype=float, na_value=np.nan)
+        missing = missing | ~np.isfinite(number)
+        cells = f"<c{style}><v>" + pd.Series(number, index=values.index).astype(str) + "</v></c>"
+    elif values.dtype == object:
+        cells = values.map(lambda value: _object_cell(value, style), na_action="ignore")
+    else:
+        # 문자열/날짜/범주 등은 텍스트로
+        cells = ('<c t="inlineStr"><is><t xml:space="preserve">' + _escape_series(values.astype(str))
+                 + "</t></is></c>")
+
+    cells = cells.astype(object)
+    cells[missing] = "<c/>"
+    return cells
+
+
+def _sheet_head(sheet: dict, columns: List[str]) -> str:
+    cols = "".join(
+        f'<col min="{i}" max="{i}" width="{sheet["widths"].get(column, min(max(len(column) * 2 + 2, 10), 40))}" '
+        'customWidth="1"/>'
+        for i, column in enumerate(columns, 1)
+    )
+    header = "".join(_text_cell(column, f' s="{_STYLE_HEADER}"') for column in columns)
+    return (
+        f'{_XML_DECL}<worksheet xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+        '<sheetViews><sheetView workbookViewId="0">'
+        '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+        '</sheetView></sheetViews><sheetFormatPr defaultRowHeight="15"/>'
+        f'{f"<cols>{cols}</cols>" if cols else ""}<sheetData><row r="1">{header}</row>'
+    )
+
+
+def _write_sheet_xml(stream, sheet: dict, start: int, stop: int):
+    """df[start:stop] 행을 시트 XML로 스트림에 씀 (청크 단위)"""
+    df = sheet["df"]
+    columns = [str(c) for c in df.columns]
+    styles = [
+        _STYLE_PERCENT if column in sheet["percent"] else _STYLE_INTEGER if column in sheet["integer"] else 0
+        for column in columns
+    ]
+    stream.write(_sheet_head(sheet, columns).encode("utf-8"))
+
+    for chunk_start in range(start, stop, _CHUNK_ROWS):
+        chunk = df.iloc[chunk_start:min(chunk_start + _CHUNK_ROWS, stop)].reset_index(drop=True)
+        first_row = chunk_start - start + 2
+        rows = '<row r="' + pd.Series(np.arange(first_row, first_row + len(chunk)).astype(str), dtype=object) + '">'
+        for position, column in enumerate(columns):
+            rows = rows + _column_cells(chunk.iloc[:, position], styles[position], sheet["links"].get(column))
+        stream.write(("</row>".join(rows.tolist()) + "</row>").encode("utf-8"))
+    stream.write(b"</sheetData></worksheet>")
+
+
+def _package_parts(titles: List[str]) -> Dict[str, str]:
+    """시트 XML 외의 패키지 파일 (콘텐츠 형식, 관계, 워크북, 스타일)"""
+    count = len(titles)
+    worksheet_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{worksheet_type}"/>'
+        for i in range(1, count + 1)
+    )
+    sheets = "".join(
+        f'<sheet name="{escape(title, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, title in enumerate(titles, 1)
+    )
+    sheet_rels = "".join(
+        f'<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml" Type="{_REL_NS}/worksheet"/>'
+        for i in range(1, count + 1)
+    )
+    return {
+        "[Content_Types].xml": (
+            f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'
+        ),
+        "_rels/.rels": (
+            f'{_XML_DECL}<Relationships xmlns="{_PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Target="xl/workbook.xml" Type="{_REL_NS}/officeDocument"/></Relationships>'
+        ),
+        "xl/workbook.xml": (
+            f'{_XML_DECL}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+            f'<bookViews><workbookView/></bookViews><sheets>{sheets}</sheets></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            f'{_XML_DECL}<Relationships xmlns="{_PKG_REL_NS}">{sheet_rels}'
+            f'<Relationship Id="rId{count + 1}" Target="styles.xml" Type="{_REL_NS}/styles"/></Relationships>'
+        ),
+        "xl/styles.xml": _STYLES_XML,
+    }
+
+
+def write_xlsx(path, sheets: List[dict]) -> Path:
+    """
+    여러 시트를 스트리밍 방식으로 xlsx 저장 (임시 파일 → 이름 교체)
+
+    Args:
+        path: 저장 경로
+        sheets: excel_sheet()로 만든 시트 정의 리스트 (순서대로 생성)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # (시트 제목, 시트 정의, 시작 행, 끝 행) - 최대 행 수를 넘는 시트는 나눔
+    parts = []
+    per_sheet = EXCEL_MAX_ROWS - 1
+    for sheet in sheets:
+        for i, title in enumerate(_sheet_titles(sheet["name"], len(sheet["df"]))):
+            parts.append((title, sheet, i * per_sheet, min((i + 1) * per_sheet, len(sheet["df"]))))
+    if not parts:
+        parts.append(("Sheet1", excel_sheet("Sheet1", pd.DataFrame()), 0, 0))
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+            for name, content in _package_parts([title for title, *_ in parts]).items():
+                zf.writestr(name, content)
+            for i, (_, sheet, start, stop) in enumerate(parts, 1):
+                with zf.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as stream:
+                    _write_sheet_xml(stream, sheet, start, stop)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return path
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+마크다운 → Notion 블록 변환기 (notion_client / notion_client_database 공용)
+
+- 문서를 한 번만 훑으며(single pass) 줄 첫 글자로 블록 종류를 판별
+- 정규식은 모듈 로드 시 한 번만 컴파일
+- "0%", "+0" 처럼 반복되는 셀은 rich_text 파싱 결과를 캐시해서 재사용
+- table_mode="code"(데이터베이스 리포트)는 기존 데이터베이스 클라이언트와 같은 블록을 만듦
+  (테이블은 코드 블록, rich_text는 볼드만 처리하고 일반 텍스트에는 빈 annotations)
+- 블록을 제너레이터로 하나씩 내보내므로 변환과 전송을 이어 붙일 수 있음
+- stream_block_chunks: 별도 스레드에서 변환한 블록을 요청 단위 묶음으로 크기 제한 큐에 넣어
+  업로드와 변환을 동시에 진행 (메모리는 큐에 쌓인 몇 묶음으로 제한)
+- 요청 묶음은 중첩 블록(table_row 등)과 본문 크기까지 계산해 Notion 한도 안에서 최소 개수로 채움
+"""
+import json
+import queue
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 제목: "# ", "## ", "### "
+_HEADING_PATTERN = re.compile(r'^(#{1,3}) (.*)$')
+
+# rich_text: **[텍스트](URL)** 또는 [텍스트](URL) 또는 **텍스트**
+_RICH_TEXT_PATTERN = re.compile(r'(\*\*\[([^\]]+)\]\(([^)]+)\)\*\*|\[([^\]]+)\]\(([^)]+)\)|\*\*([^*]+)\*\*)')
+
+_HEADING_TYPES = {1: "heading_1", 2: "heading_2", 3: "heading_3"}
+
+# Notion table 블록 children 최대 100개 → 헤더 1행 + 데이터 99행씩 분할
+TABLE_ROW_CHUNK_SIZE = 99
+
+# Notion API 요청 한도
+MAX_CHILDREN_PER_REQUEST = 100     # children 배열 하나당 블록 수
+MAX_BLOCKS_PER_REQUEST = 1000      # 요청 하나의 전체 블록 수 (중첩 블록 포함)
+MAX_PAYLOAD_BYTES = 450_000        # 요청 본문 크기 (한도 500KB에서 페이지 속성/여유분 제외)
+
+# 변환 스레드가 업로드보다 앞서 쌓아둘 수 있는 최대 묶음 수
+MAX_PENDING_CHUNKS = 3
+
+# 큐 종료 표시
+_END = object()
+
+
+@lru_cache(maxsize=8192)
+def _parse_rich_text_cached(text: str) -> Tuple[Dict[str, Any], ...]:
+    rich_text = []
+
+    last_end = 0
+    for match in _RICH_TEXT_PATTERN.finditer(text):
+        # 매칭 전 일반 텍스트
+        if match.start() > last_end:
+            rich_text.append({
+                "type": "text",
+                "text": {"content": text[last_end:match.start()]}
+            })
+
+        # **[텍스트](URL)** 형태 (볼드 + 링크)
+        if match.group(2) and match.group(3):
+            rich_text.append({
+                "type": "text",
+                "text": {
+                    "content": match.group(2),
+                    "link": {"url": match.group(3)}
+                },
+                "annotations": {"bold": True}
+            })
+        # [텍스트](URL) 형태 (링크만)
+        elif match.group(4) and match.group(5):
+            rich_text.append({
+                "type": "text",
+                "text": {
+                    "content": match.group(4),
+                    "link": {"url": match.group(5)}
+                }
+            })
+        # **텍스트** 형태 (볼드만)
+        elif match.group(6):
+            rich_text.append({
+                "type": "text",
+                "text": {"content": match.group(6)},
+                "annotations": {"bold": True}
+            })
+
+        last_end = match.end()
+
+    # 마지막 남은 텍스트
+    if last_end < len(text):
+        rich_text.append({
+            "type": "text",
+            "text": {"content": text[last_end:]}
+        })
+
+    # 빈 경우 기본 텍스트 추가
+    if not rich_text:
+        rich_text = [{"type": "text", "text": {"content": text}}]
+
+    return tuple(rich_text)
+
+
+def parse_rich_text(text: str) -> List[Dict[str, Any]]:
+    """
+    텍스트를 Notion rich_text 형식으로 파싱 (볼드, 링크 처리)
+
+    같은 텍스트는 캐시된 결과를 재사용합니다 (반환 리스트 안의 dict는 수정하지 말 것).
+    """
+    return list(_parse_rich_text_cached(text))
+
+
+@lru_cache(maxsize=8192)
+def _parse_bold_text_cached(text: str) -> Tuple[Dict[str, Any], ...]:
+    rich_text = []
+    for idx, part in enumerate(text.split("**")):
+        if part:
+            is_bold = idx % 2 == 1  # 홀수 인덱스는 볼드
+            rich_text.append({
+                "type": "text",
+                "text": {"content": part},
+                "annotations": {"bold": is_bold} if is_bold else {}
+            })
+
+    # 빈 경우 기본 텍스트 추가
+    if not rich_text:
+        rich_text = [{"type": "text", "text": {"content": text}}]
+
+    return tuple(rich_text)
+
+
+def parse_bold_text(text: str) -> List[Dict[str, Any]]:
+    """
+    텍스트를 Notion rich_text 형식으로 파싱 (볼드만 처리, 데이터베이스 리포트 형식)
+
+    같은 텍스트는 캐시된 결과를 재사용합니다 (반환 리스트 안의 dict는 수정하지 말 것).
+    """
+    return list(_parse_bold_text_cached(text))
+
+
+def _split_cells(line: str) -> List[str]:
+    """테이블 행을 셀 목록으로 분리 (빈 셀 제외)"""
+    return [cell.strip() for cell in line.strip().split("|") if cell.strip()]
+
+
+def _table_row(cells: List[str]) -> Dict[str, Any]:
+    return {
+        "object": "block",
+        "type": "table_row",
+        "table_row": {
+            "cells": [parse_rich_text(cell) for cell in cells]
+        }
+    }
+
+
+def _table_block(table_width: int, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "object": "block",
+        "type": "table",
+        "table": {
+            "table_width": table_width,
+            "has_column_header": True,
+            "has_row_header": False,
+            "children": rows
+        }
+    }
+
+
+def _text_block(block_type: str, rich_text: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {"rich_text": rich_text}
+    }
+
+
+def iter_notion_blocks(markdown: str, table_mode: str = "table") -> Iterator[Dict[str, Any]]:
+    """
+    마크다운을 Notion 블록으로 변환하며 하나씩 내보냄 (제너레이터)
+
+    Args:
+        markdown: 마크다운 문자열
+        table_mode: "table" → Notion 테이블 (99행씩 분할), "code" → 코드 블록 (rich_text는 볼드만 처리)
+
+    Yields:
+        Notion 블록 dict (문서 순서대로)
+    """
+    lines = markdown.splitlines()
+    line_count = len(lines)
+    parse = parse_rich_text if table_mode == "table" else parse_bold_text
+
+    i = 0
+    while i < line_count:
+        line = lines[i]
+        i += 1
+
+        stripped = line.strip()
+        if not stripped:
+            continue  # 빈 줄은 Notion이 자동 처리
+
+        first = stripped[0]
+
+        # 제목
+        if line[0] == "#":
+            match = _HEADING_PATTERN.match(line)
+            if match:
+                yield _text_block(
+                    _HEADING_TYPES[len(match.group(1))],
+                    [{"type": "text", "text": {"content": match.group(2).strip()}}]
+                )
+                continue
+
+        # 구분선
+        elif stripped == "---":
+            yield {"object": "block", "type": "divider", "divider": {}}
+            continue
+
+        # 테이블 (다음 줄이 구분선인 경우)
+        elif first == "|" and i < line_count and "|---" in lines[i]:
+            i += 1  # 구분선 스킵
+
+            if table_mode == "code":
+                table_lines = [line, lines[i - 1]]
+                while i < line_count and lines[i].strip().startswith("|"):
+                    table_lines.append(lines[i])
+                    i += 1
+                yield {
+                    "object": "block",
+                    "type": "code",
+                    "code": {
+                        "rich_text": [{"type": "text", "text": {"content": "\n".join(table_lines)}}],
+                        "language": "plain text"
+                    }
+                }
+                continue
+
+            headers = _split_cells(line)
+            table_width = len(headers)
+            header_row = _table_row(headers)
+
+            # 데이터 행을 99개씩 모아 테이블 블록으로 내보냄
+            chunk_rows = []
+            emitted = False
+            while i < line_count and lines[i].strip().startswith("|"):
+                row_data = _split_cells(lines[i])
+                i += 1
+                if not row_data:
+                    continue
+                if len(row_data) < table_width:
+                    row_data += [""] * (table_width - len(row_data))
+                chunk_rows.append(_table_row(row_data[:table_width]))
+
+                if len(chunk_rows) == TABLE_ROW_CHUNK_SIZE:
+                    yield _table_block(table_width, [header_row] + chunk_rows)
+                    chunk_rows = []
+                    emitted = True
+
+            if chunk_rows or not emitted:
+                yield _table_block(table_width, [header_row] + chunk_rows)
+            continue
+
+        # 리스트
+        elif stripped.startswith("- "):
+            yield _text_block("bulleted_list_item", parse(stripped[2:]))
+            continue
+
+        # 번호 리스트
+        elif first.isdigit() and ". " in stripped:
+            yield _text_block("numbered_list_item", parse(stripped.split(". ", 1)[1]))
+            continue
+
+        # 일반 텍스트
+        yield _text_block("paragraph", parse(line))
+
+
+def markdown_to_notion_blocks(markdown: str, table_mode: str = "table") -> List[Dict[str, Any]]:
+    """마크다운을 Notion 블록 리스트로 변환"""
+    return list(iter_notion_blocks(markdown, table_mode))
+
+
+def measure_block(block: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    블록 하나가 요청에서 차지하는 크기
+
+    Returns:
+        (중첩 포함 블록 수, JSON 직렬화 바이트 수)
+    """
+    count = 1
+    stack = list(block.get(block.get("type"), {}).get("children", ()))
+    while stack:
+        child = stack.pop()
+        count += 1
+        stack.extend(child.get(child.get("type"), {}).get("children", ()))
+
+    # 요청 본문과 같은 방식(ASCII 이스케이프)으로 직렬화한 크기
+    return count, len(json.dumps(block, separators=(",", ":")))
+
+
+def _iter_sized_batches(blocks) -> Iterator[Tuple[List[Dict[str, Any]], int, int]]:
+    """(묶음, 중첩 포함 블록 수, 바이트 수) 단위로 채움 (iter_request_batches 참고)"""
+    batch: List[Dict[str, Any]] = []
+    batch_blocks = 0
+    batch_bytes = 0
+
+    for block in blocks:
+        count, size = measure_block(block)
+        if batch and (
+            len(batch) == MAX_CHILDREN_PER_REQUEST
+            or batch_blocks + count > MAX_BLOCKS_PER_REQUEST
+            or batch_bytes + size > MAX_PAYLOAD_BYTES
+        ):
+            yield batch, batch_blocks, batch_bytes
+            batch, batch_blocks, batch_bytes = [], 0, 0
+
+        batch.append(block)
+        batch_blocks += count
+        batch_bytes += size
+
+    if batch:
+        yield batch, batch_blocks, batch_bytes
+
+
+def iter_request_batches(blocks) -> Iterator[List[Dict[str, Any]]]:
+    """
+    블록을 문서 순서대로 Notion 요청 묶음으로 채움
+
+    묶음마다 최상위 100개, 중첩 포함 1000개, 본문 MAX_PAYLOAD_BYTES를 넘지 않는 한
+    최대한 많이 담습니다 (순서를 유지해야 하므로 앞에서부터 채우는 방식이 최소 요청 수).
+    한도를 혼자 넘는 블록은 단독 묶음으로 내보냅니다.
+    """
+    for batch, _, _ in _iter_sized_batches(blocks):
+        yield batch
+
+
+def plan_requests(markdown: str, table_mode: str = "table") -> Dict[str, int]:
+    """
+    리포트 업로드에 필요한 Notion 요청 수 미리 계산 (전송 없음)
+
+    Returns:
+        {"requests": 요청 수, "top_level_blocks": 최상위 블록 수,
+         "total_blocks": 중첩 포함 블록 수, "payload_bytes": 전체 본문 크기}
+    """
+    plan = _empty_plan()
+    for batch, batch_blocks, batch_bytes in _iter_sized_batches(iter_notion_blocks(markdown, table_mode)):
+        _add_to_plan(plan, batch, batch_blocks, batch_bytes)
+    return plan
+
+
+def _empty_plan() -> Dict[str, int]:
+    return {"requests": 0, "top_level_blocks": 0, "total_blocks": 0, "payload_bytes": 0}
+
+
+def _add_to_plan(plan: Dict[str, int], batch: List[Dict[str, Any]], batch_blocks: int, batch_bytes: int):
+    plan["requests"] += 1
+    plan["top_level_blocks"] += len(batch)
+    plan["total_blocks"] += batch_blocks
+    plan["payload_bytes"] += batch_bytes
+
+
+def stream_block_chunks(
+    markdown: str,
+    table_mode: str = "table",
+    max_pending: int = MAX_PENDING_CHUNKS,
+    plan: Optional[Dict[str, int]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    마크다운을 Notion 요청 단위 묶음(iter_request_batches)으로 변환하며 내보냄
+
+    변환은 별도 스레드에서 진행되고 묶음은 크기 제한 큐(max_pending)를 거쳐 전달됩니다.
+    첫 묶음을 받는 즉시 전송을 시작할 수 있고, 업로드가 느리면 변환 스레드가 대기하므로
+    메모리에는 최대 max_pending + 1개 묶음만 유지됩니다.
+    소비 측이 중간에 멈추면(예외, break) 변환 스레드도 함께 종료됩니다.
+
+    Args:
+        markdown: 마크다운 문자열
+        table_mode: iter_notion_blocks와 동일
+        max_pending: 큐에 대기할 수 있는 최대 묶음 수
+        plan: 지정하면 변환하면서 plan_requests와 같은 항목을 채움
+              (문서를 다시 변환하지 않고 요청 수/크기 확인, 스트림이 끝난 뒤 값이 완성됨)
+
+    Yields:
+        블록 리스트 (문서 순서대로)
+    """
+    if plan is not None:
+        plan.update(_empty_plan())
+    chunks: "queue.Queue" = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # 소비 측이 멈춘 경우 무한 대기하지 않도록 주기적으로 종료 여부 확인
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for chunk, chunk_blocks, chunk_bytes in _iter_sized_batches(iter_notion_blocks(markdown, table_mode)):
+                if plan is not None:
+                    _add_to_plan(plan, chunk, chunk_blocks, chunk_bytes)
+                if not put(chunk):
+                    return
+            put(_END)
+        except Exception as e:  # 변환 오류는 소비 측에서 다시 발생
+            put(e)
+
+    producer = threading.Thread(target=produce, name="notion-block-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
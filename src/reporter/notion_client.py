@@ -1,12 +1,35 @@
 # -*- coding: utf-8 -*-
+"""
+Notion API 클라이언트 (일반 페이지 / 데이터베이스 부모 통합)
+
+- create_page: 부모 페이지 하위에 새 페이지 생성
+- create_page_in_database: 데이터베이스에 새 행(페이지) 생성 (Name, Date 속성)
+- upsert_page_in_database: Date 속성으로 기존 행을 찾아 있으면 갱신, 없으면 생성
+- update_page: 이전에 올린 블록 해시 목록과 비교해 바뀐 블록만 삭제/삽입
+  (기록이 없거나 어긋나면 전체 교체)
+
+페이지/블록 기록은 NOTION_CACHE_PATH (기본: data/notion_page_cache.json)에 저장합니다.
+"""
+import difflib
+import hashlib
+import json
 import os
 import sys
 import logging
 import requests
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 
+from config.path_helper import resolve_data_path
+from src.reporter.markdown_to_notion import (
+    iter_request_batches,
+    markdown_to_notion_blocks,
+    parse_bold_text,
+    parse_rich_text,
+    stream_block_chunks,
+)
+
 # Windows 터미널 cp949 환경에서 UTF-8 출력 가능하도록 강제 설정
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -28,12 +51,82 @@ if not logger.handlers:
     logger.setLevel(logging.INFO)
 
 
+def block_hash(block: Dict[str, Any]) -> str:
+    """블록 내용 해시 (중첩 블록 포함, 키 순서 무관)"""
+    payload = json.dumps(block, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class _FullReplaceRequired(Exception):
+    """부분 갱신이 불가능해 전체 교체가 필요한 경우"""
+
+
+class NotionPageCache:
+    """
+    업로드 기록 캐시 (JSON 파일)
+
+    {
+        "databases": {"<database_id>": {"2026-03-13": "<page_id>"}},
+        "pages": {"<page_id>": {"hashes": [...], "block_ids": [...] 또는 null}}
+    }
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else resolve_data_path(
+            os.getenv("NOTION_CACHE_PATH", "data/notion_page_cache.json")
+        )
+        self.data: Dict[str, Any] = {"databases": {}, "pages": {}}
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.data.update(json.load(f))
+            except (OSError, ValueError):
+                # 손상된 캐시는 무시 (다음 갱신 때 전체 교체)
+                pass
+
+    def database_page(self, database_id: str, date_str: str) -> Optional[str]:
+        return self.data["databases"].get(database_id, {}).get(date_str)
+
+    def set_database_page(self, database_id: str, date_str: str, page_id: Optional[str]):
+        pages = self.data["databases"].setdefault(database_id, {})
+        if page_id:
+            pages[date_str] = page_id
+        else:
+            pages.pop(date_str, None)
+        self.save()
+
+    def page(self, page_id: str) -> Dict[str, Any]:
+        return self.data["pages"].get(page_id, {})
+
+    def set_page(self, page_id: str, hashes: Optional[List[str]], block_ids: Optional[List[str]] = None):
+        if hashes is None:
+            self.data["pages"].pop(page_id, None)
+        else:
+            self.data["pages"][page_id] = {"hashes": hashes, "block_ids": block_ids}
+        self.save()
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Notion 캐시 저장 실패: {e}")
+
+
 class NotionClient:
     """
     Notion API 클라이언트
+
+    Args:
+        table_mode: "table" → Notion 테이블, "code" → 마크다운 테이블을 코드 블록으로
+        cache_path: 업로드 기록 캐시 파일 (None이면 NOTION_CACHE_PATH)
     """
 
-    def __init__(self):
+    def __init__(self, table_mode: str = "table", cache_path=None):
         self.api_token = os.getenv("NOTION_API_TOKEN", "")
         self.base_url = "https://api.notion.com/v1"
         self.headers = {
@@ -41,15 +134,40 @@ class NotionClient:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        self.table_mode = table_mode
+        self.cache = NotionPageCache(cache_path)
 
         if not self.api_token:
             logger.warning("NOTION_API_TOKEN 환경변수가 설정되지 않았습니다.")
 
+    # ----------------------------------------
+    # 페이지 속성
+    # ----------------------------------------
+
+    @staticmethod
+    def _page_properties(title: str) -> Dict[str, Any]:
+        """일반 페이지 속성 ('title' 속성 사용)"""
+        return {"title": {"title": [{"text": {"content": title}}]}}
+
+    @staticmethod
+    def _database_properties(title: str, date_str: str = None) -> Dict[str, Any]:
+        """데이터베이스 행 속성 (Name, Date)"""
+        properties = {"Name": {"title": [{"text": {"content": title}}]}}
+        # 날짜 속성 추가 (데이터베이스에 Date 속성이 있는 경우)
+        if date_str:
+            properties["Date"] = {"date": {"start": date_str}}
+        return properties
+
+    # ----------------------------------------
+    # 생성
+    # ----------------------------------------
+
     def create_page(
         self,
         parent_page_id: str,
         title: str,
-        markdown_content: str
+        markdown_content: str,
+        on_page_created: Callable[[Dict[str, Any]], None] = None
     ) -> Dict[str, Any]:
         """
         부모 페이지 하위에 새 페이지 생성
@@ -58,10 +176,60 @@ class NotionClient:
             parent_page_id: 부모 페이지 ID
             title: 페이지 제목
             markdown_content: 마크다운 컨텐츠
+            on_page_created: 페이지가 만들어진 직후(나머지 블록 추가 전) 호출 ({"page_id", "url"})
 
         Returns:
             생성된 페이지 정보
         """
+        return self._create(
+            {"page_id": parent_page_id},
+            self._page_properties(title),
+            title,
+            markdown_content,
+            on_page_created
+        )
+
+    def create_page_in_database(
+        self,
+        database_id: str,
+        title: str,
+        markdown_content: str,
+        date_str: str = None,
+        on_page_created: Callable[[Dict[str, Any]], None] = None
+    ) -> Dict[str, Any]:
+        """
+        데이터베이스에 새 페이지 생성
+
+        Args:
+            database_id: Notion 데이터베이스 ID
+            title: 페이지 제목
+            markdown_content: 마크다운 컨텐츠
+            date_str: 날짜 문자열 (선택, YYYY-MM-DD 형식)
+            on_page_created: 페이지가 만들어진 직후(나머지 블록 추가 전) 호출 ({"page_id", "url"})
+
+        Returns:
+            생성된 페이지 정보
+        """
+        result = self._create(
+            {"database_id": database_id},
+            self._database_properties(title, date_str),
+            title,
+            markdown_content,
+            on_page_created
+        )
+        # 블록 추가 중 실패해도 행은 만들어졌으므로 기록 (재시도 시 이 행을 전체 교체)
+        if result.get("page_id") and date_str:
+            self.cache.set_database_page(database_id, date_str, result["page_id"])
+        return result
+
+    def _create(
+        self,
+        parent: Dict[str, str],
+        properties: Dict[str, Any],
+        title: str,
+        markdown_content: str,
+        on_page_created: Callable[[Dict[str, Any]], None] = None
+    ) -> Dict[str, Any]:
         if not self.api_token:
             return {
                 "success": False,
@@ -70,38 +238,24 @@ class NotionClient:
 
         url = f"{self.base_url}/pages"
 
-        # 마크다운을 Notion 블록으로 변환
-        all_blocks = self._markdown_to_notion_blocks(markdown_content)
-
-        # Notion API는 한 번에 최대 100개 블록만 허용
-        # 초기 생성 시 처음 100개만 포함하고, 나머지는 나중에 추가
-        initial_blocks = all_blocks[:100] if len(all_blocks) > 100 else all_blocks
-
-        # 페이지 속성 구성 (일반 페이지는 'title' 속성 사용)
-        properties = {
-            "title": {
-                "title": [
-                    {
-                        "text": {
-                            "content": title
-                        }
-                    }
-                ]
-            }
-        }
+        # 마크다운을 요청 단위 묶음으로 변환하며 스트리밍 (중첩 블록/본문 크기까지 Notion 한도 내로 채움)
+        # 첫 묶음은 페이지 생성 요청에 포함하고, 나머지는 변환과 동시에 추가
+        # 요청 수/크기는 변환하면서 같이 집계해 업로드가 끝나거나 실패한 뒤 로그로 남김 (별도 변환 없음)
+        # 업로드 전에 미리 보려면 python main.py notion-plan <리포트.md>
+        plan = {}
+        completed = False
+        chunks = self._stream_block_chunks(markdown_content, plan)
+        initial_blocks = next(chunks, [])
 
-        # 부모 페이지 설정
         payload = {
-            "parent": {
-                "page_id": parent_page_id
-            },
+            "parent": parent,
             "properties": properties,
             "children": initial_blocks
         }
 
         try:
             logger.info(f"Notion 페이지 생성 중: {title}")
-            logger.info(f"전체 블록 수: {len(all_blocks)}, 초기 전송: {len(initial_blocks)}")
+            logger.info(f"초기 전송 블록 수: {len(initial_blocks)}")
 
             response = requests.post(
                 url,
@@ -120,17 +274,31 @@ class NotionClient:
             result = response.json()
             page_id = result.get("id")
             logger.info(f"Notion 페이지 생성 완료: {result.get('url', 'N/A')}")
+            self._notify_page_ready(on_page_created, page_id, result.get("url"))
+
+            # 다음 갱신 때 비교할 블록 해시 기록 (블록 ID는 갱신 시점에 조회)
+            hashes = [block_hash(block) for block in initial_blocks]
+
+            # 나머지 블록은 변환되는 대로 요청 단위 묶음으로 추가
+            appended = 0
+            for chunk in chunks:
+                if not self._append_blocks_to_page(page_id, chunk):
+                    # 이후 묶음을 계속 붙이면 중간이 빠진 페이지가 되므로 중단하고 실패로 반환
+                    # (업로드 기록을 지워 다음 갱신/재시도는 이 페이지를 전체 교체)
+                    self.cache.set_page(page_id, None)
+                    logger.error(f"블록 추가 중단: {appended}개 추가 후 실패 ({page_id})")
+                    return {
+                        "success": False,
+                        "page_id": page_id,
+                        "url": result.get("url"),
+                        "error": f"블록 추가 실패 ({len(initial_blocks) + appended}개 전송 후)"
+                    }
+                hashes.extend(block_hash(block) for block in chunk)
+                appended += len(chunk)
+                logger.info(f"블록 추가 완료: {appended}개")
 
-            # 나머지 블록이 있으면 추가
-            if len(all_blocks) > 100:
-                logger.info(f"나머지 블록 추가 중: {len(all_blocks) - 100}개")
-                remaining_blocks = all_blocks[100:]
-
-                # 100개씩 나눠서 추가
-                for i in range(0, len(remaining_blocks), 100):
-                    chunk = remaining_blocks[i:i+100]
-                    self._append_blocks_to_page(page_id, chunk)
-                    logger.info(f"블록 추가 완료: {i+len(chunk)}/{len(remaining_blocks)}")
+            self.cache.set_page(page_id, hashes)
+            completed = True
 
             return {
                 "success": True,
@@ -152,10 +320,302 @@ class NotionClient:
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            # 중간에 실패하면 변환 스레드도 정리
+            chunks.close()
+            self._log_upload_plan(plan, completed)
+
+    # ----------------------------------------
+    # 갱신 / 업서트
+    # ----------------------------------------
+
+    def find_database_page(self, database_id: str, date_str: str, use_cache: bool = True) -> Optional[str]:
+        """
+        Date 속성이 date_str인 데이터베이스 행 페이지 ID (없으면 None)
+
+        캐시에 있으면 API 조회를 생략합니다.
+        """
+        if use_cache:
+            page_id = self.cache.database_page(database_id, date_str)
+            if page_id:
+                return page_id
+
+        response = requests.post(
+            f"{self.base_url}/databases/{database_id}/query",
+            headers=self.headers,
+            json={"filter": {"property": "Date", "date": {"equals": date_str}}, "page_size": 1},
+            timeout=30
+        )
+        if not response.ok:
+            logger.error(f"Notion API 응답 상태: {response.status_code}")
+            logger.error(f"응답 내용: {response.text}")
+        response.raise_for_status()
+
+        results = response.json().get("results", [])
+        page_id = results[0]["id"] if results else None
+        self.cache.set_database_page(database_id, date_str, page_id)
+        return page_id
+
+    def upsert_page_in_database(
+        self,
+        database_id: str,
+        title: str,
+        markdown_content: str,
+        date_str: str,
+        on_page_created: Callable[[Dict[str, Any]], None] = None
+    ) -> Dict[str, Any]:
+        """
+        같은 날짜(Date) 행이 있으면 바뀐 블록만 갱신, 없으면 새로 생성
+
+        Returns:
+            페이지 정보 (갱신한 경우 "updated": True)
+        """
+        if not self.api_token:
+            return {
+                "success": False,
+                "error": "NOTION_API_TOKEN이 설정되지 않았습니다."
+            }
+
+        properties = self._database_properties(title, date_str)
+
+        # 캐시된 페이지가 삭제/보관된 경우 API로 한 번 더 조회
+        for use_cache in (True, False):
+            try:
+                page_id = self.find_database_page(database_id, date_str, use_cache=use_cache)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Notion 데이터베이스 조회 실패: {e}")
+                return {"success": False, "error": str(e)}
+
+            if page_id is None:
+                break
+
+            result = self.update_page(page_id, title, markdown_content, properties=properties,
+                                      on_page_created=on_page_created)
+            if result.get("success"):
+                result["updated"] = True
+                return result
+
+            logger.warning(f"기존 페이지 갱신 실패 ({page_id}): {result.get('error')}")
+            self.cache.set_database_page(database_id, date_str, None)
+            if not use_cache:
+                return result
+
+        return self.create_page_in_database(database_id, title, markdown_content, date_str, on_page_created)
+
+    def update_page(
+        self,
+        page_id: str,
+        title: str,
+        markdown_content: str,
+        properties: Dict[str, Any] = None,
+        on_page_created: Callable[[Dict[str, Any]], None] = None
+    ) -> Dict[str, Any]:
+        """
+        기존 페이지를 새 내용으로 교체 (같은 날짜 재실행 시 페이지 중복 생성 방지)
+
+        이전 업로드 기록이 있으면 바뀐 블록만 삭제/삽입하고, 없으면 전체 교체합니다.
+
+        Args:
+            page_id: 교체할 페이지 ID
+            title: 페이지 제목
+            markdown_content: 마크다운 컨텐츠
+            properties: 갱신할 속성 (None이면 일반 페이지 제목 속성)
+            on_page_created: 속성 갱신 직후(블록 갱신 전) 호출 ({"page_id", "url"})
+
+        Returns:
+            페이지 정보
+        """
+        if not self.api_token:
+            return {
+                "success": False,
+                "error": "NOTION_API_TOKEN이 설정되지 않았습니다."
+            }
+
+        blocks = self._markdown_to_notion_blocks(markdown_content)
+        hashes = [block_hash(block) for block in blocks]
+
+        try:
+            logger.info(f"Notion 페이지 갱신 중: {title} ({page_id})")
+
+            # 1. 속성(제목) 갱신
+            response = requests.patch(
+                f"{self.base_url}/pages/{page_id}",
+                headers=self.headers,
+                json={"properties": properties or self._page_properties(title)},
+                timeout=30
+            )
+            if not response.ok:
+                logger.error(f"Notion API 응답 상태: {response.status_code}")
+                logger.error(f"응답 내용: {response.text}")
+            response.raise_for_status()
+            result = response.json()
+            if result.get("archived"):
+                return {"success": False, "error": "보관(삭제)된 페이지"}
+            self._notify_page_ready(on_page_created, page_id, result.get("url"))
+
+            # 2. 블록 갱신 (바뀐 블록만, 불가능하면 전체 교체)
+            try:
+                block_ids, stats = self._patch_changed_blocks(page_id, blocks, hashes)
+            except _FullReplaceRequired as e:
+                logger.info(f"전체 교체로 갱신: {e}")
+                block_ids, stats = self._replace_all_blocks(page_id, blocks)
+
+            self.cache.set_page(page_id, hashes, block_ids)
+            logger.info(
+                f"블록 갱신 완료: 유지 {stats['kept']}개, 삭제 {stats['deleted']}개, 추가 {stats['inserted']}개"
+            )
+
+            return {
+                "success": True,
+                "page_id": page_id,
+                "url": result.get("url"),
+                "data": result
+            }
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Notion 페이지 갱신 실패: {e}")
+            # 페이지 상태를 알 수 없으므로 다음 갱신은 전체 교체
+            self.cache.set_page(page_id, None)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def _patch_changed_blocks(self, page_id: str, blocks: List[Dict[str, Any]], hashes: List[str]):
+        """
+        이전 블록 해시 목록과 비교해 바뀐 구간만 삭제/삽입
+
+        Returns:
+            (새 최상위 블록 ID 목록, 통계)
+        """
+        entry = self.cache.page(page_id)
+        old_hashes = entry.get("hashes")
+        if not old_hashes:
+            raise _FullReplaceRequired("이전 업로드 기록 없음")
+
+        old_ids = entry.get("block_ids") or self._list_child_block_ids(page_id)
+        if len(old_ids) != len(old_hashes):
+            raise _FullReplaceRequired("페이지 블록 수가 기록과 다름 (직접 수정됨)")
+
+        opcodes = difflib.SequenceMatcher(None, old_hashes, hashes, autojunk=False).get_opcodes()
+        stats = {"kept": 0, "deleted": 0, "inserted": 0}
+        new_ids: List[str] = []
+
+        for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+            if tag == "equal":
+                new_ids.extend(old_ids[i1:i2])
+                stats["kept"] += i2 - i1
+                continue
+
+            # Notion API는 '맨 앞에 삽입'을 지원하지 않음 → 앞쪽에 유지할 블록이 없으면 전체 교체
+            if tag in ("insert", "replace") and not new_ids and any(op[0] == "equal" for op in opcodes[index + 1:]):
+                raise _FullReplaceRequired("페이지 맨 앞 블록 변경")
+
+            if tag in ("delete", "replace"):
+                for block_id in old_ids[i1:i2]:
+                    self._delete_block(block_id)
+                stats["deleted"] += i2 - i1
+
+            if tag in ("insert", "replace"):
+                created = self._append_blocks(page_id, blocks[j1:j2], after=new_ids[-1] if new_ids else None)
+                if created is None:
+                    raise _FullReplaceRequired("추가한 블록 ID를 확인할 수 없음")
+                new_ids.extend(created)
+                stats["inserted"] += j2 - j1
+
+        return new_ids, stats
+
+    def _replace_all_blocks(self, page_id: str, blocks: List[Dict[str, Any]]):
+        """기존 최상위 블록을 모두 지우고 새 블록 추가"""
+        existing_ids = self._list_child_block_ids(page_id)
+        for block_id in existing_ids:
+            self._delete_block(block_id)
+        logger.info(f"기존 블록 삭제 완료: {len(existing_ids)}개")
+
+        new_ids = self._append_blocks(page_id, blocks)
+        return new_ids, {"kept": 0, "deleted": len(existing_ids), "inserted": len(blocks)}
+
+    @staticmethod
+    def _notify_page_ready(callback, page_id: str, url: str):
+        """페이지 URL 확보 알림 (콜백 오류가 업로드를 멈추지 않도록)"""
+        if callback is None:
+            return
+        try:
+            callback({"page_id": page_id, "url": url})
+        except Exception as e:
+            logger.warning(f"페이지 생성 콜백 실패: {e}")
+
+    # ----------------------------------------
+    # 블록 API
+    # ----------------------------------------
+
+    def _list_child_block_ids(self, page_id: str) -> List[str]:
+        """
+        페이지의 최상위 자식 블록 ID 목록 (페이지네이션 처리)
+        """
+        block_ids = []
+        params = {"page_size": 100}
+        while True:
+            response = requests.get(
+                f"{self.base_url}/blocks/{page_id}/children",
+                headers=self.headers,
+                params=params,
+                timeout=30
+            )
+            response.raise_for_status()
+            data = response.json()
+            block_ids.extend(block["id"] for block in data.get("results", []))
+            if not data.get("has_more"):
+                return block_ids
+            params["start_cursor"] = data.get("next_cursor")
+
+    def _delete_block(self, block_id: str):
+        requests.delete(
+            f"{self.base_url}/blocks/{block_id}",
+            headers=self.headers,
+            timeout=30
+        ).raise_for_status()
+
+    def _append_blocks(self, page_id: str, blocks: List[Dict[str, Any]], after: str = None) -> Optional[List[str]]:
+        """
+        블록을 요청 단위 묶음으로 나눠 추가하고 새로 생성된 최상위 블록 ID 반환
+
+        Args:
+            after: 이 블록 바로 뒤에 삽입 (None이면 페이지 끝에 추가)
+
+        Returns:
+            생성된 블록 ID 목록 (페이지 끝에 추가했는데 응답으로 확인할 수 없으면 None)
+        """
+        new_ids: Optional[List[str]] = []
+        for batch in iter_request_batches(blocks):
+            payload = {"children": batch}
+            if after:
+                payload["after"] = after
+            response = requests.patch(
+                f"{self.base_url}/blocks/{page_id}/children",
+                headers=self.headers,
+                json=payload,
+                timeout=30
+            )
+            if not response.ok:
+                logger.error(f"블록 추가 실패: {response.status_code} {response.text}")
+            response.raise_for_status()
+
+            created = [block["id"] for block in response.json().get("results", [])]
+            if new_ids is not None and len(created) == len(batch):
+                new_ids.extend(created)
+                if after:
+                    after = created[-1]
+            elif after:
+                # 중간 삽입은 다음 묶음 위치를 알아야 하므로 계속할 수 없음
+                raise _FullReplaceRequired("추가한 블록 ID를 확인할 수 없음")
+            else:
+                new_ids = None  # 다음 갱신 때 블록 목록을 다시 조회
+        return new_ids
 
     def _append_blocks_to_page(self, page_id: str, blocks: List[Dict[str, Any]]) -> bool:
         """
-        페이지에 블록 추가 (100개 제한)
+        페이지 끝에 블록 추가 (요청 1회 분량)
         """
         url = f"{self.base_url}/blocks/{page_id}/children"
 
@@ -172,237 +632,101 @@ class NotionClient:
             logger.error(f"블록 추가 실패: {e}")
             return False
 
+    # ----------------------------------------
+    # 변환
+    # ----------------------------------------
+
     def _markdown_to_notion_blocks(self, markdown: str) -> List[Dict[str, Any]]:
         """
-        마크다운을 Notion 블록으로 변환
+        마크다운을 Notion 블록으로 변환 (공용 변환기 사용)
         """
-        blocks = []
-        lines = markdown.splitlines()
-
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-
-            # 제목
-            if line.startswith("# "):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": [{"type": "text", "text": {"content": line[2:].strip()}}]
-                    }
-                })
-            elif line.startswith("## "):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"type": "text", "text": {"content": line[3:].strip()}}]
-                    }
-                })
-            elif line.startswith("### "):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_3",
-                    "heading_3": {
-                        "rich_text": [{"type": "text", "text": {"content": line[4:].strip()}}]
-                    }
-                })
-
-            # 구분선
-            elif line.strip() == "---":
-                blocks.append({
-                    "object": "block",
-                    "type": "divider",
-                    "divider": {}
-                })
-
-            # 테이블 (Notion 테이블로 변환)
-            elif line.strip().startswith("|") and i + 1 < len(lines) and "|---" in lines[i + 1]:
-                # 테이블 헤더와 데이터 파싱
-                header_line = line.strip()
-                i += 1  # 구분선 스킵
-                i += 1  # 데이터 행으로 이동
-
-                # 헤더 파싱
-                headers = [h.strip() for h in header_line.split("|") if h.strip()]
-
-                # 데이터 행 수집
-                table_rows = []
-                while i < len(lines) and lines[i].strip().startswith("|"):
-                    row_data = [cell.strip() for cell in lines[i].strip().split("|") if cell.strip()]
-                    if row_data:
-                        table_rows.append(row_data)
-                    i += 1
-                i -= 1  # 마지막 라인 조정
-
-                # Notion 테이블 생성 (table 블록)
-                # 테이블 children 최대 100개 제한 → 헤더 포함 99행씩 분할
-                table_width = len(headers)
-
-                header_row = {
-                    "object": "block",
-                    "type": "table_row",
-                    "table_row": {
-                        "cells": [self._parse_rich_text(h) for h in headers]
-                    }
-                }
-
-                # 데이터 행 변환
-                all_data_rows = []
-                for row_data in table_rows:
-                    while len(row_data) < table_width:
-                        row_data.append("")
-                    row_data = row_data[:table_width]
-                    all_data_rows.append({
-                        "object": "block",
-                        "type": "table_row",
-                        "table_row": {
-                            "cells": [self._parse_rich_text(cell) for cell in row_data]
-                        }
-                    })
-
-                # 99행씩 분할 (헤더 1개 + 데이터 99개 = 100개 이하)
-                chunk_size = 99
-                for chunk_start in range(0, max(len(all_data_rows), 1), chunk_size):
-                    chunk_rows = all_data_rows[chunk_start:chunk_start + chunk_size]
-                    table_block = {
-                        "object": "block",
-                        "type": "table",
-                        "table": {
-                            "table_width": table_width,
-                            "has_column_header": True,
-                            "has_row_header": False,
-                            "children": [header_row] + chunk_rows
-                        }
-                    }
-                    blocks.append(table_block)
-
-            # 리스트
-            elif line.strip().startswith("- "):
-                blocks.append({
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {
-                        "rich_text": self._parse_rich_text(line.strip()[2:])
-                    }
-                })
-
-            # 번호 리스트
-            elif line.strip() and line.strip()[0].isdigit() and ". " in line:
-                content = line.strip().split(". ", 1)[1] if ". " in line else line.strip()
-                blocks.append({
-                    "object": "block",
-                    "type": "numbered_list_item",
-                    "numbered_list_item": {
-                        "rich_text": self._parse_rich_text(content)
-                    }
-                })
+        return markdown_to_notion_blocks(markdown, self.table_mode)
 
-            # 빈 줄
-            elif line.strip() == "":
-                pass  # Notion은 빈 블록을 자동으로 처리
+    def _stream_block_chunks(self, markdown: str, plan: Optional[Dict[str, int]] = None):
+        """
+        마크다운을 요청 단위 묶음으로 변환하며 내보냄 (변환 스레드 → 크기 제한 큐)
 
-            # 일반 텍스트
-            else:
-                if line.strip():
-                    blocks.append({
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {
-                            "rich_text": self._parse_rich_text(line)
-                        }
-                    })
+        plan을 넘기면 변환하면서 요청 수/블록 수/본문 크기를 채웁니다 (plan_requests와 같은 항목).
+        """
+        return stream_block_chunks(markdown, self.table_mode, plan=plan)
 
-            i += 1
+    def _log_upload_plan(self, plan: Dict[str, int], completed: bool = True) -> Dict[str, int]:
+        """
+        업로드 요청 수/크기를 로그로 남김 (스트리밍 중 집계한 값)
 
-        return blocks
+        실패로 끝났으면 중단 시점까지 변환된 분량이므로 경고로 남깁니다.
+        """
+        message = (
+            f"{plan['requests']}회 "
+            f"(최상위 블록 {plan['top_level_blocks']}개, 전체 블록 {plan['total_blocks']}개, "
+            f"{plan['payload_bytes'] / 1024:.0f}KB)"
+        )
+        if completed:
+            logger.info(f"업로드 요청: {message}")
+        else:
+            logger.warning(f"업로드 실패 - 중단 시점까지 변환된 요청: {message}")
+        return plan
 
     def _parse_rich_text(self, text: str) -> List[Dict[str, Any]]:
         """
-        텍스트를 Notion rich_text 형식으로 파싱 (볼드, 링크 처리)
+        텍스트를 Notion rich_text 형식으로 파싱 (table 모드는 볼드/링크, code 모드는 볼드만)
         """
-        import re
-
-        rich_text = []
-
-        # 1단계: 링크와 볼드를 함께 처리
-        # 패턴: **[텍스트](URL)** 또는 [텍스트](URL) 또는 **텍스트**
-        pattern = r'(\*\*\[([^\]]+)\]\(([^)]+)\)\*\*|\[([^\]]+)\]\(([^)]+)\)|\*\*([^*]+)\*\*)'
-
-        last_end = 0
-        for match in re.finditer(pattern, text):
-            # 매칭 전 일반 텍스트
-            if match.start() > last_end:
-                plain_text = text[last_end:match.start()]
-                if plain_text:
-                    rich_text.append({
-                        "type": "text",
-                        "text": {"content": plain_text}
-                    })
-
-            # **[텍스트](URL)** 형태 (볼드 + 링크)
-            if match.group(2) and match.group(3):
-                rich_text.append({
-                    "type": "text",
-                    "text": {
-                        "content": match.group(2),
-                        "link": {"url": match.group(3)}
-                    },
-                    "annotations": {"bold": True}
-                })
-            # [텍스트](URL) 형태 (링크만)
-            elif match.group(4) and match.group(5):
-                rich_text.append({
-                    "type": "text",
-                    "text": {
-                        "content": match.group(4),
-                        "link": {"url": match.group(5)}
-                    }
-                })
-            # **텍스트** 형태 (볼드만)
-            elif match.group(6):
-                rich_text.append({
-                    "type": "text",
-                    "text": {"content": match.group(6)},
-                    "annotations": {"bold": True}
-                })
-
-            last_end = match.end()
-
-        # 마지막 남은 텍스트
-        if last_end < len(text):
-            remaining_text = text[last_end:]
-            if remaining_text:
-                rich_text.append({
-                    "type": "text",
-                    "text": {"content": remaining_text}
-                })
-
-        # 빈 경우 기본 텍스트 추가
-        if not rich_text:
-            rich_text = [{"type": "text", "text": {"content": text}}]
-
-        return rich_text
+        return parse_rich_text(text) if self.table_mode == "table" else parse_bold_text(text)
 
 
 def send_report_to_notion(
     markdown_content: str,
     title: str,
-    parent_page_id: str = None
+    parent_page_id: str = None,
+    page_id: str = None,
+    database_id: str = None,
+    date_str: str = None,
+    table_mode: str = "table",
+    on_page_created: Callable[[Dict[str, Any]], None] = None
 ) -> Dict[str, Any]:
     """
     재고 리포트를 Notion 페이지로 전송
 
+    - database_id 지정 시: 데이터베이스에서 같은 Date 행을 찾아 갱신, 없으면 생성
+    - 그 외: page_id가 있으면 해당 페이지 갱신, 없거나 실패하면 부모 페이지 하위에 생성
+
     Args:
         markdown_content: 마크다운 리포트 전체 내용
         title: 페이지 제목
         parent_page_id: 부모 페이지 ID (None이면 환경변수에서 가져옴)
+        page_id: 기존 페이지 ID (지정 시 새로 만들지 않고 내용 교체)
+        database_id: 데이터베이스 ID (지정 시 데이터베이스 행으로 업서트)
+        date_str: 날짜 문자열 (YYYY-MM-DD, 데이터베이스 Date 속성)
+        table_mode: "table" 또는 "code" (마크다운 테이블을 코드 블록으로)
+        on_page_created: 페이지 URL이 확보된 직후(블록 업로드 완료 전) 호출되는 콜백
 
     Returns:
         생성 결과
     """
-    client = NotionClient()
+    client = NotionClient(table_mode=table_mode)
+
+    if database_id:
+        if date_str:
+            result = client.upsert_page_in_database(database_id, title, markdown_content, date_str, on_page_created)
+        else:
+            result = client.create_page_in_database(database_id, title, markdown_content,
+                                                    on_page_created=on_page_created)
+
+        if result.get("success"):
+            action = "갱신" if result.get("updated") else "생성"
+            logger.info(f"Notion 페이지 {action} 완료: {result.get('url')}")
+        else:
+            logger.error(f"Notion 페이지 전송 실패: {result.get('error')}")
+        return result
+
+    if page_id:
+        result = client.update_page(page_id=page_id, title=title, markdown_content=markdown_content,
+                                    on_page_created=on_page_created)
+        if result.get("success"):
+            logger.info(f"Notion 페이지 갱신 완료: {result.get('url')}")
+            return result
+        # 페이지가 삭제되었거나 접근 불가하면 새로 생성
+        logger.warning(f"Notion 페이지 갱신 실패, 새 페이지로 생성합니다: {result.get('error')}")
 
     if parent_page_id is None:
         parent_page_id = os.getenv("NOTION_PAGE_ID", "")
@@ -414,7 +738,8 @@ def send_report_to_notion(
     result = client.create_page(
         parent_page_id=parent_page_id,
         title=title,
-        markdown_content=markdown_content
+        markdown_content=markdown_content,
+        on_page_created=on_page_created
     )
 
     if result.get("success"):
@@ -3,6 +3,7 @@ from pathlib import Path
 import pandas as pd
 from loguru import logger
 from config.settings import REPORTS_DIR
+from src.reporter.excel_writer import excel_sheet, write_xlsx
 
 
 class ReportGenerator:
@@ -25,13 +26,15 @@ class ReportGenerator:
         return output_path
 
     def save_excel_report(self, data: dict, prefix: str = "report") -> Path:
-        """분석 결과를 Excel 레포트로 저장합니다 (시트별 구성)."""
+        """분석 결과를 Excel 레포트로 저장합니다 (시트별 구성, 스트리밍 저장)."""
         filename = f"{prefix}_{self._get_timestamp()}.xlsx"
         output_path = REPORTS_DIR / filename
-        with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-            for sheet_name, df in data.items():
-                if isinstance(df, pd.DataFrame):
-                    df.to_excel(writer, sheet_name=str(sheet_name)[:31], index=True)
+        sheets = [
+            excel_sheet(str(sheet_name), df.reset_index())
+            for sheet_name, df in data.items()
+            if isinstance(df, pd.DataFrame)
+        ]
+        write_xlsx(output_path, sheets)
         logger.info(f"Excel 레포트 저장: {output_path}")
         return output_path
 
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+리포트 실행 기록 (콘텐츠 주소 기반 멱등 처리)
+
+- 실행 키 = 입력 스냅샷 파일 내용 해시 + 리포트 로직 버전
+- 같은 키로 이미 렌더링/전송된 리포트는 다시 만들거나 보내지 않음
+- 기록 파일: {output_dir}/report_{date}.run.json
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from src.processor.snapshot_archive import snapshot_sha256
+
+
+def compute_run_key(input_files: Iterable, version: str) -> str:
+    """
+    입력 스냅샷들과 리포트 로직 버전으로 실행 키 생성
+
+    Args:
+        input_files: 입력 스냅샷 파일 경로 (어제, 오늘 순서)
+        version: 리포트 로직 버전 문자열
+
+    Returns:
+        sha256 hex 문자열
+    """
+    digest = hashlib.sha256(f"report-logic:{version}".encode("utf-8"))
+    for path in input_files:
+        # 압축 보관된 스냅샷은 보관 인덱스의 원본 해시 사용 (보관 전후 실행 키 동일)
+        digest.update(snapshot_sha256(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+class ReportRun:
+    """
+    날짜별 리포트 실행 기록
+
+    {
+        "run_key": "...",
+        "inputs": [...],
+        "md_path": "...",
+        "changed_count": 12,
+        "rendered_at": "...",
+        "deliveries": {
+            "notion": {"run_key": "...", "page_id": "...", "url": "..."},
+            "slack":  {"run_key": "...", "receivers": [...], "complete": true}
+        }
+    }
+    """
+
+    def __init__(self, output_dir, report_date: str):
+        self.path = Path(output_dir) / f"report_{report_date}.run.json"
+        self.data: Dict[str, Any] = {}
+        # Notion/슬랙 전송이 서로 다른 스레드에서 기록하므로 저장을 직렬화
+        self._lock = threading.RLock()
+        if self.path.exists():
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                # 손상된 기록은 무시하고 새로 실행
+                self.data = {}
+
+    @property
+    def run_key(self) -> Optional[str]:
+        return self.data.get("run_key")
+
+    def is_rendered(self, run_key: str) -> bool:
+        """같은 실행 키로 렌더링된 리포트 파일이 남아 있는지"""
+        md_path = self.data.get("md_path")
+        return self.run_key == run_key and bool(md_path) and os.path.exists(md_path)
+
+    def record_render(self, run_key: str, inputs: Iterable, md_path: str, changed_count: int):
+        """렌더링 결과 기록 (이전 전송 정보는 페이지 재사용을 위해 유지)"""
+        self.data.update({
+            "run_key": run_key,
+            "inputs": [str(p) for p in inputs],
+            "md_path": str(md_path),
+            "changed_count": int(changed_count),
+            "rendered_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        self.data.setdefault("deliveries", {})
+        self.save()
+
+    def delivery(self, channel: str) -> Dict[str, Any]:
+        return self.data.get("deliveries", {}).get(channel, {})
+
+    def is_delivered(self, channel: str) -> bool:
+        """현재 실행 키로 해당 채널 전송이 끝났는지 (일부 수신자만 성공한 경우 제외)"""
+        delivery = self.delivery(channel)
+        return self.run_key is not None and delivery.get("run_key") == self.run_key and delivery.get("complete", True)
+
+    def delivered_receivers(self, channel: str):
+        """현재 실행 키로 이미 전송에 성공한 수신자 목록"""
+        delivery = self.delivery(channel)
+        if self.run_key is None or delivery.get("run_key") != self.run_key:
+            return []
+        return delivery.get("receivers", [])
+
+    def record_delivery(self, channel: str, **info):
+        with self._lock:
+            self.data.setdefault("deliveries", {})[channel] = {"run_key": self.run_key, **info}
+            self.save()
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (중간에 죽어도 기록 파일이 깨지지 않음)"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
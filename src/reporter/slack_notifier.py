@@ -1,9 +1,12 @@
 import os
 import sys
 import json
+import random
+import time
 import logging
 import requests
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Iterable, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -27,6 +30,13 @@ if not logger.handlers:
     logger.addHandler(handler)
     logger.setLevel(logging.INFO)
 
+# 전송 재시도 (지수 백오프 + 지터)
+SLACK_MAX_RETRIES = int(os.getenv("SLACK_MAX_RETRIES", "3"))
+SLACK_RETRY_BASE_SECONDS = 1.0
+
+# 일괄 전송 실패 시 수신자별 개별 전송 동시 요청 수
+SLACK_MAX_CONCURRENCY = int(os.getenv("SLACK_MAX_CONCURRENCY", "8"))
+
 
 class SlackNotificationService:
     """
@@ -65,35 +75,185 @@ class SlackNotificationService:
 
         url = f"{self.base_url}/api/slack/channel"
 
-        try:
-            logger.info(f"슬랙 메시지 전송: {url}")
+        # SSL 검증 비활성화 (개발 환경 self-signed certificate 대응)
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+        for attempt in range(SLACK_MAX_RETRIES + 1):
+            try:
+                logger.info(f"슬랙 메시지 전송: {url} ({len(payload_items)}건)")
+
+                response = requests.post(
+                    url,
+                    json=payload_items,
+                    headers={"Content-Type": "application/json; charset=utf-8"},
+                    timeout=30,
+                    verify=False  # SSL 인증서 검증 비활성화
+                )
+
+                response.raise_for_status()
+
+                logger.info(f"슬랙 DM 전송 완료: {response.text}")
+                return {
+                    "onResult": 1,
+                    "ovErrDesc": f"Slack DM 전송 완료: {response.text}"
+                }
+
+            except requests.exceptions.RequestException as e:
+                # 4xx(429 제외)는 다시 보내도 같은 결과이므로 재시도하지 않음
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == SLACK_MAX_RETRIES:
+                    logger.error(f"슬랙 DM API 호출 실패: {e}")
+                    return {
+                        "onResult": -1,
+                        "ovErrDesc": f"Slack DM API 호출 실패: {str(e)}"
+                    }
 
-            # SSL 검증 비활성화 (개발 환경 self-signed certificate 대응)
-            import urllib3
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+                # 여러 프로세스가 동시에 재시도하지 않도록 대기 시간에 지터 추가
+                delay = SLACK_RETRY_BASE_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"슬랙 DM API 호출 실패, {delay:.1f}초 후 재시도 ({attempt + 1}/{SLACK_MAX_RETRIES}): {e}")
+                time.sleep(delay)
 
-            response = requests.post(
-                url,
-                json=payload_items,
-                headers={"Content-Type": "application/json; charset=utf-8"},
-                timeout=30,
-                verify=False  # SSL 인증서 검증 비활성화
-            )
+    def send_batch(self, payload_items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        여러 수신자 메시지를 한 번의 요청으로 전송하고 수신자별 결과 반환
 
-            response.raise_for_status()
+        일괄 요청이 재시도 후에도 실패하면 수신자별로 나눠 동시에(최대 SLACK_MAX_CONCURRENCY)
+        다시 보내서, 일부 수신자 문제로 전체가 누락되지 않도록 합니다.
 
-            logger.info(f"슬랙 DM 전송 완료: {response.text}")
-            return {
-                "onResult": 1,
-                "ovErrDesc": f"Slack DM 전송 완료: {response.text}"
-            }
+        Returns:
+            {dmReceiver: {"onResult": 1 또는 -1, "ovErrDesc": "..."}}
+        """
+        if not payload_items:
+            return {}
+
+        result = self.send_dm_message(payload_items)
+        if result["onResult"] == 1 or len(payload_items) == 1:
+            return {item["dmReceiver"]: result for item in payload_items}
+
+        logger.warning(f"슬랙 일괄 전송 실패 → 수신자별 개별 전송 ({len(payload_items)}명)")
+        with ThreadPoolExecutor(max_workers=min(SLACK_MAX_CONCURRENCY, len(payload_items))) as executor:
+            results = executor.map(lambda item: self.send_dm_message([item]), payload_items)
+            return {item["dmReceiver"]: item_result for item, item_result in zip(payload_items, results)}
+
+
+def parse_receivers(value: Optional[str]) -> List[str]:
+    """쉼표로 구분된 수신자 목록 파싱 (중복/공백 제거, 순서 유지)"""
+    receivers = [r.strip() for r in (value or "").split(",")]
+    return list(dict.fromkeys(r for r in receivers if r))
+
+
+def parse_brand_routes(value: Optional[str]) -> Dict[str, List[str]]:
+    """
+    브랜드별 수신자 설정 파싱 → {수신자: [브랜드, ...]}
+
+    형식: "브랜드A=lead1@x.com,lead2@x.com;브랜드B=lead3@x.com"
+    """
+    routes: Dict[str, List[str]] = {}
+    for entry in (value or "").split(";"):
+        if "=" not in entry:
+            continue
+        brand, receivers = entry.split("=", 1)
+        brand = brand.strip()
+        for receiver in parse_receivers(receivers):
+            routes.setdefault(receiver, [])
+            if brand and brand not in routes[receiver]:
+                routes[receiver].append(brand)
+    return routes
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"슬랙 DM API 호출 실패: {e}")
-            return {
-                "onResult": -1,
-                "ovErrDesc": f"Slack DM API 호출 실패: {str(e)}"
-            }
+
+def format_brand_digest(brands: Iterable[str], brand_summary: Dict[str, Dict[str, Any]], today_str: str) -> str:
+    """
+    담당 브랜드만 추린 슬랙 요약
+
+    Args:
+        brands: 담당 브랜드 목록
+        brand_summary: {브랜드: 집계 행 dict (sku_count, changed_count, increase_count,
+                        decrease_count, cms_diff, physical_diff, avg_accuracy)}
+        today_str: 기준일
+    """
+    lines = [f"*📊 담당 브랜드 재고 일치율 변동 ({today_str})*"]
+    for brand in brands:
+        row = brand_summary.get(brand)
+        lines.append("")
+        if row is None:
+            lines.append(f"*{brand}*\n  • 오늘 스냅샷에 해당 브랜드 상품이 없습니다")
+            continue
+        lines.append(f"*{brand}*")
+        lines.append(f"  • 상품 수: {row['sku_count']:,.0f}개 / 변동: *{row['changed_count']:,.0f}개*"
+                     f" (증가 {row['increase_count']:,.0f} · 감소 {row['decrease_count']:,.0f})")
+        lines.append(f"  • CMS 변동: {row['cms_diff']:+,.0f} / WMS 변동: {row['physical_diff']:+,.0f}")
+        lines.append(f"  • 평균 일치율: {row['avg_accuracy']:.1f}%")
+    return "\n".join(lines)
+
+
+def add_notion_link(payload_items: List[Dict[str, Any]], notion_url: Optional[str]) -> List[Dict[str, Any]]:
+    """메시지 끝에 Notion 전체 리포트 링크 추가 (URL이 없으면 그대로)"""
+    if not notion_url:
+        return payload_items
+    footer = f"\n\n━━━━━━━━━━━━━━━━━━\n📄 *전체 리포트 보기*\n{notion_url}"
+    return [{**item, "contents": item["contents"] + footer} for item in payload_items]
+
+
+def build_stock_report_payloads(
+    md_report: str,
+    today_str: str,
+    yesterday_str: str,
+    dm_receiver: str = None,
+    brand_summary: Dict[str, Dict[str, Any]] = None,
+    brand_routes: Dict[str, List[str]] = None,
+    skip_receivers: Iterable[str] = (),
+    summary: Dict[str, Any] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    수신자별 슬랙 메시지 페이로드 작성 (Notion 링크 제외, add_notion_link로 추가)
+
+    인자는 send_stock_report_to_slack과 같습니다.
+
+    Returns:
+        페이로드 목록 (수신자가 설정되지 않았으면 None)
+    """
+    if dm_receiver is None:
+        dm_receiver = os.getenv("SLACK_DM_RECEIVER", "sona@siliconii.net")
+    if brand_routes is None:
+        brand_routes = parse_brand_routes(os.getenv("SLACK_BRAND_ROUTES", ""))
+
+    receivers = parse_receivers(dm_receiver)
+    if not receivers and not brand_routes:
+        logger.warning("슬랙 수신자가 설정되지 않았습니다. (SLACK_DM_RECEIVER)")
+        return None
+
+    def payload(receiver, contents):
+        return {
+            "msgType": "daily-stock-report",
+            "dmReceiver": receiver,
+            "date_from": yesterday_str,
+            "date_to": today_str,
+            "contents": contents
+        }
+
+    skip = set(skip_receivers)
+    payload_items = []
+
+    # 전체 요약 (포맷팅은 수신자 수와 무관하게 1회, 개요 수치가 없는 이전 리포트만 마크다운에서 추출)
+    if any(r not in skip for r in receivers):
+        if summary is not None:
+            slack_contents = format_summary_for_slack(summary)
+        else:
+            slack_contents = format_stock_report_for_slack(md_report)
+        payload_items.extend(payload(r, slack_contents) for r in receivers if r not in skip)
+
+    # 브랜드 담당자별 요약 (전체 요약 수신자와 겹치면 전체 요약만 전송)
+    if brand_routes and brand_summary is None:
+        logger.warning("브랜드별 집계가 없어 브랜드 담당자 전송을 생략합니다.")
+    elif brand_routes:
+        for receiver, brands in brand_routes.items():
+            if receiver in skip or receiver in receivers:
+                continue
+            payload_items.append(payload(receiver, format_brand_digest(brands, brand_summary, today_str)))
+
+    return payload_items
 
 
 def send_stock_report_to_slack(
@@ -101,59 +261,145 @@ def send_stock_report_to_slack(
     today_str: str,
     yesterday_str: str,
     dm_receiver: str = None,
-    notion_url: str = None
+    notion_url: str = None,
+    brand_summary: Dict[str, Dict[str, Any]] = None,
+    brand_routes: Dict[str, List[str]] = None,
+    skip_receivers: Iterable[str] = (),
+    summary: Dict[str, Any] = None
 ):
     """
     재고 일치율 변동 레포트를 슬랙으로 전송
 
+    - dm_receiver(쉼표 구분 여러 명)에게는 전체 요약
+    - brand_routes 수신자에게는 담당 브랜드만 추린 요약 (brand_summary 필요)
+    - 모든 메시지를 한 번의 요청으로 일괄 전송 (실패 시 재시도 후 수신자별 전송)
+
     Args:
         md_report: 마크다운 레포트 전체 내용
         today_str: 오늘 날짜 문자열
         yesterday_str: 어제 날짜 문자열
-        dm_receiver: DM 수신자 이메일 (None이면 환경변수에서 가져옴)
+        dm_receiver: DM 수신자 이메일, 쉼표로 여러 명 (None이면 환경변수 SLACK_DM_RECEIVER)
         notion_url: Notion 페이지 URL (선택적)
+        brand_summary: 브랜드별 집계 {브랜드: 집계 행 dict}
+        brand_routes: {수신자: [브랜드, ...]} (None이면 환경변수 SLACK_BRAND_ROUTES)
+        skip_receivers: 이미 전송된 수신자 (재실행 시 제외)
+        summary: 리포트 개요 수치 (있으면 마크다운을 다시 읽지 않고 바로 요약 작성)
+
+    Returns:
+        전송 결과 ("results"에 수신자별 결과, 모두 성공하면 onResult=1)
     """
-    slack = SlackNotificationService()
+    payload_items = build_stock_report_payloads(
+        md_report, today_str, yesterday_str, dm_receiver, brand_summary, brand_routes, skip_receivers, summary
+    )
+    if payload_items is None:
+        return
+    return send_payloads(add_notion_link(payload_items, notion_url))
 
-    if dm_receiver is None:
-        dm_receiver = os.getenv("SLACK_DM_RECEIVER", "sona@siliconii.net")
 
-    if not dm_receiver:
-        logger.warning("슬랙 수신자가 설정되지 않았습니다. (SLACK_DM_RECEIVER)")
-        return
+def send_payloads(payload_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    작성된 페이로드 일괄 전송 후 결과 요약
 
-    # 슬랙 메시지 포맷팅
-    slack_contents = format_stock_report_for_slack(md_report)
+    Returns:
+        전송 결과 ("results"에 수신자별 결과, 모두 성공하면 onResult=1)
+    """
+    if not payload_items:
+        logger.info("전송할 슬랙 수신자가 없습니다 (모두 전송 완료).")
+        return {"onResult": 1, "ovErrDesc": "전송 대상 없음", "results": {}}
 
-    # Notion URL이 있으면 메시지 끝에 추가
-    if notion_url:
-        slack_contents += f"\n\n━━━━━━━━━━━━━━━━━━\n📄 *전체 리포트 보기*\n{notion_url}"
+    results = SlackNotificationService().send_batch(payload_items)
+    failed = [r for r, result in results.items() if result["onResult"] != 1]
 
-    # 페이로드 구성
-    payload_items = [
-        {
-            "msgType": "daily-stock-report",
-            "dmReceiver": dm_receiver,
-            "date_from": yesterday_str,
-            "date_to": today_str,
-            "contents": slack_contents
-        }
+    if failed:
+        logger.error(f"슬랙 메시지 전송 실패: {len(failed)}/{len(results)}명 ({', '.join(failed)})")
+    else:
+        logger.info(f"슬랙 메시지 전송 완료: {len(results)}명")
+
+    return {
+        "onResult": -1 if failed else 1,
+        "ovErrDesc": f"전송 {len(results) - len(failed)}/{len(results)}명 성공",
+        "results": results
+    }
+
+
+def send_snapshot_quality_alert(report: Dict[str, Any], accepted: bool = False, dm_receiver: str = None):
+    """
+    스냅샷 격리 / 새 기준 수용 알림 (SLACK_DM_RECEIVER에게 전송)
+
+    Args:
+        report: snapshot_quality 검사 결과 (file, rows, previous_file, errors)
+        accepted: 연속 격리 후 행 수/컬럼 변화를 새 기준으로 받아들인 경우 True
+    """
+    if dm_receiver is None:
+        dm_receiver = os.getenv("SLACK_DM_RECEIVER", "sona@siliconii.net")
+    receivers = parse_receivers(dm_receiver)
+    if not receivers:
+        logger.warning("슬랙 수신자가 설정되지 않았습니다. (SLACK_DM_RECEIVER)")
+        return None
+
+    test_prefix = "[TEST] " if os.getenv("TEST_MODE", "false").lower() == "true" else ""
+    title = "✅ 스냅샷 새 기준 수용" if accepted else "🚫 스냅샷 격리"
+    lines = [
+        f"*{test_prefix}{title}*",
+        "",
+        f"*파일:* {report['file']} ({report['rows']:,}행)",
+        f"*비교 대상:* {report.get('previous_file') or '-'}",
+        "",
+        *[f"  • {error}" for error in report["errors"]],
+        "",
+        ("최근 격리된 스냅샷들과 같은 수준이라 정상 스냅샷으로 사용합니다." if accepted
+         else "리포트는 이전 정상 스냅샷 기준으로 유지됩니다. 문제가 없으면 quarantine/의 파일을 월 폴더로 되돌려 주세요."),
     ]
+    contents = "\n".join(lines)
+    return send_payloads([
+        {"msgType": "daily-stock-report", "dmReceiver": r, "date_from": "", "date_to": "", "contents": contents}
+        for r in receivers
+    ])
 
-    # 전송
-    result = slack.send_dm_message(payload_items)
 
-    if result["onResult"] == 1:
-        logger.info(f"슬랙 메시지 전송 완료: {dm_receiver}")
-    else:
-        logger.error(f"슬랙 메시지 전송 실패: {result['ovErrDesc']}")
+def format_summary_for_slack(summary: Dict[str, Any]) -> str:
+    """
+    리포트 개요 수치로 슬랙 요약 작성 (변동 상품 수와 무관하게 일정한 비용)
 
-    return result
+    Args:
+        summary: 분석기의 build_report_summary 결과
+    """
+    test_mode = os.getenv("TEST_MODE", "false").lower() == "true"
+    test_prefix = "[TEST] " if test_mode else ""
+    run_key = summary.get("run_key")
+
+    lines = [
+        f"*{test_prefix}📊 재고 일치율 변동 분석 리포트*",
+        "",
+        f"*기준일:* {summary['date_str']}",
+        f"*리포트 버전:* v{summary['report_version']}{f' ({run_key[:12]})' if run_key else ''}",
+        "",
+        "━━━━━━━━━━━━━━━━━━",
+        "*📈 개요*",
+        f"  총 상품 수 | {summary['total']:,}개",
+        f"  변동 상품 | {summary['changed_count']:,}개",
+        f"  변동 비율 | {summary['change_ratio']:.1f}%",
+        f"  평균 변동폭 | {summary['avg_change']:.2f}%",
+        f"  최대 변동 | {summary['max_change']:.2f}%",
+        f"  최소 변동 | {summary['min_change']:.2f}%",
+        "",
+        "━━━━━━━━━━━━━━━━━━",
+        "*🔄 변동 방향*",
+        f"  • *증가* (일치율 상승): {summary['increase_count']:,}개",
+        f"  • *감소* (일치율 하락): {summary['decrease_count']:,}개",
+    ]
+    if summary.get('anomaly_count'):
+        lines.append(f"  • *이상 변동* (평소와 다른 변동): {summary['anomaly_count']:,}개")
+    if summary.get('mismatch_main_source'):
+        lines.append(f"  • *불일치 주원인*: {summary['mismatch_main_source']} ({summary['mismatch_main_share']:.0f}%)")
+    return "\n".join(lines)
 
 
 def format_stock_report_for_slack(md_report: str) -> str:
     """
     마크다운 리포트의 요약 부분만 슬랙 형식으로 변환 (개요까지만)
+
+    개요 수치 JSON이 없는 이전 버전 리포트용입니다 (새 리포트는 format_summary_for_slack).
     """
     lines = md_report.splitlines()
     slack_lines = []
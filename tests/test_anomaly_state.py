@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+이상 점수 상태 테스트 (같은 날 재실행 되돌림, 중단된 갱신 복구, 지난 날짜 생략)
+"""
+import numpy as np
+
+from src.processor import anomaly_state
+from src.processor.anomaly_state import AnomalyState
+
+
+def _run(state, date_str, changes):
+    """changes: {prod_id: (일치율 변동, 수량 차이)}"""
+    ids = list(changes)
+    return state.score_and_update(date_str, ids, [changes[i][0] for i in ids], [changes[i][1] for i in ids])
+
+
+def _records(base_dir):
+    return np.fromfile(base_dir / AnomalyState.STATE_FILENAME, dtype=anomaly_state.RECORD_DTYPE)
+
+
+def _history(state):
+    _run(state, "2026-03-10", {0: (5.0, 1.0), 1: (-3.0, 0.0)})
+    _run(state, "2026-03-11", {1: (2.0, 2.0), 2: (10.0, 4.0)})
+
+
+def test_rerun_on_same_day_restores_previous_state(tmp_path):
+    rerun_dir, fresh_dir = tmp_path / "rerun", tmp_path / "fresh"
+
+    rerun = AnomalyState(rerun_dir)
+    _history(rerun)
+    first = _run(rerun, "2026-03-12", {0: (50.0, 9.0), 3: (1.0, 1.0)})
+    # 입력이 바뀌어 같은 날 다시 실행 (다른 상품 집합)
+    second = _run(rerun, "2026-03-12", {1: (-7.0, 3.0), 2: (4.0, 0.0)})
+
+    fresh = AnomalyState(fresh_dir)
+    _history(fresh)
+    expected = _run(fresh, "2026-03-12", {1: (-7.0, 3.0), 2: (4.0, 0.0)})
+
+    assert first is not None
+    np.testing.assert_array_equal(second, expected)
+    # 첫 실행에서만 바뀐 상품 0, 3도 이전 값으로 돌아감 (3은 새로 늘어난 빈 레코드)
+    rerun_records, fresh_records = _records(rerun_dir), _records(fresh_dir)
+    np.testing.assert_array_equal(rerun_records[:len(fresh_records)], fresh_records)
+    assert (rerun_records[len(fresh_records):] == np.zeros(1, dtype=anomaly_state.RECORD_DTYPE)).all()
+    assert AnomalyState(rerun_dir).meta == AnomalyState(fresh_dir).meta
+
+
+def test_interrupted_update_is_rolled_back_on_open(tmp_path):
+    state = AnomalyState(tmp_path)
+    _history(state)
+    before = _records(tmp_path).copy()
+    meta = dict(state.meta)
+
+    _run(state, "2026-03-12", {0: (50.0, 9.0)})
+    # 레코드는 바뀌었지만 반영일 기록 전에 중단된 상황
+    state.meta = meta
+    state._save_meta()
+
+    reopened = AnomalyState(tmp_path)
+    np.testing.assert_array_equal(_records(tmp_path)[:len(before)], before)
+    assert reopened.meta["applied_through"] == meta["applied_through"]
+
+
+def test_dates_before_applied_day_are_not_scored(tmp_path):
+    state = AnomalyState(tmp_path)
+    _history(state)
+    before = _records(tmp_path).copy()
+
+    assert _run(state, "2026-03-09", {0: (50.0, 9.0)}) is None
+    np.testing.assert_array_equal(_records(tmp_path), before)
+
+
+def test_scores_are_withheld_during_warm_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(anomaly_state, "ANOMALY_MIN_HISTORY_DAYS", 2)
+    state = AnomalyState(tmp_path)
+
+    assert np.isnan(_run(state, "2026-03-10", {0: (5.0, 1.0)})).all()
+    assert np.isnan(_run(state, "2026-03-11", {0: (5.0, 1.0)})).all()
+    assert np.isfinite(_run(state, "2026-03-12", {0: (5.0, 1.0)})).all()
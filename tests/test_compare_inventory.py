@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+어제/오늘 스냅샷 비교 테스트 (상위 N 선택, 리포트 CSV 순서)
+"""
+import numpy as np
+import pandas as pd
+
+from src.analyzer import daily_stock_accuracy_analyzer as analyzer
+
+
+def _snapshot(accuracy):
+    accuracy = np.asarray(accuracy, dtype=float)
+    return pd.DataFrame({
+        "prod_cd": [f"P{i:03d}" for i in range(len(accuracy))],
+        "prod_nm": "상품",
+        "cms_qty": 100.0,
+        "wms_qty": accuracy,
+        "waiting_qty": 0.0,
+        "accuracy": accuracy,
+    })
+
+
+def test_top_positions_keeps_first_positions_among_ties_at_cutoff():
+    values = np.zeros(5000)
+    values[[10, 20]] = 5.0
+    assert analyzer._top_positions(values, 12).tolist() == [10, 20] + list(range(10))
+
+
+def test_csv_report_follows_detail_rank_order_and_top_n():
+    yesterday = _snapshot([50] * 8)
+    today = _snapshot([60, 90, 70, 55, 40, 10, 45, 30])
+    _, changed = analyzer.compare_inventory(yesterday, today, min_accuracy_change=0, min_qty_delta=0,
+                                            top_n=2, top_n_per_brand=0)
+
+    report = analyzer.generate_csv_report(changed, "2026-03-13")
+
+    # 증가 상위 2개(P001 +40, P002 +20) → 감소 상위 2개(P005 -40, P007 -20)
+    assert report["상품코드"].tolist() == ["P001", "P002", "P005", "P007"]
+
+
+def test_csv_report_without_limits_has_all_changed_rows():
+    yesterday = _snapshot([50] * 6)
+    today = _snapshot([60, 90, 50, 40, 10, 51])
+    _, changed = analyzer.compare_inventory(yesterday, today, min_accuracy_change=0, min_qty_delta=0,
+                                            top_n=0, top_n_per_brand=0)
+
+    report = analyzer.generate_csv_report(changed, "2026-03-13")
+
+    assert report["상품코드"].tolist() == ["P001", "P000", "P005", "P004", "P003"]
+
+
+def test_duplicate_keys_do_not_multiply_comparison_rows():
+    yesterday = _snapshot([50] * 3)
+    today = pd.concat([_snapshot([60, 50, 50]), _snapshot([90])], ignore_index=True)
+
+    comparison, changed = analyzer.compare_inventory(yesterday, today, min_accuracy_change=0, min_qty_delta=0,
+                                                     top_n=0, top_n_per_brand=0)
+
+    assert comparison["prod_cd"].tolist() == ["P000", "P001", "P002"]
+    # 기본 정책(first): 처음 나온 P000 행(60) 기준
+    assert changed["accuracy_today"].tolist() == [60.0]
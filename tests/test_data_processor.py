@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+스냅샷 정규화 테스트 (상품코드 중복 처리 포함)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.processor.data_processor import (
+    DataProcessor,
+    DuplicateKeyError,
+    compute_accuracy,
+    dedupe_keys,
+    default_steps,
+)
+
+
+def _raw(codes, cms, wms):
+    return pd.DataFrame({
+        "상품코드": codes,
+        "상품명": [f"상품{i}" for i in range(len(codes))],
+        "CMS 재고": cms,
+        "WMS 재고": wms,
+        "대기 수량": 0,
+    })
+
+
+def _normalized(raw):
+    """중복 정리 단계 전까지만 정규화"""
+    return DataProcessor(steps=[step for step in default_steps() if step[0] != "dedupe_keys"]).process(raw)
+
+
+def test_process_normalizes_columns_and_drops_summary_row():
+    raw = pd.concat([_raw(["A", "B"], [10, 0], [5, 0]), pd.DataFrame({"CMS 재고": [10]})], ignore_index=True)
+
+    df = DataProcessor().process(raw)
+
+    assert df["prod_cd"].tolist() == ["A", "B"]
+    assert df["accuracy"].tolist() == [50.0, 100.0]
+
+
+def test_compute_accuracy_matches_policy():
+    cms = [0, 0, 10, 10, -1, 1000]
+    wms = [0, 5, 0, 5, 5, 999.6]
+    assert compute_accuracy(cms, wms, np.zeros(6)).tolist() == [100.0, 0.0, 0.0, 50.0, 0.0, 99.9]
+
+
+def test_unique_keys_are_returned_unchanged():
+    df = DataProcessor().process(_raw(["A", "B"], [1, 2], [1, 2]))
+    assert dedupe_keys(df, "error") is df
+    assert "duplicates" not in df.attrs
+
+
+def test_first_keeps_first_row_and_reports_keys():
+    df = _normalized(_raw(["A", "B", "A", "C", "B", "A"], [1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 6]))
+
+    result = dedupe_keys(df, "first")
+
+    assert result["prod_cd"].tolist() == ["A", "B", "C"]
+    assert result["cms_qty"].tolist() == [1, 2, 4]
+    assert result.attrs["duplicates"] == {"policy": "first", "keys": ["A", "B"], "key_count": 2, "rows": 5}
+
+
+def test_sum_adds_quantities_and_recomputes_accuracy():
+    df = _normalized(_raw(["A", "B", "A"], [10, 5, 10], [10, 5, 0]))
+
+    result = dedupe_keys(df, "sum")
+
+    assert result["prod_cd"].tolist() == ["A", "B"]
+    assert result["cms_qty"].tolist() == [20, 5]
+    assert result["wms_qty"].tolist() == [10, 5]
+    assert result["accuracy"].tolist() == [50.0, 100.0]
+
+
+def test_error_raises_with_offending_keys():
+    df = _normalized(_raw(["A", "B", "A", "B", "C"], [1] * 5, [1] * 5))
+
+    with pytest.raises(DuplicateKeyError) as excinfo:
+        dedupe_keys(df, "error")
+
+    assert excinfo.value.keys == ["A", "B"]
+    assert excinfo.value.rows == 4
+
+
+def test_missing_keys_are_not_duplicates():
+    df = pd.DataFrame({"prod_cd": ["A", None, None], "cms_qty": [1.0, 2.0, 3.0]})
+    assert len(dedupe_keys(df, "error")) == 3
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        dedupe_keys(pd.DataFrame({"prod_cd": ["A"]}), "last")
+
+
+def test_default_pipeline_dedupes_with_configured_policy(monkeypatch):
+    from src.processor import data_processor
+    monkeypatch.setattr(data_processor, "SNAPSHOT_DUPLICATE_POLICY", "sum")
+
+    df = DataProcessor().process(_raw(["A", "A"], [1, 2], [3, 4]))
+
+    assert df["cms_qty"].tolist() == [3]
+    assert df.attrs["duplicates"]["policy"] == "sum"
+
+
+def test_run_many_counts_duplicate_error_as_failure(tmp_path, monkeypatch):
+    from src.processor import data_processor
+    monkeypatch.setattr(data_processor, "SNAPSHOT_DUPLICATE_POLICY", "error")
+    good, bad = tmp_path / "Stock_2026-03-12.csv", tmp_path / "Stock_2026-03-13.csv"
+    _raw(["A", "B"], [1, 2], [1, 2]).to_csv(good, index=False, encoding="utf-8-sig")
+    _raw(["A", "A"], [1, 2], [1, 2]).to_csv(bad, index=False, encoding="utf-8-sig")
+
+    results = DataProcessor().run_many([good, bad], save=False)
+
+    assert results[str(good)]["prod_cd"].tolist() == ["A", "B"]
+    assert results[str(bad)] is None
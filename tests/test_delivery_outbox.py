@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+전송 대기열 테스트 (순서 키별 처리 순서, 임대 만료 재처리, 재시도 한도 초과)
+"""
+import pytest
+
+from src.reporter import delivery_outbox
+from src.reporter.delivery_outbox import DeliveryOutbox, DeliveryWorker, PermanentDeliveryError
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return DeliveryOutbox(tmp_path / "outbox.sqlite3")
+
+
+def _ids(jobs):
+    return [job["id"] for job in jobs]
+
+
+def test_claim_takes_one_job_per_ordering_key_in_enqueue_order(outbox):
+    first = outbox.enqueue("notion", {"n": 1}, "notion:2026-03-13", supersede=False)
+    second = outbox.enqueue("notion", {"n": 2}, "notion:2026-03-13", supersede=False)
+    other = outbox.enqueue("slack", {"n": 3}, "slack:2026-03-13")
+
+    assert _ids(outbox.claim(10)) == [first, other]
+    # 앞 작업이 실행 중이면 같은 키의 뒤 작업은 가져가지 않음
+    assert outbox.claim(10) == []
+
+    # 앞 작업이 재시도 대기 중이어도 뒤 작업은 기다림
+    outbox.retry(first, "일시 오류", delay=3600)
+    assert outbox.claim(10) == []
+
+    outbox.retry(first, "일시 오류", delay=0)
+    assert _ids(outbox.claim(10)) == [first]
+    outbox.complete(first, {"ok": True})
+    assert _ids(outbox.claim(10)) == [second]
+
+
+def test_supersede_cancels_pending_jobs_with_same_key(outbox):
+    old = outbox.enqueue("notion", {"n": 1}, "notion:2026-03-13")
+    new = outbox.enqueue("notion", {"n": 2}, "notion:2026-03-13")
+
+    assert outbox.get(old)["status"] == "superseded"
+    assert _ids(outbox.claim(10)) == [new]
+
+
+def test_expired_lease_is_claimed_again(outbox):
+    job_id = outbox.enqueue("slack", {}, "slack:2026-03-13")
+
+    # 처리 중 프로세스가 죽은 경우: 임대 시간이 지나면 다른 워커가 다시 가져감
+    assert _ids(outbox.claim(1, lease_seconds=-1)) == [job_id]
+    assert _ids(outbox.claim(1)) == [job_id]
+    # 임대 중이면 가져가지 않음
+    assert outbox.claim(1) == []
+
+
+def test_retry_limit_moves_job_to_dead_and_unblocks_key(outbox, monkeypatch):
+    monkeypatch.setattr(delivery_outbox, "DELIVERY_MAX_ATTEMPTS", 2)
+    first = outbox.enqueue("notion", {}, "notion:2026-03-13", dedup_key="notion:a", supersede=False)
+    second = outbox.enqueue("notion", {}, "notion:2026-03-13", supersede=False)
+
+    outbox.claim(1)
+    outbox.retry(first, "오류 1", delay=0)
+    outbox.claim(1)
+    outbox.retry(first, "오류 2", delay=0)
+
+    job = outbox.get(first)
+    assert job["status"] == "dead"
+    assert job["attempts"] == 2 and job["last_error"] == "오류 2"
+    # 포기한 작업은 같은 키의 뒤 작업을 막지 않음
+    assert _ids(outbox.claim(10)) == [second]
+
+    # 같은 dedup_key로 다시 등록하면 같은 작업을 처음부터 다시 시도
+    assert outbox.enqueue("notion", {}, "notion:2026-03-13", dedup_key="notion:a") == first
+    assert outbox.get(first)["status"] == "pending" and outbox.get(first)["attempts"] == 0
+
+
+def test_waiting_for_predecessor_does_not_count_as_attempt(outbox):
+    job_id = outbox.enqueue("slack", {}, "slack:2026-03-13")
+    outbox.claim(1)
+    outbox.retry(job_id, "Notion 페이지 대기", delay=0, count_attempt=False)
+    assert outbox.get(job_id)["attempts"] == 0
+
+
+def test_worker_dead_letters_permanent_errors_and_retries_others(outbox):
+    def permanent(job, outbox):
+        raise PermanentDeliveryError("잘못된 요청")
+
+    def flaky(job, outbox):
+        raise ConnectionError("연결 끊김")
+
+    worker = DeliveryWorker(outbox, {"notion": permanent, "slack": flaky}, max_concurrency=1)
+    try:
+        dead = outbox.enqueue("notion", {}, "notion:2026-03-13")
+        retried = outbox.enqueue("slack", {}, "slack:2026-03-13")
+        unknown = outbox.enqueue("email", {}, "email:2026-03-13")
+        for job in outbox.claim(10):
+            worker._in_flight += 1
+            worker._execute(job)
+    finally:
+        worker.stop()
+
+    assert outbox.get(dead)["status"] == "dead"
+    assert outbox.get(unknown)["status"] == "dead"
+    job = outbox.get(retried)
+    assert job["status"] == "pending" and job["attempts"] == 1
+    assert job["last_error"] == "ConnectionError: 연결 끊김"
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+스트리밍 xlsx 저장 테스트 (openpyxl로 다시 읽어 값/링크/시트 나눔 확인)
+"""
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from src.reporter import excel_writer
+from src.reporter.excel_writer import excel_sheet, write_xlsx
+
+
+def _rows(ws):
+    return [list(row) for row in ws.iter_rows(values_only=True)]
+
+
+def test_round_trip_through_openpyxl(tmp_path, monkeypatch):
+    # 시트당 3행(헤더 제외)으로 줄여 시트 나눔 확인
+    monkeypatch.setattr(excel_writer, "EXCEL_MAX_ROWS", 4)
+    df = pd.DataFrame({
+        "상품코드": ["P\x01001", "P&<002>", 'P"003', "P004", "P005"],
+        "사용\x0b": [True, False, True, False, True],
+        "수량": pd.array([1, None, 3, 4, None], dtype="Int64"),
+        "일치율": [99.5, np.nan, 0.0, 100.0, 50.25],
+        "혼합": [1, "a\x1fb", 2.5, None, np.int64(7)],
+        "비고": pd.array(["x\x00y", None, "z", "tab\tok", "줄\n바꿈"], dtype="string"),
+    })
+    sheets = [excel_sheet("변동:[상세]\x02", df, percent=["일치율"], integer=["수량"],
+                          links={"상품코드": "http://cms.example/Stock?ProdCd={value}"})]
+
+    path = write_xlsx(tmp_path / "report.xlsx", sheets)
+
+    wb = openpyxl.load_workbook(path)
+    assert wb.sheetnames == ["변동__상세_", "변동__상세_ (2)"]
+    first, second = (_rows(wb[name]) for name in wb.sheetnames)
+    assert first[0] == ["상품코드", "사용", "수량", "일치율", "혼합", "비고"]
+    assert second[0] == first[0]
+
+    rows = first[1:] + second[1:]
+    assert [row[1] for row in rows] == [True, False, True, False, True]
+    assert [row[2] for row in rows] == [1, None, 3, 4, None]
+    assert [row[3] for row in rows] == [99.5, None, 0, 100, 50.25]
+    assert [row[4] for row in rows] == [1, "ab", 2.5, None, 7]
+    assert [row[5] for row in rows] == ["xy", None, "z", "tab\tok", "줄\n바꿈"]
+
+    # 링크 셀은 HYPERLINK 수식 (제어 문자 제거, 따옴표는 수식 안에서 "")
+    links = [row[0] for row in rows]
+    assert links[0] == '=HYPERLINK("http://cms.example/Stock?ProdCd=P001","P001")'
+    assert links[1] == '=HYPERLINK("http://cms.example/Stock?ProdCd=P&<002>","P&<002>")'
+    assert links[2] == '=HYPERLINK("http://cms.example/Stock?ProdCd=P""003","P""003")'
+
+    values = openpyxl.load_workbook(path, data_only=True)
+    assert [row[0] for row in _rows(values.worksheets[0])[1:]] == ["P001", "P&<002>", 'P"003']
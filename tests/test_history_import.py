@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+스냅샷 → 이력 저장소 일괄 적재 테스트 (날짜당 가장 늦은 시간 파일)
+"""
+import pandas as pd
+
+from src.analyzer import daily_stock_accuracy_analyzer as analyzer
+from src.processor.snapshot_manifest import write_snapshot_csv
+
+
+def _write_snapshot(base_dir, name, cms_qty):
+    month_dir = base_dir / name[6:13]
+    month_dir.mkdir(parents=True, exist_ok=True)
+    write_snapshot_csv(pd.DataFrame({
+        "상품코드": ["P001"],
+        "상품명": ["상품"],
+        "CMS 재고": [cms_qty],
+        "WMS 재고": [10],
+        "대기 수량": [0],
+    }), month_dir / name)
+
+
+def test_import_keeps_latest_snapshot_per_date(tmp_path):
+    _write_snapshot(tmp_path, "Stock_2026-03-13_0800.csv", 1)
+    _write_snapshot(tmp_path, "Stock_2026-03-13_1700.csv", 2)
+    _write_snapshot(tmp_path, "Stock_2026-03-14_0800.csv", 3)
+
+    assert analyzer.import_snapshots_to_history(tmp_path) == 2
+
+    history = analyzer.get_history_store(tmp_path).sku_history("P001")
+    assert history.set_index("snapshot_date")["cms_qty"].to_dict() == {"2026-03-13": 2.0, "2026-03-14": 3.0}
+
+
+def test_import_skips_loaded_dates_unless_overwrite(tmp_path):
+    _write_snapshot(tmp_path, "Stock_2026-03-13_0800.csv", 1)
+    assert analyzer.import_snapshots_to_history(tmp_path) == 1
+
+    _write_snapshot(tmp_path, "Stock_2026-03-13_1700.csv", 2)
+    assert analyzer.import_snapshots_to_history(tmp_path) == 0
+    assert analyzer.import_snapshots_to_history(tmp_path, overwrite=True) == 1
+
+    history = analyzer.get_history_store(tmp_path).sku_history("P001")
+    assert history["cms_qty"].tolist() == [2.0]
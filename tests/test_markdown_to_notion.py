@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+마크다운 → Notion 블록 변환기 테스트
+
+- 기존 변환기(notion_client / notion_client_database)가 만든 블록을 fixtures/notion/에 저장해 두고
+  공용 변환기 결과가 같은지 비교 (page = table 모드, database = code 모드)
+- 변환 시간 선형 확장 확인은 오래 걸리므로 NOTION_BENCHMARK=1일 때만 실행
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from src.reporter.markdown_to_notion import (
+    _parse_bold_text_cached,
+    _parse_rich_text_cached,
+    iter_notion_blocks,
+    markdown_to_notion_blocks,
+    stream_block_chunks,
+)
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "notion"
+
+# 줄당 처리 시간이 가장 작은 크기 대비 이 배수를 넘으면 선형이 아닌 것으로 판단
+MAX_PER_LINE_RATIO = 2.0
+
+MODES = [("table", "page"), ("code", "database")]
+
+
+def _fixture(name):
+    markdown = (FIXTURE_DIR / "report.md").read_text(encoding="utf-8")
+    expected = json.loads((FIXTURE_DIR / f"report.{name}.json").read_text(encoding="utf-8"))
+    return markdown, expected
+
+
+@pytest.mark.parametrize("table_mode, name", MODES)
+def test_blocks_match_previous_converter(table_mode, name):
+    markdown, expected = _fixture(name)
+    assert markdown_to_notion_blocks(markdown, table_mode) == expected
+
+
+@pytest.mark.parametrize("table_mode, name", MODES)
+def test_streamed_chunks_keep_document_order(table_mode, name):
+    markdown, expected = _fixture(name)
+    chunks = list(stream_block_chunks(markdown, table_mode, max_pending=1))
+    assert [block for chunk in chunks for block in chunk] == expected
+
+
+def build_report(line_count: int) -> str:
+    """리포트와 같은 구조(제목/목록/대형 테이블)의 마크다운 생성"""
+    lines = [
+        "# 📊 재고 일치율 변동 분석 리포트",
+        "",
+        "**기준일:** 2026-03-13 08:00",
+        "",
+        "---",
+        "## 🔄 변동 분석",
+        "- **증가** (일치율 상승): 10개",
+        "1. **변동 상품 확인** - 우선순위순 확인",
+        "### 📈 일치율 증가",
+        "",
+        "| No | 상품코드 | 일치율(어제) | 일치율(오늘) | 변동 | CMS재고 | CMS변동 | WMS수량 | WMS변동 |",
+        "|---:|:---------|-------------:|-------------:|-----:|--------:|--------:|--------:|--------:|",
+    ]
+    idx = 1
+    while len(lines) < line_count:
+        prod_cd = f"P{idx % 50000:06d}"
+        lines.append(
+            f"| {idx} | **[{prod_cd}](http://localcms.siliconii.com/WMS/CmsWmsStock?ProdCd={prod_cd})** | "
+            f"100.0% | {idx % 100}.0% | -{100 - idx % 100}.0% | {idx % 37} | +0 | {idx % 41} | +{idx % 3} |"
+        )
+        idx += 1
+    return "\n".join(lines)
+
+
+def measure(line_count: int, repeat: int = 3) -> float:
+    """변환 시간 측정 (최솟값, 초)"""
+    markdown = build_report(line_count)
+    best = float("inf")
+    for _ in range(repeat):
+        # 이전 측정의 rich_text 캐시가 결과에 섞이지 않도록 비움
+        _parse_rich_text_cached.cache_clear()
+        _parse_bold_text_cached.cache_clear()
+        started = time.perf_counter()
+        for _ in iter_notion_blocks(markdown):
+            pass
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@pytest.mark.skipif(os.getenv("NOTION_BENCHMARK") != "1", reason="NOTION_BENCHMARK=1일 때만 실행")
+def test_conversion_scales_linearly():
+    per_line = {size: measure(size) / size for size in (1_000, 10_000, 100_000)}
+    assert max(per_line.values()) / min(per_line.values()) <= MAX_PER_LINE_RATIO
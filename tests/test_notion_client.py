@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Notion 페이지 생성 업로드 테스트 (Notion API는 가짜 응답으로 대체)
+"""
+import pytest
+import requests
+
+from src.reporter import markdown_to_notion, notion_client
+from src.reporter.markdown_to_notion import plan_requests, stream_block_chunks
+
+# 최상위 블록 250개 → 요청 3회 (요청당 최대 100개)
+MARKDOWN = "# 리포트\n" + "\n".join(f"- **항목 {i}**: {i}개" for i in range(249))
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = ""
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} 오류", response=self)
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("NOTION_API_TOKEN", "test-token")
+    return notion_client.NotionClient(cache_path=tmp_path / "notion_cache.json")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """페이지 생성/블록 추가 요청 기록 (append_status 순서대로 블록 추가 응답 코드)"""
+    calls = {"post": [], "patch": [], "append_status": []}
+
+    def post(url, json=None, **kwargs):
+        calls["post"].append(json)
+        return FakeResponse(body={"id": "page-1", "url": "https://notion.so/page-1"})
+
+    def patch(url, json=None, **kwargs):
+        calls["patch"].append(json)
+        status = calls["append_status"].pop(0) if calls["append_status"] else 200
+        return FakeResponse(status)
+
+    monkeypatch.setattr(notion_client.requests, "post", post)
+    monkeypatch.setattr(notion_client.requests, "patch", patch)
+    return calls
+
+
+def test_stream_reports_same_plan_as_plan_requests():
+    plan = {}
+    chunks = list(stream_block_chunks(MARKDOWN, plan=plan))
+    assert plan == plan_requests(MARKDOWN)
+    assert plan["requests"] == len(chunks) == 3
+
+
+def test_create_converts_document_once(client, api, monkeypatch):
+    passes = []
+    original = markdown_to_notion.iter_notion_blocks
+
+    def counting(markdown, table_mode="table"):
+        passes.append(table_mode)
+        return original(markdown, table_mode)
+
+    monkeypatch.setattr(markdown_to_notion, "iter_notion_blocks", counting)
+
+    result = client.create_page("parent-1", "리포트", MARKDOWN)
+
+    assert result["success"]
+    assert len(passes) == 1
+    assert len(api["post"][0]["children"]) == 100
+    assert [len(call["children"]) for call in api["patch"]] == [100, 50]
+
+
+def test_create_stops_at_first_failed_append(client, api):
+    api["append_status"] = [500]
+
+    result = client.create_page("parent-1", "리포트", MARKDOWN)
+
+    assert not result["success"]
+    assert result["page_id"] == "page-1"
+    # 실패한 묶음 이후는 추가하지 않음 (중간이 빠진 페이지 방지)
+    assert len(api["patch"]) == 1
+    # 다음 갱신은 전체 교체
+    assert client.cache.page("page-1") == {}
+
+
+def test_failed_upload_still_logs_plan(client, api, monkeypatch):
+    logged = []
+    monkeypatch.setattr(client, "_log_upload_plan", lambda plan, completed=True: logged.append((dict(plan), completed)))
+    api["append_status"] = [500]
+
+    client.create_page("parent-1", "리포트", MARKDOWN)
+
+    assert len(logged) == 1
+    plan, completed = logged[0]
+    assert not completed
+    assert plan["requests"] >= 2
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+상품코드 사전 ID 안정성 테스트 (export → CSV → 로드 후에도 같은 상품은 같은 ID)
+"""
+import pandas as pd
+
+from src.processor.data_processor import DataProcessor
+from src.processor.product_dictionary import ProductDictionary
+from src.processor.snapshot_cache import publish_csv_snapshot, snapshot_cache
+from src.processor.snapshot_manifest import write_snapshot_csv
+
+
+def _export(tmp_path, codes):
+    """exporter와 같은 순서: DB 상품코드(문자열)로 사전 갱신 → 스냅샷 CSV 저장"""
+    product_dict = ProductDictionary(tmp_path)
+    ids = product_dict.encode(pd.Series(codes, dtype=object))
+    product_dict.save()
+
+    df_export = pd.DataFrame({
+        "상품코드": codes,
+        "상품명": ["상품A", "상품B"],
+        "CMS 재고": [1, 2],
+        "WMS 재고": [1, 2],
+        "대기 수량": [0, 0],
+        "일치율": [100.0, 100.0],
+    })
+    path = tmp_path / "Stock_2026-03-13_0800.csv"
+    write_snapshot_csv(df_export, path)
+    return ids, path, df_export
+
+
+def test_zero_padded_codes_keep_ids_after_csv_load(tmp_path):
+    ids, path, _ = _export(tmp_path, ["00123", "00456"])
+    assert ids.tolist() == [0, 1]
+
+    processor = DataProcessor()
+    df = processor.process(processor.load_csv(path))
+    assert df["prod_cd"].tolist() == ["00123", "00456"]
+
+    product_dict = ProductDictionary(tmp_path)
+    assert product_dict.encode(df["prod_cd"]).tolist() == [0, 1]
+    assert len(product_dict) == 2
+
+
+def test_cached_snapshot_keeps_zero_padded_codes(tmp_path):
+    _, path, df_export = _export(tmp_path, ["00123", "00456"])
+    try:
+        assert publish_csv_snapshot(path, df_export)
+        cached = snapshot_cache.get(path)
+        assert cached["상품코드"].tolist() == ["00123", "00456"]
+    finally:
+        snapshot_cache.clear()
+
+
+def test_stale_instances_never_hand_out_the_same_id(tmp_path):
+    """두 프로세스가 같은 사전을 열어 각자 새 코드를 등록해도 ID가 겹치지 않음"""
+    ProductDictionary(tmp_path).encode(["A"])
+    first, second = ProductDictionary(tmp_path), ProductDictionary(tmp_path)
+
+    assert first.encode(["A", "B"]).tolist() == [0, 1]
+    # second는 B를 모르는 상태 → 파일 끝을 다시 읽어 B는 기존 ID, C는 다음 ID
+    assert second.encode(["C", "B"]).tolist() == [2, 1]
+    assert first.save() == 1 and second.save() == 1
+
+    reloaded = ProductDictionary(tmp_path)
+    assert reloaded.decode([0, 1, 2]).tolist() == ["A", "B", "C"]
+    assert first.encode(["C"], add=False).tolist() == [-1]
+    assert first.encode(["C"]).tolist() == [2]
+
+
+def test_concurrent_registration_keeps_dictionary_contiguous(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def register(worker):
+        product_dict = ProductDictionary(tmp_path)
+        codes = [f"W{worker}-{i}" for i in range(20)] + [f"S{i}" for i in range(20)]
+        return dict(zip(codes, product_dict.encode(codes).tolist()))
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(register, range(4)))
+
+    reloaded = ProductDictionary(tmp_path)
+    assert len(reloaded) == 4 * 20 + 20
+    for assigned in results:
+        assert reloaded.encode(list(assigned), add=False).tolist() == list(assigned.values())
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+조회 API 캐시 갱신 테스트 (단독 실행 서버도 새 스냅샷을 반영)
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from src.api import query_api
+from src.api.query_api import SnapshotQueryCache
+from src.processor.snapshot_manifest import write_snapshot_csv
+
+
+def _write_snapshot(base_dir, hhmm, cms_qty):
+    today = datetime.now().strftime("%Y-%m-%d")
+    month_dir = base_dir / today[:7]
+    month_dir.mkdir(parents=True, exist_ok=True)
+    path = month_dir / f"Stock_{today}_{hhmm}.csv"
+    write_snapshot_csv(pd.DataFrame({
+        "상품코드": ["P001"], "상품명": ["상품"], "CMS 재고": [cms_qty], "WMS 재고": [10], "대기 수량": [0],
+    }), path)
+    return path
+
+
+def test_state_picks_up_new_snapshot_after_check_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_api, "QUERY_API_REFRESH_SECONDS", 3600)
+    _write_snapshot(tmp_path, "0800", 10)
+    _write_snapshot(tmp_path, "1200", 5)
+    cache = SnapshotQueryCache(tmp_path)
+    first = cache.state
+    assert first.today_str.endswith("12:00")
+
+    _write_snapshot(tmp_path, "1700", 1)
+    # 확인 간격 전에는 기존 캐시
+    assert cache.state is first
+
+    monkeypatch.setattr(query_api, "QUERY_API_REFRESH_SECONDS", 0)
+    assert cache.state.today_str.endswith("17:00")
+    # 바뀐 게 없으면 다시 만들지 않음
+    assert cache.refresh() is False
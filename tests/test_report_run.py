@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+리포트 실행 키 테스트 (리포트 내용이 바뀌는 설정은 키에 포함되어야 재생성됨)
+"""
+import pytest
+
+from src.analyzer import daily_stock_accuracy_analyzer as analyzer
+
+
+@pytest.mark.parametrize("name, first, second", [
+    ("TEST_MODE", "true", "false"),
+    ("CMS_URL", "http://cms-a.example", "http://cms-b.example"),
+])
+def test_report_logic_key_changes_with_report_settings(monkeypatch, name, first, second):
+    monkeypatch.setenv(name, first)
+    key = analyzer.report_logic_key()
+    monkeypatch.setenv(name, second)
+    assert analyzer.report_logic_key() != key
+
+
+def test_backfill_key_records_report_without_anomaly_scores(monkeypatch, tmp_path):
+    """이상 점수 없이 렌더링한 백필 리포트 때문에 오늘 실행(이상 점수 포함)이 생략되면 안 됨"""
+    import pandas as pd
+
+    from src.analyzer import backfill
+    from src.processor.snapshot_manifest import write_snapshot_csv
+    from src.reporter.report_run import ReportRun, compute_run_key
+
+    monkeypatch.setattr(analyzer, "ANOMALY_SCORING", True)
+    monkeypatch.setattr(analyzer, "REPORT_XLSX", False)
+    month_dir = tmp_path / "2026-03"
+    month_dir.mkdir()
+    chunk = []
+    for date_str, cms_qty in [("2026-03-12", 10), ("2026-03-13", 5)]:
+        path = month_dir / f"Stock_{date_str}_0800.csv"
+        write_snapshot_csv(pd.DataFrame({
+            "상품코드": ["P001"], "상품명": ["상품"], "CMS 재고": [cms_qty], "WMS 재고": [10], "대기 수량": [0],
+        }), path)
+        chunk.append((date_str, str(path)))
+
+    results = backfill._run_chunk(chunk, tmp_path, tmp_path / "reports")
+
+    assert [r["skipped"] for r in results] == [False]
+    run = ReportRun(tmp_path / "reports", "2026-03-13")
+    files = [path for _, path in chunk]
+    assert run.is_rendered(compute_run_key(files, analyzer.report_logic_key(anomaly=False)))
+    assert not run.is_rendered(compute_run_key(files, analyzer.report_logic_key()))
+
+    monkeypatch.setattr(analyzer, "ANOMALY_SCORING", False)
+    assert analyzer.report_logic_key() == analyzer.report_logic_key(anomaly=False)
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+스냅샷 품질 검사 / 격리 테스트
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from src.processor import snapshot_quality
+from src.processor.snapshot_manifest import manifest_path, write_snapshot_csv
+from src.processor.snapshot_quality import (
+    QUARANTINE_DIRNAME,
+    QUALITY_SUFFIX,
+    check_snapshot,
+    previous_snapshot,
+    run_quality_gate,
+    validate_snapshot_file,
+)
+
+
+def _snapshot(rows=100, **overrides):
+    df = pd.DataFrame({
+        "상품코드": [f"P{i:04d}" for i in range(rows)],
+        "상품명": "상품",
+        "CMS 재고": 10,
+        "WMS 재고": 10,
+        "대기 수량": 0,
+        "일치율": 100.0,
+    })
+    for column, values in overrides.items():
+        df[column] = values
+    return df
+
+
+def _previous(df):
+    return {"rows": len(df), "columns": [str(c) for c in df.columns]}
+
+
+def test_clean_snapshot_passes():
+    df = _snapshot()
+    report = check_snapshot(df, _previous(df))
+    assert report["ok"]
+    assert report["errors"] == [] and report["warnings"] == []
+    assert report["row_change_pct"] == 0
+
+
+def test_row_change_over_threshold_is_error(monkeypatch):
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_MAX_ROW_CHANGE", 20.0)
+    previous = _previous(_snapshot(100))
+
+    assert check_snapshot(_snapshot(81), previous)["ok"]
+    report = check_snapshot(_snapshot(79), previous)
+    assert not report["ok"]
+    assert report["row_change_pct"] == -21.0
+
+
+def test_null_and_negative_rates_over_threshold_are_errors(monkeypatch):
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_MAX_NULL_RATE", 5.0)
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_MAX_NEGATIVE_RATE", 1.0)
+
+    wms = [10] * 100
+    wms[:6] = [None] * 6
+    report = check_snapshot(_snapshot(**{"WMS 재고": wms}))
+    assert report["null_pct"]["wms_qty"] == 6.0
+    assert any("wms_qty 빈 값" in e for e in report["errors"])
+
+    cms = [10] * 100
+    cms[:2] = [-1, -1]
+    report = check_snapshot(_snapshot(**{"CMS 재고": cms}))
+    assert report["negative_pct"]["cms_qty"] == 2.0
+    assert any("cms_qty 음수" in e for e in report["errors"])
+
+    # 허용 비율 이하
+    cms[1] = 10
+    assert check_snapshot(_snapshot(**{"CMS 재고": cms}))["ok"]
+
+
+def test_column_changes():
+    df = _snapshot()
+    previous = _previous(df)
+
+    report = check_snapshot(df.drop(columns=["대기 수량"]), previous)
+    assert not report["ok"]
+    assert report["missing_columns"] == ["대기 수량"]
+
+    report = check_snapshot(df.assign(**{"브랜드": "B"}), previous)
+    assert report["ok"]
+    assert report["added_columns"] == ["브랜드"]
+    assert report["warnings"]
+
+
+def test_missing_required_column_and_empty_snapshot_are_errors():
+    assert not check_snapshot(_snapshot().drop(columns=["CMS 재고"]))["ok"]
+    assert not check_snapshot(_snapshot(0))["ok"]
+
+
+@pytest.mark.parametrize("policy, ok", [("first", True), ("sum", True), ("error", False)])
+def test_duplicate_keys_follow_duplicate_policy(monkeypatch, policy, ok):
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_DUPLICATE_POLICY", policy)
+    codes = [f"P{i:04d}" for i in range(100)]
+    codes[1] = codes[2] = codes[0]
+
+    report = check_snapshot(_snapshot(**{"상품코드": codes}))
+
+    assert report["ok"] is ok
+    assert report["duplicate_rows"] == 3
+    assert report["duplicate_keys"] == ["P0000"]
+    assert any("상품코드 중복" in m for m in report["errors"] + report["warnings"])
+
+
+def test_summary_row_is_not_counted():
+    df = pd.concat([_snapshot(), pd.DataFrame({"상품코드": [None], "CMS 재고": [1000]})], ignore_index=True)
+    report = check_snapshot(df)
+    assert report["rows"] == 100
+    assert report["ok"]
+
+
+def _write_month(tmp_path, name, df):
+    month_dir = tmp_path / name[6:13]
+    month_dir.mkdir(parents=True, exist_ok=True)
+    path = month_dir / name
+    write_snapshot_csv(df, path)
+    return path
+
+
+def test_previous_snapshot_looks_back_into_last_month(tmp_path):
+    last_month = _write_month(tmp_path, "Stock_2026-02-28_0800.csv", _snapshot())
+    current = _write_month(tmp_path, "Stock_2026-03-01_0800.csv", _snapshot())
+    assert previous_snapshot(current) == last_month
+
+    later = _write_month(tmp_path, "Stock_2026-03-01_1700.csv", _snapshot())
+    assert previous_snapshot(later) == current
+
+
+def test_validate_uses_previous_manifest(tmp_path):
+    _write_month(tmp_path, "Stock_2026-03-12_0800.csv", _snapshot(100))
+    path = _write_month(tmp_path, "Stock_2026-03-13_0800.csv", _snapshot(50))
+
+    report = validate_snapshot_file(path)
+
+    assert report["previous_file"] == "Stock_2026-03-12_0800.csv"
+    assert report["previous_rows"] == 100
+    assert not report["ok"]
+
+
+def test_quality_gate_quarantines_failed_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_CHECK", True)
+    _write_month(tmp_path, "Stock_2026-03-12_0800.csv", _snapshot(100))
+    df = _snapshot(50)
+    path = _write_month(tmp_path, "Stock_2026-03-13_0800.csv", df)
+    path.with_suffix(".bin").write_bytes(b"bin")
+
+    assert run_quality_gate(path, df) is False
+
+    quarantine = path.parent / QUARANTINE_DIRNAME
+    assert not path.exists() and not manifest_path(path).exists() and not path.with_suffix(".bin").exists()
+    assert (quarantine / path.name).exists()
+    assert (quarantine / manifest_path(path).name).exists()
+    assert (quarantine / path.with_suffix(".bin").name).exists()
+    report = json.loads((quarantine / f"{path.name}{QUALITY_SUFFIX}").read_text(encoding="utf-8"))
+    assert report["file"] == path.name and not report["ok"]
+
+    # 격리된 파일은 다음 스냅샷의 비교 대상에서 빠짐
+    later = _write_month(tmp_path, "Stock_2026-03-14_0800.csv", _snapshot(100))
+    assert previous_snapshot(later).name == "Stock_2026-03-12_0800.csv"
+
+
+def test_quality_gate_passes_clean_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_CHECK", True)
+    _write_month(tmp_path, "Stock_2026-03-12_0800.csv", _snapshot(100))
+    path = _write_month(tmp_path, "Stock_2026-03-13_0800.csv", _snapshot(101))
+
+    assert run_quality_gate(path) is True
+    assert path.exists()
+    assert not (path.parent / QUARANTINE_DIRNAME).exists()
+
+
+def test_repeated_level_shift_is_accepted_as_new_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_CHECK", True)
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_ACCEPT_AFTER", 3)
+    _write_month(tmp_path, "Stock_2026-03-12_0800.csv", _snapshot(100))
+
+    # 상품 대량 등록 → 직전 정상 스냅샷 대비 +50%가 계속됨
+    results = []
+    for name, rows in [("Stock_2026-03-13_0800.csv", 150), ("Stock_2026-03-14_0800.csv", 152),
+                       ("Stock_2026-03-15_0800.csv", 151)]:
+        df = _snapshot(rows)
+        results.append(run_quality_gate(_write_month(tmp_path, name, df), df))
+    assert results == [False, False, True]
+
+    # 수용된 스냅샷이 다음 비교 기준
+    later = _write_month(tmp_path, "Stock_2026-03-16_0800.csv", _snapshot(153))
+    assert previous_snapshot(later).name == "Stock_2026-03-15_0800.csv"
+    assert run_quality_gate(later) is True
+
+
+def test_level_shift_is_not_accepted_when_quarantined_snapshots_disagree(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_CHECK", True)
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_ACCEPT_AFTER", 3)
+    _write_month(tmp_path, "Stock_2026-03-12_0800.csv", _snapshot(100))
+
+    results = []
+    for name, df in [("Stock_2026-03-13_0800.csv", _snapshot(50)),
+                     ("Stock_2026-03-14_0800.csv", _snapshot(150)),
+                     ("Stock_2026-03-15_0800.csv", _snapshot(150))]:
+        results.append(run_quality_gate(_write_month(tmp_path, name, df), df))
+    assert results == [False, False, False]
+
+    # 행 수/컬럼 외의 오류(빈 값)로 격리된 스냅샷은 새 기준 근거가 되지 않음
+    wms = [10] * 150
+    wms[:20] = [None] * 20
+    df = _snapshot(150, **{"WMS 재고": wms})
+    assert run_quality_gate(_write_month(tmp_path, "Stock_2026-03-16_0800.csv", df), df) is False
+
+
+def test_quarantine_and_acceptance_are_sent_to_slack(tmp_path, monkeypatch):
+    from src.reporter import slack_notifier
+
+    sent = []
+    monkeypatch.setenv("SEND_SLACK_NOTIFICATION", "true")
+    monkeypatch.setattr(slack_notifier, "send_snapshot_quality_alert",
+                        lambda report, accepted=False: sent.append((report["file"], accepted)))
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_CHECK", True)
+    monkeypatch.setattr(snapshot_quality, "SNAPSHOT_QUALITY_ACCEPT_AFTER", 2)
+    _write_month(tmp_path, "Stock_2026-03-12_0800.csv", _snapshot(100))
+
+    for name in ("Stock_2026-03-13_0800.csv", "Stock_2026-03-14_0800.csv"):
+        df = _snapshot(50)
+        run_quality_gate(_write_month(tmp_path, name, df), df)
+
+    assert sent == [("Stock_2026-03-13_0800.csv", False), ("Stock_2026-03-14_0800.csv", True)]
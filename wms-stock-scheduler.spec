@@ -29,7 +29,12 @@ a = Analysis(
         # 프로젝트 모듈들
         'src.downloader.daily_stock_exporter',
         'src.analyzer.daily_stock_accuracy_analyzer',
+        'src.analyzer.backfill',
+        'src.processor.product_dictionary',
+        'src.processor.history_store',
+        'src.reporter.report_run',
         'src.reporter.slack_notifier',
+        'src.reporter.markdown_to_notion',
         'src.reporter.notion_client',
         'src.reporter.notion_client_database',
         'scheduler.job_scheduler',